@@ -38,7 +38,10 @@ CREATE TABLE IF NOT EXISTS `discord_verification`.`onboarding_sessions` (
   `onboarding_channel_id` BIGINT NULL DEFAULT NULL,
   `current_page` INT NOT NULL DEFAULT '0',
   `message_id` BIGINT NULL DEFAULT NULL,
-  PRIMARY KEY (`user_id`))
+  `verification_channel_id` BIGINT NULL DEFAULT NULL,
+  `updated_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`user_id`),
+  INDEX `updated_at_idx` (`updated_at` ASC) VISIBLE)
 ENGINE = InnoDB
 DEFAULT CHARACTER SET = utf8mb4
 COLLATE = utf8mb4_0900_ai_ci;
@@ -55,10 +58,12 @@ CREATE TABLE IF NOT EXISTS `discord_verification`.`users` (
   `time_created` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
   `global_bans_discord_id` BIGINT NULL,
   `onboarding_sessions_user_id` BIGINT NULL,
+  `updated_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
   PRIMARY KEY (`id`),
   UNIQUE INDEX `discord_id` (`discord_id` ASC) VISIBLE,
   INDEX `fk_users_global_bans_idx` (`global_bans_discord_id` ASC) VISIBLE,
   INDEX `fk_users_onboarding_sessions1_idx` (`onboarding_sessions_user_id` ASC) VISIBLE,
+  INDEX `updated_at_idx` (`updated_at` ASC) VISIBLE,
   CONSTRAINT `fk_users_global_bans`
     FOREIGN KEY (`global_bans_discord_id`)
     REFERENCES `discord_verification`.`global_bans` (`discord_id`)
@@ -75,6 +80,104 @@ DEFAULT CHARACTER SET = utf8mb4
 COLLATE = utf8mb4_0900_ai_ci;
 
 
+-- -----------------------------------------------------
+-- Table `discord_verification`.`moderation_jobs`
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `discord_verification`.`moderation_jobs` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `bot_id` VARCHAR(32) NOT NULL,
+  `kind` VARCHAR(32) NOT NULL,
+  `target_id` BIGINT NULL DEFAULT NULL,
+  `reason` VARCHAR(255) NULL DEFAULT NULL,
+  `requested_by` BIGINT NULL DEFAULT NULL,
+  `created_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `finished_at` DATETIME NULL DEFAULT NULL,
+  PRIMARY KEY (`id`))
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb4
+COLLATE = utf8mb4_0900_ai_ci;
+
+
+-- -----------------------------------------------------
+-- Table `discord_verification`.`moderation_tasks`
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `discord_verification`.`moderation_tasks` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `job_id` BIGINT NOT NULL,
+  `bot_id` VARCHAR(32) NOT NULL,
+  `kind` VARCHAR(32) NOT NULL,
+  `guild_id` BIGINT NOT NULL,
+  `target_id` BIGINT NOT NULL,
+  `status` VARCHAR(16) NOT NULL DEFAULT 'pending',
+  `result` VARCHAR(32) NULL DEFAULT NULL,
+  `error` VARCHAR(255) NULL DEFAULT NULL,
+  `attempts` INT NOT NULL DEFAULT '0',
+  `elapsed` DOUBLE NOT NULL DEFAULT '0',
+  `waited` DOUBLE NOT NULL DEFAULT '0',
+  `available_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`),
+  UNIQUE INDEX `job_guild_target` (`job_id` ASC, `guild_id` ASC, `target_id` ASC) VISIBLE,
+  INDEX `claim_idx` (`bot_id` ASC, `status` ASC, `available_at` ASC) VISIBLE,
+  CONSTRAINT `fk_moderation_tasks_jobs`
+    FOREIGN KEY (`job_id`)
+    REFERENCES `discord_verification`.`moderation_jobs` (`id`)
+    ON DELETE CASCADE
+    ON UPDATE NO ACTION)
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb4
+COLLATE = utf8mb4_0900_ai_ci;
+
+
+-- -----------------------------------------------------
+-- Table `discord_verification`.`status_events`
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `discord_verification`.`status_events` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `origin` VARCHAR(32) NOT NULL,
+  `kind` VARCHAR(16) NOT NULL,
+  `discord_id` BIGINT NOT NULL,
+  `value` VARCHAR(255) NULL DEFAULT NULL,
+  `created_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`),
+  INDEX `created_at_idx` (`created_at` ASC) VISIBLE)
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb4
+COLLATE = utf8mb4_0900_ai_ci;
+
+
+-- -----------------------------------------------------
+-- Table `discord_verification`.`shard_metrics`
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `discord_verification`.`shard_metrics` (
+  `bot_id` VARCHAR(32) NOT NULL,
+  `shard_id` INT NOT NULL,
+  `cluster_id` INT NOT NULL DEFAULT '0',
+  `latency_ms` FLOAT NULL DEFAULT NULL,
+  `guilds` INT NOT NULL DEFAULT '0',
+  `members` INT NOT NULL DEFAULT '0',
+  `updated_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`bot_id`, `shard_id`))
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb4
+COLLATE = utf8mb4_0900_ai_ci;
+
+
+-- -----------------------------------------------------
+-- Table `discord_verification`.`member_snapshots`
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `discord_verification`.`member_snapshots` (
+  `bot_id` VARCHAR(32) NOT NULL,
+  `guild_id` BIGINT NOT NULL,
+  `member_ids` MEDIUMBLOB NOT NULL,
+  `member_count` INT NOT NULL DEFAULT '0',
+  `event_id` BIGINT NOT NULL DEFAULT '0',
+  `updated_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`bot_id`, `guild_id`))
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb4
+COLLATE = utf8mb4_0900_ai_ci;
+
+
 SET SQL_MODE=@OLD_SQL_MODE;
 SET FOREIGN_KEY_CHECKS=@OLD_FOREIGN_KEY_CHECKS;
 SET UNIQUE_CHECKS=@OLD_UNIQUE_CHECKS;
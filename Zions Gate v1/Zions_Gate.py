@@ -9,7 +9,7 @@ import os
 import random
 import csv
 import traceback
-import asyncio
+import time
 import aiohttp
 import requests
 
@@ -23,7 +23,22 @@ from zoneinfo import ZoneInfo
 # ----------------------------------------------------------------------------------------
 # Database connection import
 # ----------------------------------------------------------------------------------------
-from db_connection import db_connection
+from db_connection import db_pool
+from schema import ensure_schema
+from ban_index import ban_index
+from verify_cache import verify_cache
+from bulk_users import load_user_ids, insert_new_users, upsert_verified_users, upsert_global_bans, write_global_bans
+from bulk_ban import MAX_REASON_LENGTH, parse_ban_list, bulk_ban_guilds, summarize, build_report
+from ban_reconcile import BAN_RECONCILE_INTERVAL, BanReconciler, format_drift
+from role_reconcile import ROLE_RECONCILE_INTERVAL, RoleReconciler, format_role_drift
+from moderation import MAX_RATELIMIT_TIMEOUT, format_status_counts, progress_editor
+from webhook_logger import WEBHOOK_SPOOL_DIR, WebhookDispatcher
+from job_queue import JobQueue, format_job_status, format_job_summary
+from event_bus import EventBus
+from member_snapshot import MEMBER_SNAPSHOT_INTERVAL, save_snapshots, sweep_candidates
+from admission_queue import AdmissionQueue
+from onboarding_gc import ONBOARDING_GC_INTERVAL, OnboardingCollector, format_gc_report
+from onboarding_embeds import onboarding_embeds, create_page1_embed, create_rules_page2_embed, create_verification_page3_embed
 
 # ----------------------------------------------------------------------------------------
 # Load environment variables
@@ -38,6 +53,10 @@ ZIONS_GATE_ONBOARDING_ROLE_ID = int(os.getenv("zions_gate_onboarding_role_id", "
 ZIONS_GATE_WELCOME_CHANNEL_ID = int(os.getenv("zions_gate_welcome_channel_id", "0"))
 ZIONS_GATE_VERIFICATION_CATEGORY_ID_STR = os.getenv("zions_gate_verification_category_id")
 ZIONS_GATE_ONBOARDING_CATEGORY_ID_STR = os.getenv("zions_gate_onboarding_category_id")
+# "channel" (a text channel per member) or "thread" (private threads under one channel)
+ONBOARDING_MODE = os.getenv("onboarding_mode", "channel").lower()
+ZIONS_GATE_ONBOARDING_CHANNEL_ID = int(os.getenv("zions_gate_onboarding_channel_id", "0"))
+ZIONS_GATE_VERIFICATION_CHANNEL_ID = int(os.getenv("zions_gate_verification_channel_id", "0"))
 ZIONS_GATE_WELCOME_IMG_URL = os.getenv("zions_gate_welcome_img_url", "")
 GLOBAL_VERIFIED_ROLE_NAME = os.getenv("global_verified_role_name", "global verified")
 
@@ -47,14 +66,13 @@ CHECK_VERIFICATION_ON_STARTUP = os.getenv("check_verification_on_startup", "true
 # ----------------------------------------------------------------------------------------
 # Setup Discord bot
 # ----------------------------------------------------------------------------------------
-mountain_time = datetime.now(ZoneInfo("America/Denver"))
 intents = discord.Intents.default()
 intents.members = True
 intents.guilds = True
 intents.messages = True
 intents.message_content = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot = commands.Bot(command_prefix="!", intents=intents, max_ratelimit_timeout=MAX_RATELIMIT_TIMEOUT)
 
 # ----------------------------------------------------------------------------------------
 # Global questions pool (for onboarding)
@@ -85,271 +103,268 @@ QUESTIONS_POOL = [
 ]
 
 # ----------------------------------------------------------------------------------------
-# LOGGING FUNCTION (ASYNC, uses aiohttp)
+# LOGGING FUNCTION (ASYNC, batched through the shared aiohttp session)
 # ----------------------------------------------------------------------------------------
+log_dispatcher = WebhookDispatcher(default_username="Zions Gate Bot", spool_dir=os.path.join(WEBHOOK_SPOOL_DIR, "zions_gate"))
+# Global moderation runs as persistent per-guild tasks (see MODERATION JOB HANDLERS)
+job_queue = JobQueue(db_pool, "zions_gate")
+ban_reconciler = BanReconciler()
+role_reconciler = RoleReconciler(GLOBAL_VERIFIED_ROLE_NAME)
+# Tells the Zions Key process about status changes made here, and vice versa
+event_bus = EventBus(db_pool, "zions_gate")
+# Zions Gate joins wait here for an onboarding worker (see on_member_join)
+join_queue = AdmissionQueue(handler=None)
+# Deletes onboarding channels of members who left or gave up (see ONBOARDING GC TASK)
+onboarding_collector = OnboardingCollector(db_pool)
+
 async def log_action(guild, message):
     """
-    Sends a log message to the specified webhook URL if available.
+    Queues a log message for the webhook URL if available. A background sender packs
+    queued lines into as few webhook messages as possible.
     """
     if not WEBHOOK_URL:
         # If no webhook is set, just print the message.
         print(f"[{guild.name if guild else 'Unknown Guild'}] {message}")
         return
-    data = {
-        "username": f"{guild.name} Bot" if guild else "Zions Gate Bot",
-        "content": f"**[{guild.name if guild else 'Unknown Guild'}]** {message}"
-    }
-    async with aiohttp.ClientSession() as session:
-        async with session.post(WEBHOOK_URL, json=data) as response:
-            if response.status not in (200, 204):
-                response_text = await response.text()
-                print(f"Failed to send log message: {response.status} {response_text}")
+    log_dispatcher.enqueue(
+        WEBHOOK_URL,
+        content=f"**[{guild.name if guild else 'Unknown Guild'}]** {message}",
+        username=f"{guild.name} Bot" if guild else "Zions Gate Bot"
+    )
 
 # ----------------------------------------------------------------------------------------
 # ONBOARDING-RELATED DATABASE OPERATIONS
 # ----------------------------------------------------------------------------------------
+# user_id -> (onboarding channel ID, verification channel ID), mirroring onboarding_sessions
+# so a member's channels are found by ID, even after they rename themselves.
+onboarding_channels = {}
+
+async def load_onboarding_channels():
+    rows = await db_pool.fetchall(
+        "SELECT user_id, onboarding_channel_id, verification_channel_id FROM onboarding_sessions"
+    )
+    onboarding_channels.clear()
+    onboarding_channels.update({user_id: (onboarding_id, verification_id) for user_id, onboarding_id, verification_id in rows})
+    print(f"Loaded {len(onboarding_channels)} onboarding sessions.")
+
 async def save_onboarding_session(user_id, channel_id, message_id, current_page):
-    conn = db_connection()
-    cursor = conn.cursor()
     sql = """
     INSERT INTO onboarding_sessions (user_id, onboarding_channel_id, message_id, current_page)
     VALUES (%s, %s, %s, %s)
-    ON DUPLICATE KEY UPDATE onboarding_channel_id=%s, message_id=%s, current_page=%s
+    ON DUPLICATE KEY UPDATE onboarding_channel_id=%s, message_id=%s, current_page=%s, updated_at=CURRENT_TIMESTAMP
     """
-    cursor.execute(sql, (user_id, channel_id, message_id, current_page, channel_id, message_id, current_page))
-    conn.commit()
-    cursor.close()
-    conn.close()
+    await db_pool.execute(sql, (user_id, channel_id, message_id, current_page, channel_id, message_id, current_page))
+    onboarding_channels[user_id] = (channel_id, onboarding_channels.get(user_id, (None, None))[1])
+
+async def save_verification_channel(user_id, channel_id):
+    sql = """
+    INSERT INTO onboarding_sessions (user_id, verification_channel_id)
+    VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE verification_channel_id=%s
+    """
+    await db_pool.execute(sql, (user_id, channel_id, channel_id))
+    onboarding_channels[user_id] = (onboarding_channels.get(user_id, (None, None))[0], channel_id)
 
 async def delete_onboarding_session(user_id):
-    conn = db_connection()
-    cursor = conn.cursor()
     sql = "DELETE FROM onboarding_sessions WHERE user_id=%s"
-    cursor.execute(sql, (user_id,))
-    conn.commit()
-    cursor.close()
-    conn.close()
-
-async def load_onboarding_sessions():
-    conn = db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT user_id, onboarding_channel_id, message_id, current_page FROM onboarding_sessions")
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return results
-
-# ----------------------------------------------------------------------------------------
-# ONBOARDING EMBEDS
-# ----------------------------------------------------------------------------------------
-def create_page1_embed(member):
-    embed = discord.Embed(
-        title="Welcome to the Zions Gate Server!",
-        description=(
-            f"Hello, {member.mention}, and welcome to **Zions Gate**, your gateway to a network of inspiring "
-            f"and faith-filled communities centered on **The Church of Jesus Christ of Latter-day Saints**.\n\n"
-            "We are thrilled to have you here! This server is the first step into a larger, vibrant network where "
-            "members and friends of the Church can explore gospel truths, build uplifting connections, and strengthen "
-            "their testimony of Jesus Christ."
-        ),
-        color=0x1E90FF
-    )
-    embed.add_field(
-        name="🌟 A Place of Connection and Growth:",
-        value=(
-            "Here at Zions Gate, you are stepping into a virtual gateway that connects you to an array of communities "
-            "designed to inspire, uplift, and strengthen your testimony. You’ll find spaces where Saints gather to study "
-            "the word of God, share their testimonies, and help one another walk the covenant path."
-        ),
-        inline=False
-    )
-    embed.add_field(
-        name="✨ A Spiritual Thought:",
-        value=(
-            "*\"And now, my beloved brethren, after ye have gotten into this straight and narrow path, I would ask if all is done? "
-            "Behold, I say unto you, Nay; ... relying wholly upon the merits of him who is mighty to save.\"*\n"
-            "– **2 Nephi 31:19**\n\n"
-            "As we press forward with faith, the Savior walks with us."
-        ),
-        inline=False
-    )
-    embed.add_field(
-        name="💡 Why This Community Matters:",
-        value=(
-            "- **Fellowship**: Meet others who share your beliefs.\n"
-            "- **Learning**: Discussions deepen understanding.\n"
-            "- **Service**: Uplifting activities strengthen communities.\n"
-            "- **Growth**: Every interaction builds testimony."
-        ),
-        inline=False
-    )
-    embed.set_footer(text="Welcome to Zions Gate! It’s a gateway to Zion. 💙")
-    if ZIONS_GATE_WELCOME_IMG_URL:
-        embed.set_image(url=ZIONS_GATE_WELCOME_IMG_URL)
-    return embed
-
-def create_rules_page2_embed():
-    embed = discord.Embed(
-        title="📜 Global Server Rules",
-        description="Please read and follow all the rules below for a friendly and welcoming environment.",
-        color=0x1ABC9C
-    )
-    rules = [
-        ("1️⃣ No Harassment or Hate Speech", "Treat all with respect."),
-        ("2️⃣ No Spamming", "Avoid repetitive spam."),
-        ("3️⃣ No NSFW Outside NSFW Areas", "Keep adult content in 18+ areas."),
-        ("4️⃣ Follow Discord’s Guidelines", "No illegal activities/hacking."),
-        ("5️⃣ No Impersonation", "Be yourself, no impersonation."),
-        ("6️⃣ No Doxxing", "Don't share personal info without consent."),
-        ("7️⃣ No Unauthorized Promotion", "Promote content only if allowed."),
-        ("8️⃣ Respect Channels", "Stay on-topic."),
-        ("9️⃣ No Malicious Exploits", "No bots/scripts to exploit."),
-        ("🔟 Appropriate Usernames/Avatars", "Keep them suitable."),
-        ("⚖️ Enforcement", "Penalties increase for repeated offenses."),
-        ("📌 Disclaimer", "Rules may change at any time.")
-    ]
-    for name, value in rules:
-        embed.add_field(name=name, value=value, inline=False)
-    embed.set_footer(text="Thank you for being part of our community!")
-    return embed
-
-def create_verification_page3_embed():
-    embed = discord.Embed(
-        title="Verification Process",
-        description=(
-            "Thank you for agreeing to the rules. Before you can access our servers, we need you to take one more step "
-            "by answering a few verification questions. These questions are not meant to challenge you, but to get a "
-            "sense of what you know. If you don’t know something, feel free to say so—you may be asked a few follow-up "
-            "questions. We appreciate your time and patience; we wouldn’t ask if it wasn’t necessary.\n\n"
-            "Click **Get Verified** below to open a private verification channel."
-        ),
-        color=0x1E90FF
+    await db_pool.execute(sql, (user_id,))
+    onboarding_channels.pop(user_id, None)
+
+# ----------------------------------------------------------------------------------------
+# ONBOARDING EMBEDS (built once and cached, see onboarding_embeds.py)
+# ----------------------------------------------------------------------------------------
+onboarding_embeds.set_image_url(ZIONS_GATE_WELCOME_IMG_URL)
+
+# ----------------------------------------------------------------------------------------
+# ONBOARDING SPACES (private channels or private threads)
+# ----------------------------------------------------------------------------------------
+# With onboarding_mode=thread, onboarding and verification happen in private threads under
+# one channel instead of a text channel per member. Threads do not count towards the
+# guild's 500 channel limit and are cheaper to create and delete.
+async def get_onboarding_space(guild, channel_id):
+    """
+    Returns the channel or thread with this ID, or None if it no longer exists.
+    """
+    if not channel_id:
+        return None
+    space = guild.get_channel_or_thread(channel_id)
+    if space is None and ONBOARDING_MODE == "thread":
+        # Archived threads are not cached
+        try:
+            space = await guild.fetch_channel(channel_id)
+        except discord.HTTPException:
+            return None
+    return space
+
+async def open_onboarding_space(member, name, kind):
+    """
+    Creates a private "onboarding" or "verification" space only the member (and staff)
+    can see: a text channel in the configured category, or in thread mode a private
+    thread under the configured channel. Returns None if that is not configured.
+    """
+    guild = member.guild
+    reason = f"{kind.capitalize()} channel for {member.name}"
+    if ONBOARDING_MODE == "thread":
+        parent_id = ZIONS_GATE_ONBOARDING_CHANNEL_ID
+        if kind == "verification" and ZIONS_GATE_VERIFICATION_CHANNEL_ID:
+            parent_id = ZIONS_GATE_VERIFICATION_CHANNEL_ID
+        parent = guild.get_channel(parent_id)
+        if not isinstance(parent, discord.TextChannel):
+            print(f"{kind.capitalize()} thread channel not found.")
+            return None
+        thread = await parent.create_thread(
+            name=name,
+            type=discord.ChannelType.private_thread,
+            invitable=False,
+            auto_archive_duration=10080,
+            reason=reason
+        )
+        await thread.add_user(member)
+        return thread
+
+    if kind == "verification":
+        if ZIONS_GATE_VERIFICATION_CATEGORY_ID_STR:
+            category = guild.get_channel(int(ZIONS_GATE_VERIFICATION_CATEGORY_ID_STR))
+        else:
+            category = discord.utils.get(guild.categories, name="Verification")
+            if category is None:
+                category = await guild.create_category("Verification")
+    else:
+        if not ZIONS_GATE_ONBOARDING_CATEGORY_ID_STR:
+            print("Onboarding category ID not set.")
+            return None
+        category = guild.get_channel(int(ZIONS_GATE_ONBOARDING_CATEGORY_ID_STR))
+        if not (category and isinstance(category, discord.CategoryChannel)):
+            print("Onboarding category not found.")
+            return None
+    return await guild.create_text_channel(
+        name=name,
+        category=category,
+        reason=reason,
+        overwrites={
+            guild.default_role: discord.PermissionOverwrite(read_messages=False),
+            member: discord.PermissionOverwrite(read_messages=True, send_messages=True)
+        }
     )
-    embed.set_footer(text="We appreciate your patience.")
-    return embed
 
 # ----------------------------------------------------------------------------------------
 # DISCORD UI VIEWS (Buttons) FOR ONBOARDING
 # ----------------------------------------------------------------------------------------
+# The onboarding buttons are stateless. Each custom_id carries the action, the page the
+# button sits on and the member it belongs to (e.g. "onboarding:back:2:1234"), and the
+# button classes are registered once in setup_hook with bot.add_dynamic_items. Any click
+# on any onboarding message is then served straight from its custom_id, after a restart
+# too, without keeping a view object per open session.
+def create_onboarding_page(member, page):
+    if page == 0:
+        return create_page1_embed(member)
+    if page == 1:
+        return create_rules_page2_embed()
+    return create_verification_page3_embed()
+
 class OnboardingView(discord.ui.View):
-    def __init__(self, page1, page2, page3, member, guild, onboarding_channel):
+    def __init__(self, user_id, page=0, verify_disabled=False):
         super().__init__(timeout=None)
-        self.pages = [page1, page2, page3]
-        self.current_page = 0
-        self.member = member
-        self.guild = guild
-        self.onboarding_channel = onboarding_channel
-        self.update_buttons()
-
-    def update_buttons(self):
-        self.clear_items()
-        if self.current_page == 0:
-            self.add_item(NextButton(self.member, self.guild))
-        elif self.current_page == 1:
-            self.add_item(BackButton(self.member))
-            self.add_item(AgreeButton(self.member))
-        elif self.current_page == 2:
-            self.add_item(BackButton(self.member))
-            self.add_item(GetVerifiedButton(self.member, self.guild, self.onboarding_channel))
-
-    async def update_message(self, interaction: discord.Interaction):
-        await interaction.response.edit_message(embed=self.pages[self.current_page], view=self)
-
-class NextButton(discord.ui.Button):
-    def __init__(self, member, guild):
-        super().__init__(label="Next", style=discord.ButtonStyle.primary)
-        self.member = member
-        self.guild = guild
+        if page == 0:
+            self.add_item(NextButton(user_id))
+        elif page == 1:
+            self.add_item(BackButton(user_id, page))
+            self.add_item(AgreeButton(user_id))
+        else:
+            self.add_item(BackButton(user_id, page))
+            self.add_item(GetVerifiedButton(user_id, disabled=verify_disabled))
+
+async def check_onboarding_user(interaction: discord.Interaction, user_id):
+    if interaction.user.id != user_id:
+        await interaction.response.send_message("You cannot use these buttons.", ephemeral=True)
+        return False
+    return True
+
+async def show_onboarding_page(interaction: discord.Interaction, user_id, page):
+    await interaction.response.edit_message(
+        embed=create_onboarding_page(interaction.user, page),
+        view=OnboardingView(user_id, page)
+    )
+
+class NextButton(discord.ui.DynamicItem[discord.ui.Button], template=r"onboarding:next:0:(?P<user_id>[0-9]+)"):
+    def __init__(self, user_id):
+        super().__init__(discord.ui.Button(label="Next", style=discord.ButtonStyle.primary, custom_id=f"onboarding:next:0:{user_id}"))
+        self.user_id = user_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match["user_id"]))
 
     async def callback(self, interaction: discord.Interaction):
-        if interaction.user.id != self.member.id:
-            await interaction.response.send_message("You cannot use these buttons.", ephemeral=True)
+        if not await check_onboarding_user(interaction, self.user_id):
             return
-        view: OnboardingView = self.view
-        view.current_page = 1
-        view.update_buttons()
-        role = self.guild.get_role(ZIONS_GATE_ONBOARDING_ROLE_ID)
-        if role and role not in self.member.roles:
-            await self.member.add_roles(role)
-        await view.update_message(interaction)
-
-class BackButton(discord.ui.Button):
-    def __init__(self, member):
-        super().__init__(label="Back", style=discord.ButtonStyle.secondary)
-        self.member = member
+        role = interaction.guild.get_role(ZIONS_GATE_ONBOARDING_ROLE_ID)
+        if role and role not in interaction.user.roles:
+            await interaction.user.add_roles(role)
+        await show_onboarding_page(interaction, self.user_id, 1)
+
+class BackButton(discord.ui.DynamicItem[discord.ui.Button], template=r"onboarding:back:(?P<page>[12]):(?P<user_id>[0-9]+)"):
+    def __init__(self, user_id, page):
+        super().__init__(discord.ui.Button(label="Back", style=discord.ButtonStyle.secondary, custom_id=f"onboarding:back:{page}:{user_id}"))
+        self.user_id = user_id
+        self.page = page
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match["user_id"]), int(match["page"]))
 
     async def callback(self, interaction: discord.Interaction):
-        if interaction.user.id != self.member.id:
-            await interaction.response.send_message("You cannot use these buttons.", ephemeral=True)
+        if not await check_onboarding_user(interaction, self.user_id):
             return
-        view: OnboardingView = self.view
-        if view.current_page > 0:
-            view.current_page -= 1
-            view.update_buttons()
-            await view.update_message(interaction)
+        await show_onboarding_page(interaction, self.user_id, self.page - 1)
 
-class AgreeButton(discord.ui.Button):
-    def __init__(self, member):
-        super().__init__(label="Agree", style=discord.ButtonStyle.success)
-        self.member = member
+class AgreeButton(discord.ui.DynamicItem[discord.ui.Button], template=r"onboarding:agree:1:(?P<user_id>[0-9]+)"):
+    def __init__(self, user_id):
+        super().__init__(discord.ui.Button(label="Agree", style=discord.ButtonStyle.success, custom_id=f"onboarding:agree:1:{user_id}"))
+        self.user_id = user_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match["user_id"]))
 
     async def callback(self, interaction: discord.Interaction):
-        if interaction.user.id != self.member.id:
-            await interaction.response.send_message("You cannot use these buttons.", ephemeral=True)
+        if not await check_onboarding_user(interaction, self.user_id):
             return
-        view: OnboardingView = self.view
-        view.current_page = 2
-        view.update_buttons()
-        await view.update_message(interaction)
-
-class GetVerifiedButton(discord.ui.Button):
-    def __init__(self, member, guild, onboarding_channel):
-        super().__init__(label="Get Verified", style=discord.ButtonStyle.primary)
-        self.member = member
-        self.guild = guild
-        self.onboarding_channel = onboarding_channel
+        await show_onboarding_page(interaction, self.user_id, 2)
+
+class GetVerifiedButton(discord.ui.DynamicItem[discord.ui.Button], template=r"onboarding:verify:2:(?P<user_id>[0-9]+)"):
+    def __init__(self, user_id, disabled=False):
+        super().__init__(discord.ui.Button(label="Get Verified", style=discord.ButtonStyle.primary, custom_id=f"onboarding:verify:2:{user_id}", disabled=disabled))
+        self.user_id = user_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match["user_id"]))
 
     async def callback(self, interaction: discord.Interaction):
-        if interaction.user.id != self.member.id:
-            await interaction.response.send_message("You cannot use these buttons.", ephemeral=True)
+        if not await check_onboarding_user(interaction, self.user_id):
             return
-        view: OnboardingView = self.view
-        for item in view.children:
-            if isinstance(item, GetVerifiedButton):
-                item.disabled = True
-
-        await interaction.response.edit_message(view=view)
+        member = interaction.user
+        guild = interaction.guild
+        await interaction.response.edit_message(view=OnboardingView(self.user_id, 2, verify_disabled=True))
 
-        verification_channel_name = f"verify-{self.member.name.lower()}-{self.member.discriminator}"
-        existing_channel = discord.utils.get(self.guild.text_channels, name=verification_channel_name)
+        existing_channel = await get_onboarding_space(guild, onboarding_channels.get(member.id, (None, None))[1])
 
         if existing_channel:
             await interaction.followup.send("You already have a verification channel.", ephemeral=True)
             return
 
-        if ZIONS_GATE_VERIFICATION_CATEGORY_ID_STR:
-            category = self.guild.get_channel(int(ZIONS_GATE_VERIFICATION_CATEGORY_ID_STR))
-        else:
-            category = discord.utils.get(self.guild.categories, name="Verification")
-            if category is None:
-                category = await self.guild.create_category("Verification")
-
-        overwrites = {
-            self.guild.default_role: discord.PermissionOverwrite(read_messages=False),
-            self.member: discord.PermissionOverwrite(read_messages=True, send_messages=True)
-        }
-
-        verification_channel = await self.guild.create_text_channel(
-            name=verification_channel_name,
-            category=category,
-            reason=f"Verification channel for {self.member.name}",
-            overwrites=overwrites
-        )
+        verification_channel_name = f"verify-{member.name.lower()}-{member.discriminator}"
+        verification_channel = await open_onboarding_space(member, verification_channel_name, "verification")
+        if verification_channel is None:
+            await interaction.followup.send("Verification is not set up yet. Please contact a moderator.", ephemeral=True)
+            return
+        await save_verification_channel(member.id, verification_channel.id)
 
         questions = random.sample(QUESTIONS_POOL, 3)
         question_text = "\n".join([f"{i+1}. {q}" for i, q in enumerate(questions)])
         await verification_channel.send(
-            content=(f"{self.member.mention}, please answer:\n\n{question_text}")
+            content=(f"{member.mention}, please answer:\n\n{question_text}")
         )
 
         await interaction.followup.send(
@@ -359,44 +374,54 @@ class GetVerifiedButton(discord.ui.Button):
         )
 
 # ----------------------------------------------------------------------------------------
-# RESTORE ONBOARDING VIEWS (for persistent buttons)
+# BOT EVENTS - setup_hook
 # ----------------------------------------------------------------------------------------
-async def restore_onboarding_views():
-    sessions = await load_onboarding_sessions()
-    guild = bot.get_guild(ZIONS_GATE_GUILD_ID)
-    if guild:
-        for row in sessions:
-            # Old rows might have fewer columns; skip them
-            if len(row) < 4:
-                await delete_onboarding_session(row[0])
-                continue
-            user_id, channel_id, message_id, current_page = row
-            channel = guild.get_channel(channel_id)
-            if not channel:
-                await delete_onboarding_session(user_id)
-                continue
-            member = guild.get_member(user_id)
-            if not member:
-                await delete_onboarding_session(user_id)
-                continue
+async def setup_hook():
+    """
+    Runs once before the gateway connects. Opens the shared database pool and HTTP
+    session, adds any columns an existing database is missing, registers the onboarding
+    buttons, starts the webhook log sender and loads the global ban index, verification
+    cache and onboarding channel IDs.
+    """
+    await db_pool.start()
+    try:
+        await ensure_schema(db_pool)
+    except Exception as e:
+        print(f"Error updating the database schema: {e}")
+        traceback.print_exc()
+    bot.http_session = aiohttp.ClientSession()
+    log_dispatcher.start(bot.http_session, urls=[WEBHOOK_URL])
+    # Serves clicks on every onboarding message, old or new (see OnboardingView)
+    bot.add_dynamic_items(NextButton, BackButton, AgreeButton, GetVerifiedButton)
+    try:
+        await ban_index.load(db_pool)
+    except Exception as e:
+        print(f"Error loading ban index: {e}")
+    try:
+        await verify_cache.load(db_pool)
+    except Exception as e:
+        print(f"Error loading verification cache: {e}")
+    try:
+        await load_onboarding_channels()
+    except Exception as e:
+        print(f"Error loading onboarding sessions: {e}")
 
-            page1 = create_page1_embed(member)
-            page2 = create_rules_page2_embed()
-            page3 = create_verification_page3_embed()
+bot.setup_hook = setup_hook
 
-            view = OnboardingView(page1, page2, page3, member, guild, channel)
-            view.current_page = current_page
-            view.update_buttons()
+async def close_bot():
+    """
+    Flushes queued log messages and closes shared resources before disconnecting.
+    """
+    await join_queue.close()
+    await event_bus.close()
+    await job_queue.close()
+    await log_dispatcher.close()
+    if getattr(bot, "http_session", None):
+        await bot.http_session.close()
+    await db_pool.close()
+    await commands.Bot.close(bot)
 
-            try:
-                msg = await channel.fetch_message(message_id)
-                await msg.edit(view=view)
-            except discord.NotFound:
-                await delete_onboarding_session(user_id)
-            except discord.Forbidden:
-                pass
-            except discord.HTTPException as e:
-                print(f"Error restoring view for user {user_id}: {e}")
+bot.close = close_bot
 
 # ----------------------------------------------------------------------------------------
 # BOT EVENTS - on_ready
@@ -404,8 +429,8 @@ async def restore_onboarding_views():
 @bot.event
 async def on_ready():
     """
-    Called when the bot is ready. Syncs commands, starts tasks, restores onboarding views,
-    and performs a global ban check.
+    Called when the bot is ready. Syncs commands, starts tasks and performs a global
+    ban check.
     """
     print(f"Logged in as {bot.user} (ID: {bot.user.id})")
     print('------')
@@ -419,42 +444,129 @@ async def on_ready():
     # Start the background task for verifying roles if not already running
     if not synchronize_verified_users.is_running():
         synchronize_verified_users.start()
-
-    # Restore any persistent onboarding views
-    await restore_onboarding_views()
+    if not refresh_ban_index.is_running():
+        refresh_ban_index.start()
+    if not reconcile_bans.is_running():
+        reconcile_bans.start()
+    if not reconcile_roles.is_running():
+        reconcile_roles.start()
+    if not collect_onboarding_garbage.is_running():
+        collect_onboarding_garbage.start()
+
+    # Work through moderation jobs, including any left over from the last run
+    try:
+        await job_queue.start()
+    except Exception as e:
+        print(f"Error starting moderation job queue: {e}")
+    try:
+        await event_bus.start()
+    except Exception as e:
+        print(f"Error starting status event bus: {e}")
+    join_queue.start()
 
     # ------------------------------------------------------------------------------------
     # Perform global ban check on startup
     # ------------------------------------------------------------------------------------
-    total_banned = 0
+    # Only members who joined since the last member snapshot and users whose status
+    # changed since it are checked; guilds without a recent snapshot are checked in full
+    try:
+        candidates, full = await sweep_candidates(db_pool, "zions_gate", bot.guilds)
+        print(f"Startup checks cover {sum(map(len, candidates.values()))} members ({full} of {len(bot.guilds)} guilds in full).")
+    except Exception as e:
+        print(f"Error loading member snapshots, checking every member: {e}")
+        candidates = {g.id: g.members for g in bot.guilds}
     try:
         print("Performing global ban check on startup...")
-        conn = db_connection()
-        cursor = conn.cursor()
-        try:
-            sql_get_bans = "SELECT discord_id FROM global_bans"
-            cursor.execute(sql_get_bans)
-            banned_ids = [row[0] for row in cursor.fetchall()]
-            for g in bot.guilds:
-                for member in g.members:
-                    if member.id in banned_ids:
-                        if g.me.guild_permissions.ban_members:
-                            try:
-                                await g.ban(member, reason="Globally banned.")
-                                print(f"Banned globally banned user {member} in {g.name}.")
-                                await log_action(g, f"Banned globally banned user {member}.")
-                                total_banned += 1
-                            except Exception as err:
-                                print(f"Error banning {member} in {g.name}: {err}")
-                        else:
-                            print(f"Bot lacks 'Ban Members' permission in {g.name}.")
-        finally:
-            cursor.close()
-            conn.close()
+        if not ban_index.loaded:
+            await ban_index.load(db_pool)
+        pending = [(guild_id, member.id) for guild_id, members in candidates.items() for member in members if member.id in ban_index]
+        if pending:
+            job_id = await job_queue.enqueue("global_ban", pending, reason="Startup global ban check")
+            print(f"Queued {len(pending)} startup bans as moderation job #{job_id}.")
+        else:
+            print("Global ban check complete. No globally banned members found.")
     except Exception as e:
         print(f"Error during global ban check on startup: {e}")
         traceback.print_exc()
-    print(f"Global ban check complete. Total users banned: {total_banned}.")
+
+    try:
+        await save_snapshots(db_pool, "zions_gate", bot.guilds, event_bus.start_id)
+    except Exception as e:
+        print(f"Error saving member snapshots: {e}")
+    if not refresh_member_snapshots.is_running():
+        refresh_member_snapshots.start()
+
+# ----------------------------------------------------------------------------------------
+# ONBOARDING GC TASK
+# ----------------------------------------------------------------------------------------
+def onboarding_gc_spaces(guild):
+    """
+    Returns the onboarding and verification channels (or active threads) in the guild,
+    which the collector checks for ones no session points at.
+    """
+    if ONBOARDING_MODE == "thread":
+        parents = [guild.get_channel(ZIONS_GATE_ONBOARDING_CHANNEL_ID), guild.get_channel(ZIONS_GATE_VERIFICATION_CHANNEL_ID)]
+        spaces = [thread for parent in parents if isinstance(parent, discord.TextChannel) for thread in parent.threads]
+    else:
+        category_ids = [int(category_id) for category_id in (ZIONS_GATE_ONBOARDING_CATEGORY_ID_STR, ZIONS_GATE_VERIFICATION_CATEGORY_ID_STR) if category_id]
+        categories = [guild.get_channel(category_id) for category_id in category_ids]
+        if not ZIONS_GATE_VERIFICATION_CATEGORY_ID_STR:
+            categories.append(discord.utils.get(guild.categories, name="Verification"))
+        spaces = [channel for category in categories if isinstance(category, discord.CategoryChannel) for channel in category.text_channels]
+    # Only what open_onboarding_space names, never staff channels sharing the category
+    return list({space.id: space for space in spaces if space.name.startswith(("welcome-", "verify-"))}.values())
+
+async def run_onboarding_gc(dry_run=False, progress=None):
+    """
+    Runs the onboarding collector over the Zions Gate guild and forgets purged sessions.
+    Returns (stale sessions, RunReport or None), or None if the guild is not available.
+    """
+    guild = bot.get_guild(ZIONS_GATE_GUILD_ID)
+    if guild is None:
+        return None
+    tracked_ids = {channel_id for channel_ids in onboarding_channels.values() for channel_id in channel_ids if channel_id}
+    stale, report, purged = await onboarding_collector.collect(
+        guild, onboarding_gc_spaces(guild), tracked_ids, dry_run=dry_run, progress=progress
+    )
+    for user_id in purged:
+        onboarding_channels.pop(user_id, None)
+    return stale, report
+
+@tasks.loop(minutes=ONBOARDING_GC_INTERVAL)
+async def collect_onboarding_garbage():
+    """
+    Deletes onboarding and verification channels of members who left the server or
+    abandoned onboarding, and purges their sessions.
+    """
+    try:
+        result = await run_onboarding_gc()
+        if result is None:
+            return
+        stale, report = result
+        if report is not None:
+            await log_action(
+                bot.get_guild(ZIONS_GATE_GUILD_ID),
+                f"Onboarding cleanup: {len(stale)} stale sessions, {format_status_counts(report.counts())}."
+            )
+    except Exception as e:
+        print(f"Error during onboarding cleanup: {e}")
+        traceback.print_exc()
+
+# ----------------------------------------------------------------------------------------
+# MEMBER SNAPSHOT TASK
+# ----------------------------------------------------------------------------------------
+@tasks.loop(minutes=MEMBER_SNAPSHOT_INTERVAL)
+async def refresh_member_snapshots():
+    """
+    Keeps the member snapshots recent so the next restart only checks members who
+    joined after them. Members who joined in the meantime went through on_member_join.
+    """
+    if refresh_member_snapshots.current_loop == 0:
+        return
+    try:
+        await save_snapshots(db_pool, "zions_gate", bot.guilds, event_bus.delivered_through)
+    except Exception as e:
+        print(f"Error saving member snapshots: {e}")
 
 # ----------------------------------------------------------------------------------------
 # BOT EVENTS - on_member_join (for the Zions Gate server onboarding)
@@ -462,114 +574,90 @@ async def on_ready():
 @bot.event
 async def on_member_join(member):
     """
-    Handles onboarding logic for the Zions Gate server. 
-    If the user is already verified in the database, it grants roles. Otherwise,
-    it creates an onboarding channel for them.
+    Queues new Zions Gate members for onboarding. The join queue's workers create the
+    onboarding channels (see onboard_member), so a burst of joins waits in a bounded
+    queue instead of piling up on the channel creation rate limit.
     """
-    try:
-        if member.guild.id != ZIONS_GATE_GUILD_ID:
-            return
-        if member.bot:
-            return
+    if member.guild.id != ZIONS_GATE_GUILD_ID or member.bot:
+        return
+    if not join_queue.submit(member.id, member):
+        print(f"Join queue is full; {member} (ID: {member.id}) was not queued for onboarding.")
+        await log_action(member.guild, f"Join queue full ({len(join_queue)} waiting): {member.mention} was not given an onboarding channel.")
+
+@bot.event
+async def on_member_remove(member):
+    # Members who leave while still queued are dropped from the join queue
+    if member.guild.id == ZIONS_GATE_GUILD_ID:
+        join_queue.discard(member.id)
 
-        guild = member.guild
-        conn = db_connection()
-        cursor = conn.cursor()
-        sql = "SELECT verify_status FROM users WHERE discord_id=%s"
-        cursor.execute(sql, (member.id,))
-        result = cursor.fetchone()
-        cursor.close()
-        conn.close()
+async def create_onboarding_channel(member, page1):
+    """
+    Creates the member's private onboarding channel (or thread), posts the first
+    onboarding page and saves the session.
+    """
+    # A member who rejoins keeps their existing onboarding channel
+    onboarding_channel = await get_onboarding_space(member.guild, onboarding_channels.get(member.id, (None, None))[0])
+    if onboarding_channel is None:
+        channel_name = f"welcome-{member.name}".lower().replace(" ", "-").replace("#", "").replace("@", "")
+        onboarding_channel = await open_onboarding_space(member, channel_name, "onboarding")
+        if onboarding_channel is None:
+            return
+    elif isinstance(onboarding_channel, discord.Thread):
+        await onboarding_channel.add_user(member)
+    else:
+        await onboarding_channel.set_permissions(member, read_messages=True, send_messages=True)
+    msg = await onboarding_channel.send(embed=page1, view=OnboardingView(member.id))
+    await save_onboarding_session(member.id, onboarding_channel.id, msg.id, 0)
 
-        user_exists = (result is not None)
-        verified_status = result[0] if user_exists else 0
+async def onboard_member(member, waited):
+    """
+    Join queue handler. If the user is already verified in the database, it grants
+    roles. Otherwise, it creates an onboarding channel for them.
+    """
+    guild = member.guild
+    if guild.get_member(member.id) is None:
+        # Left after being handed to a worker
+        join_queue.dropped += 1
+        return
+    try:
+        status = await verify_cache.get(db_pool, member.id)
 
-        if user_exists:
+        if status == 1:
             # If user exists in DB and is verified
-            if verified_status == 1:
-                global_verified_role = discord.utils.find(
-                    lambda r: r.name.lower() == GLOBAL_VERIFIED_ROLE_NAME.lower(),
-                    guild.roles
+            global_verified_role = discord.utils.find(
+                lambda r: r.name.lower() == GLOBAL_VERIFIED_ROLE_NAME.lower(),
+                guild.roles
+            )
+            if global_verified_role and global_verified_role not in member.roles:
+                await member.add_roles(global_verified_role)
+            welcome_channel = guild.get_channel(ZIONS_GATE_WELCOME_CHANNEL_ID)
+            if welcome_channel:
+                await welcome_channel.send(
+                    f"Welcome back {member.mention} to Zions Gate! You've got full access as before!"
                 )
-                if global_verified_role and global_verified_role not in member.roles:
-                    await member.add_roles(global_verified_role)
-                welcome_channel = guild.get_channel(ZIONS_GATE_WELCOME_CHANNEL_ID)
-                if welcome_channel:
-                    await welcome_channel.send(
-                        f"Welcome back {member.mention} to Zions Gate! You've got full access as before!"
-                    )
-                await delete_onboarding_session(member.id)
-                return
-            else:
-                # User in DB but not verified
-                page1 = create_page1_embed(member)
-                page1.description = f"**Welcome back {member.mention}!**\n" + (page1.description or "")
-                page2 = create_rules_page2_embed()
-                page3 = create_verification_page3_embed()
-
-                if ZIONS_GATE_ONBOARDING_CATEGORY_ID_STR:
-                    category = guild.get_channel(int(ZIONS_GATE_ONBOARDING_CATEGORY_ID_STR))
-                    if category and isinstance(category, discord.CategoryChannel):
-                        await asyncio.sleep(0.5)
-                        channel_name = f"welcome-{member.name}".lower().replace(" ", "-").replace("#", "").replace("@", "")
-                        onboarding_channel = await guild.create_text_channel(
-                            name=channel_name,
-                            category=category,
-                            reason=f"Onboarding channel for {member.name}",
-                            overwrites={
-                                guild.default_role: discord.PermissionOverwrite(read_messages=False),
-                                member: discord.PermissionOverwrite(read_messages=True, send_messages=True)
-                            }
-                        )
-                        view = OnboardingView(page1, page2, page3, member, guild, onboarding_channel)
-                        msg = await onboarding_channel.send(embed=page1, view=view)
-                        await save_onboarding_session(member.id, onboarding_channel.id, msg.id, 0)
-                    else:
-                        print("Onboarding category not found.")
-                else:
-                    print("Onboarding category ID not set.")
+            await delete_onboarding_session(member.id)
+        elif status is not None:
+            # User in DB but not verified
+            page1 = create_page1_embed(member)
+            page1.description = f"**Welcome back {member.mention}!**\n" + (page1.description or "")
+            await create_onboarding_channel(member, page1)
         else:
             # User does not exist in DB
-            conn = db_connection()
-            cursor = conn.cursor()
             sql_insert_user = """
             INSERT INTO users (discord_id, time_created, verify_status, username)
             VALUES (%s, %s, %s, %s)
             """
-            cursor.execute(sql_insert_user, (member.id, datetime.now(timezone.utc), 0, member.name))
-            conn.commit()
-            cursor.close()
-            conn.close()
-
-            page1 = create_page1_embed(member)
-            page2 = create_rules_page2_embed()
-            page3 = create_verification_page3_embed()
-
-            if ZIONS_GATE_ONBOARDING_CATEGORY_ID_STR:
-                category = guild.get_channel(int(ZIONS_GATE_ONBOARDING_CATEGORY_ID_STR))
-                if category and isinstance(category, discord.CategoryChannel):
-                    await asyncio.sleep(0.5)
-                    channel_name = f"welcome-{member.name}".lower().replace(" ", "-").replace("#", "").replace("@", "")
-                    onboarding_channel = await guild.create_text_channel(
-                        name=channel_name,
-                        category=category,
-                        reason=f"Onboarding channel for {member.name}",
-                        overwrites={
-                            guild.default_role: discord.PermissionOverwrite(read_messages=False),
-                            member: discord.PermissionOverwrite(read_messages=True, send_messages=True)
-                        }
-                    )
-                    view = OnboardingView(page1, page2, page3, member, guild, onboarding_channel)
-                    msg = await onboarding_channel.send(embed=page1, view=view)
-                    await save_onboarding_session(member.id, onboarding_channel.id, msg.id, 0)
-                else:
-                    print("Onboarding category not found.")
-            else:
-                print("Onboarding category ID not set.")
+            await db_pool.execute(sql_insert_user, (member.id, datetime.now(timezone.utc), 0, member.name))
+            verify_cache.put(member.id, 0)
+            await create_onboarding_channel(member, create_page1_embed(member))
+    except discord.RateLimited:
+        raise
     except Exception as e:
-        print(f"Error in on_member_join for {member.name} (ID: {member.id}): {e}")
+        print(f"Error onboarding {member.name} (ID: {member.id}) after {waited:.1f}s in the join queue: {e}")
         traceback.print_exc()
 
+join_queue.handler = onboard_member
+
 # ----------------------------------------------------------------------------------------
 # VERIFY COMMAND (Administrator only)
 # ----------------------------------------------------------------------------------------
@@ -577,12 +665,9 @@ async def on_member_join(member):
 @discord.app_commands.checks.has_permissions(administrator=True)
 async def verify(interaction: discord.Interaction, member: discord.Member):
     await interaction.response.defer()
-    conn = db_connection()
-    cursor = conn.cursor()
     try:
-        sql_update_status = "UPDATE users SET verify_status = %s WHERE discord_id = %s"
-        cursor.execute(sql_update_status, (1, member.id))
-        conn.commit()
+        await verify_cache.set_status(db_pool, member.id, 1)
+        await event_bus.publish("verify", member.id, 1)
 
         guild = interaction.guild
         if guild:
@@ -597,12 +682,8 @@ async def verify(interaction: discord.Interaction, member: discord.Member):
             if global_verified_role and global_verified_role not in member.roles:
                 await member.add_roles(global_verified_role)
 
-            verification_channel_name = f"verify-{member.name.lower()}-{member.discriminator}"
-            onboarding_channel_name = f"welcome-{member.name}".lower().replace(" ", "-").replace("#", "").replace("@", "")
-            verification_channel = discord.utils.get(guild.text_channels, name=verification_channel_name)
-            was_in_verification_channel = False
-            if verification_channel and interaction.channel == verification_channel:
-                was_in_verification_channel = True
+            onboarding_channel_id, verification_channel_id = onboarding_channels.get(member.id, (None, None))
+            was_in_verification_channel = bool(verification_channel_id) and interaction.channel_id == verification_channel_id
 
             if was_in_verification_channel:
                 await interaction.followup.send(
@@ -623,13 +704,14 @@ async def verify(interaction: discord.Interaction, member: discord.Member):
             else:
                 await interaction.followup.send(f"{member.mention} has been verified!")
 
+            verification_channel = await get_onboarding_space(guild, verification_channel_id)
             if verification_channel:
                 try:
                     await verification_channel.delete(reason="User verified")
                 except:
                     pass
 
-            onboarding_channel = discord.utils.get(guild.text_channels, name=onboarding_channel_name)
+            onboarding_channel = await get_onboarding_space(guild, onboarding_channel_id)
             if onboarding_channel:
                 try:
                     await onboarding_channel.delete(reason="User verified and onboarding complete")
@@ -643,9 +725,6 @@ async def verify(interaction: discord.Interaction, member: discord.Member):
     except Exception as e:
         print(f"Error during verification: {e}")
         traceback.print_exc()
-    finally:
-        cursor.close()
-        conn.close()
 
 # ----------------------------------------------------------------------------------------
 # VERIFY_ALL COMMAND (Administrator only) - from the first snippet
@@ -657,8 +736,6 @@ async def verify_all(interaction: discord.Interaction):
     Sets verify_status=1 for all members in the database and adds the global verified role.
     """
     await interaction.response.defer()
-    conn = db_connection()
-    cursor = conn.cursor()
     try:
         guild = interaction.guild
         if not guild:
@@ -673,56 +750,69 @@ async def verify_all(interaction: discord.Interaction):
             await interaction.followup.send(f"'{GLOBAL_VERIFIED_ROLE_NAME}' role not found in the server.")
             return
 
-        for member in guild.members:
-            try:
-                if member.bot:
-                    continue
-
-                sql_check_user = "SELECT COUNT(*) FROM users WHERE discord_id = %s"
-                cursor.execute(sql_check_user, (member.id,))
-                result = cursor.fetchone()
-                user_exists = result[0] > 0
-
-                if not user_exists:
-                    sql_insert_user = "INSERT INTO users (discord_id, verify_status) VALUES (%s, %s)"
-                    cursor.execute(sql_insert_user, (member.id, 1))
-                    conn.commit()
-                else:
-                    sql_update_status = "UPDATE users SET verify_status = %s WHERE discord_id = %s"
-                    cursor.execute(sql_update_status, (1, member.id))
-                    conn.commit()
-
-                if global_verified_role not in member.roles:
-                    await member.add_roles(global_verified_role)
-            except Exception as e:
-                print(f"Error verifying member {member}: {e}")
-                continue
-
-        await interaction.followup.send("Verification process completed for all members.")
+        # One set-based upsert marks every human member verified
+        started = time.monotonic()
+        humans = [member for member in guild.members if not member.bot]
+        await upsert_verified_users(db_pool, humans)
+        for member in humans:
+            verify_cache.put(member.id, 1)
+        await event_bus.publish_many("verify", [(member.id, 1) for member in humans])
+
+        # Only members still missing the role need an API call, which the job queue makes
+        missing_role = [member for member in humans if global_verified_role not in member.roles]
+        job_id = await job_queue.enqueue(
+            "grant_verified", [(guild.id, member.id) for member in missing_role],
+            reason="verify_all", requested_by=interaction.user.id
+        )
+        elapsed = time.monotonic() - started
+        await interaction.followup.send(
+            f"Marked {len(humans)} members verified in the database in {elapsed:.1f}s. "
+            f"Granting '{GLOBAL_VERIFIED_ROLE_NAME}' to {len(missing_role)} members as job #{job_id}; "
+            f"use /job_status for its progress, throughput and ETA."
+        )
 
     except Exception as e:
         await interaction.followup.send("An error occurred during the verification process.")
         print(f"Error during verify_all: {e}")
         traceback.print_exc()
-    finally:
-        cursor.close()
-        conn.close()
 
 # ----------------------------------------------------------------------------------------
 # SYNCHRONIZE VERIFIED USERS TASK
 # ----------------------------------------------------------------------------------------
-@tasks.loop(hours=1)
+VERIFIED_SYNC_INTERVAL = float(os.getenv("verified_sync_interval_seconds", "30"))
+VERIFIED_SYNC_FULL_EVERY = int(os.getenv("verified_sync_full_every", "120"))
+# Newest users.updated_at the sync has processed
+verified_sync_watermark = None
+
+@tasks.loop(seconds=VERIFIED_SYNC_INTERVAL)
 async def synchronize_verified_users():
     """
-    Periodically ensure that all users in Zions Gate with verify_status=1
-    have the 'global verified' role assigned.
+    Ensures that users in Zions Gate with verify_status=1 have the 'global verified'
+    role. Most runs only read users rows changed since the watermark; the first run and
+    every VERIFIED_SYNC_FULL_EVERY runs read every verified user as a safety net.
     """
-    conn = db_connection()
-    cursor = conn.cursor()
+    global verified_sync_watermark
     try:
-        sql_fetch_verified = "SELECT discord_id FROM users WHERE verify_status = 1"
-        cursor.execute(sql_fetch_verified)
-        verified_users = cursor.fetchall()
+        loop_count = synchronize_verified_users.current_loop
+        full = verified_sync_watermark is None or (loop_count and loop_count % VERIFIED_SYNC_FULL_EVERY == 0)
+        if full:
+            rows = await db_pool.fetchall(
+                "SELECT discord_id, verify_status, updated_at FROM users WHERE verify_status = 1"
+            )
+            # Full runs start from the newest change overall, not just the newest verification
+            newest = await db_pool.fetchone("SELECT MAX(updated_at) FROM users")
+            watermark = newest[0] if newest else None
+        else:
+            # >= rather than > so rows sharing the watermark's second are never missed;
+            # processing a row twice is harmless.
+            rows = await db_pool.fetchall(
+                "SELECT discord_id, verify_status, updated_at FROM users WHERE updated_at >= %s",
+                (verified_sync_watermark,)
+            )
+            watermark = max((updated_at for _, _, updated_at in rows), default=verified_sync_watermark)
+        for user_id, status, _ in rows:
+            verify_cache.put(user_id, status)
+        verified_users = [user_id for user_id, status, _ in rows if status == 1]
 
         zions_gate_guild = bot.get_guild(ZIONS_GATE_GUILD_ID)
         if not zions_gate_guild:
@@ -737,20 +827,98 @@ async def synchronize_verified_users():
             print("Global verified role not found.")
             return
 
-        for (user_id,) in verified_users:
+        for user_id in verified_users:
             member = zions_gate_guild.get_member(user_id)
             if member and global_verified_role not in member.roles:
                 try:
                     await member.add_roles(global_verified_role)
                 except Exception as e:
                     print(f"Error adding 'global verified' role to {member}: {e}")
+        # Only advanced once the role pass is done, so a failed run is retried in full
+        verified_sync_watermark = watermark
 
     except Exception as e:
         print(f"Error during synchronization: {e}")
         traceback.print_exc()
-    finally:
-        cursor.close()
-        conn.close()
+
+# ----------------------------------------------------------------------------------------
+# BAN INDEX REFRESH TASK
+# ----------------------------------------------------------------------------------------
+BAN_INDEX_FULL_RELOAD_EVERY = 30
+
+@tasks.loop(minutes=1)
+async def refresh_ban_index():
+    """
+    Keeps the in-memory ban index in step with global_bans. Most runs only read bans
+    newer than the watermark; every BAN_INDEX_FULL_RELOAD_EVERY runs the index is
+    reloaded in full so unbans made by another bot process are picked up as well.
+    """
+    try:
+        loop_count = refresh_ban_index.current_loop
+        if loop_count and loop_count % BAN_INDEX_FULL_RELOAD_EVERY == 0:
+            await ban_index.load(db_pool)
+        else:
+            await ban_index.refresh(db_pool)
+    except Exception as e:
+        print(f"Error refreshing ban index: {e}")
+
+# ----------------------------------------------------------------------------------------
+# BAN RECONCILIATION TASK
+# ----------------------------------------------------------------------------------------
+@tasks.loop(minutes=BAN_RECONCILE_INTERVAL)
+async def reconcile_bans():
+    """
+    Brings every guild's ban list in line with global_bans: pre-bans globally banned
+    users who are missing and lifts global bans that no longer apply. Most runs diff
+    the cached ban lists; every BAN_RECONCILE_FULL_EVERY runs they are re-read in full.
+    """
+    try:
+        # A full reload also picks up unbans made by the other bot process
+        await ban_index.load(db_pool)
+        drifts, report = await ban_reconciler.run(bot.guilds, ban_index.ids())
+        drift_lines = format_drift(drifts)
+        if drift_lines:
+            await log_action(
+                bot.get_guild(ZIONS_GATE_GUILD_ID),
+                f"Ban reconciliation: {format_status_counts(report.counts())}.\n" + "\n".join(drift_lines)
+            )
+    except Exception as e:
+        print(f"Error during ban reconciliation: {e}")
+        traceback.print_exc()
+
+# ----------------------------------------------------------------------------------------
+# ROLE RECONCILIATION TASK
+# ----------------------------------------------------------------------------------------
+@tasks.loop(minutes=ROLE_RECONCILE_INTERVAL)
+async def reconcile_roles():
+    """
+    Brings the global verified role in every guild in line with the users table: gives
+    it to verified members who lack it and takes it from members who are no longer
+    verified or are globally banned.
+    """
+    try:
+        drifts, report = await role_reconciler.run(db_pool, bot.guilds, ban_index.ids())
+        drift_lines = format_role_drift(drifts)
+        if drift_lines:
+            await log_action(
+                bot.get_guild(ZIONS_GATE_GUILD_ID),
+                f"Role reconciliation: {format_status_counts(report.counts())}.\n" + "\n".join(drift_lines)
+            )
+    except Exception as e:
+        print(f"Error during role reconciliation: {e}")
+        traceback.print_exc()
+
+@bot.event
+async def on_member_ban(guild, user):
+    ban_reconciler.note_ban(guild.id, user.id, global_ban=user.id in ban_index)
+
+@bot.event
+async def on_member_unban(guild, user):
+    ban_reconciler.note_unban(guild.id, user.id)
+
+@bot.event
+async def on_guild_remove(guild):
+    ban_reconciler.forget(guild.id)
 
 # ----------------------------------------------------------------------------------------
 # COMMAND: ADD ALL MEMBERS TO DATABASE
@@ -765,35 +933,25 @@ async def add_all_to_database(ctx):
         await ctx.send("This command can only be used in a server.")
         return
 
-    conn = db_connection()
-    cursor = conn.cursor()
     try:
-        await ctx.send("Starting to add all members to the database. This may take a while...")
-        added_members = 0
-        skipped_members = 0
-
-        for member in guild.members:
-            if member.bot:
-                continue
-            sql_check_user = "SELECT COUNT(*) FROM users WHERE discord_id = %s"
-            cursor.execute(sql_check_user, (member.id,))
-            result = cursor.fetchone()
-            user_exists = result[0] > 0
-
-            if not user_exists:
-                sql_insert_user = """
-                INSERT INTO users (discord_id, time_created, verify_status, username)
-                VALUES (%s, %s, %s, %s)
-                """
-                cursor.execute(sql_insert_user, (member.id, datetime.now(timezone.utc), 0, member.name))
-                conn.commit()
-                added_members += 1
-                print(f"Added {member.name} (ID: {member.id}) to the database.")
-            else:
-                skipped_members += 1
+        status_message = await ctx.send("Starting to add all members to the database...")
+        started = time.monotonic()
+
+        # One query for the existing IDs, then a set difference in memory
+        existing_ids = await load_user_ids(db_pool)
+        humans = [member for member in guild.members if not member.bot]
+        new_members = [member for member in humans if member.id not in existing_ids]
+
+        async def report_progress(done, total):
+            await status_message.edit(content=f"Adding members to the database... {done}/{total}")
+
+        added_members = await insert_new_users(db_pool, new_members, progress=report_progress)
+        for member in new_members:
+            verify_cache.put(member.id, 0)
+        skipped_members = len(humans) - added_members
 
         await ctx.send(
-            f"Finished adding members to the database.\n"
+            f"Finished adding members to the database in {time.monotonic() - started:.1f}s.\n"
             f"Added: {added_members}\n"
             f"Skipped (already in database): {skipped_members}"
         )
@@ -801,51 +959,10 @@ async def add_all_to_database(ctx):
         await ctx.send("An error occurred while adding members to the database.")
         print(f"Error in add_all_to_database: {e}")
         traceback.print_exc()
-    finally:
-        cursor.close()
-        conn.close()
 
 # ----------------------------------------------------------------------------------------
 # HELPER FUNCTION FOR GLOBAL/LOCAL ACTIONS
 # ----------------------------------------------------------------------------------------
-async def perform_zions_gate_server_actions(user_id, remove_global_verified_role=False, ban_user=False, reason=None):
-    """
-    Perform actions in the Zions Gate server, such as removing the global verified role
-    or banning the user, if the bot has permissions to do so.
-    """
-    zions_gate_guild = bot.get_guild(ZIONS_GATE_GUILD_ID)
-    if not zions_gate_guild:
-        print(f"Bot is not in the Zions Gate server with ID {ZIONS_GATE_GUILD_ID}.")
-        return
-
-    member = zions_gate_guild.get_member(user_id)
-    if not member:
-        print(f"User with ID {user_id} not found in the Zions Gate server.")
-        return
-
-    try:
-        if remove_global_verified_role:
-            global_verified_role = discord.utils.find(
-                lambda r: r.name.lower().strip() == GLOBAL_VERIFIED_ROLE_NAME.lower(),
-                zions_gate_guild.roles
-            )
-            if global_verified_role and global_verified_role in member.roles:
-                if zions_gate_guild.me.top_role > global_verified_role:
-                    await member.remove_roles(global_verified_role)
-                    print(f"Removed '{GLOBAL_VERIFIED_ROLE_NAME}' role from {member} in the Zions Gate server.")
-                else:
-                    print(f"Bot's role is not higher than '{GLOBAL_VERIFIED_ROLE_NAME}' role.")
-
-        if ban_user:
-            if zions_gate_guild.me.guild_permissions.ban_members:
-                await zions_gate_guild.ban(member, reason=reason)
-                print(f"Banned {member} from the Zions Gate server. Reason: {reason}")
-            else:
-                print("Bot lacks 'Ban Members' permission in the Zions Gate server.")
-    except Exception as e:
-        print(f"Error performing actions in Zions Gate server for user {user_id}: {e}")
-        traceback.print_exc()
-
 def extract_id_from_input(input_str: str):
     """
     Tries to extract a numeric user ID from a mention string or plain ID.
@@ -858,12 +975,139 @@ def extract_id_from_input(input_str: str):
             return int(extracted)
     return None
 
+# ----------------------------------------------------------------------------------------
+# MODERATION JOB HANDLERS
+# ----------------------------------------------------------------------------------------
+# Each handler runs one guild's share of a global action. Handlers may run again after a
+# restart, so they check the current state first and report it instead of failing.
+async def strip_global_verified_role(g, member_in_guild):
+    global_verified_role = discord.utils.find(
+        lambda r: r.name.lower().strip() == GLOBAL_VERIFIED_ROLE_NAME.lower(), g.roles
+    )
+    if global_verified_role and global_verified_role in member_in_guild.roles:
+        if g.me.top_role > global_verified_role:
+            await member_in_guild.remove_roles(global_verified_role)
+
+async def global_ban_task(task):
+    g = bot.get_guild(task.guild_id)
+    if not g:
+        return "guild_gone"
+    member_in_guild = g.get_member(task.target_id)
+    if not member_in_guild:
+        return "not_present"
+    if not g.me.guild_permissions.ban_members:
+        # Can't ban here, so at least take the verified role away
+        await strip_global_verified_role(g, member_in_guild)
+        return "forbidden"
+    try:
+        await g.ban(member_in_guild, reason=f"Global ban: {task.reason}")
+    except discord.Forbidden:
+        await strip_global_verified_role(g, member_in_guild)
+        raise
+    return "banned"
+
+async def global_unban_task(task):
+    g = bot.get_guild(task.guild_id)
+    if not g:
+        return "guild_gone"
+    if not g.me.guild_permissions.ban_members:
+        return "forbidden"
+    try:
+        await g.unban(discord.Object(id=task.target_id), reason=f"Global unban: {task.reason}")
+    except discord.NotFound:
+        return "not_banned"
+    return "unbanned"
+
+async def global_kick_task(task):
+    g = bot.get_guild(task.guild_id)
+    if not g:
+        return "guild_gone"
+    member_in_guild = g.get_member(task.target_id)
+    if not member_in_guild:
+        return "not_present"
+    if not g.me.guild_permissions.kick_members:
+        await strip_global_verified_role(g, member_in_guild)
+        return "forbidden"
+    await member_in_guild.kick(reason=f"Global kick: {task.reason}")
+    return "kicked"
+
+async def grant_verified_task(task):
+    g = bot.get_guild(task.guild_id)
+    if not g:
+        return "guild_gone"
+    member_in_guild = g.get_member(task.target_id)
+    if not member_in_guild:
+        return "not_present"
+    global_verified_role = discord.utils.find(
+        lambda r: r.name.lower().strip() == GLOBAL_VERIFIED_ROLE_NAME.lower(), g.roles
+    )
+    if not global_verified_role:
+        return "role_missing"
+    if global_verified_role in member_in_guild.roles:
+        return "already_verified"
+    await member_in_guild.add_roles(global_verified_role, reason=task.reason)
+    return "granted"
+
+async def report_finished_job(job_id, job, counts):
+    await log_action(bot.get_guild(ZIONS_GATE_GUILD_ID), format_job_summary(job_id, job, counts))
+
+job_queue.register("global_ban", global_ban_task)
+job_queue.register("global_unban", global_unban_task)
+job_queue.register("global_kick", global_kick_task)
+job_queue.register("grant_verified", grant_verified_task)
+job_queue.on_job_done = report_finished_job
+
+# ----------------------------------------------------------------------------------------
+# STATUS EVENTS FROM ZIONS KEY
+# ----------------------------------------------------------------------------------------
+# Bans, unbans, kicks and verifications made by the other bot process arrive here within
+# a poll interval; caches are updated and the action is repeated in this bot's guilds.
+async def on_remote_ban(event):
+    ban_index.add(event.discord_id, event.value)
+    verify_cache.put(event.discord_id, 0)
+    pending = [(g.id, event.discord_id) for g in bot.guilds if g.get_member(event.discord_id)]
+    if pending:
+        await job_queue.enqueue("global_ban", pending, target_id=event.discord_id, reason=event.value)
+
+async def on_remote_unban(event):
+    ban_index.remove(event.discord_id)
+    await job_queue.enqueue(
+        "global_unban", [(g.id, event.discord_id) for g in bot.guilds],
+        target_id=event.discord_id, reason=event.value
+    )
+
+async def on_remote_kick(event):
+    verify_cache.put(event.discord_id, 0)
+    pending = [(g.id, event.discord_id) for g in bot.guilds if g.get_member(event.discord_id)]
+    if pending:
+        await job_queue.enqueue("global_kick", pending, target_id=event.discord_id, reason=event.value)
+
+async def on_remote_verify(event):
+    verify_cache.put(event.discord_id, int(event.value))
+
+event_bus.subscribe("ban", on_remote_ban)
+event_bus.subscribe("unban", on_remote_unban)
+event_bus.subscribe("kick", on_remote_kick)
+event_bus.subscribe("verify", on_remote_verify)
+
 # ----------------------------------------------------------------------------------------
 # GLOBAL BAN COMMAND
 # ----------------------------------------------------------------------------------------
+def record_global_ban(cursor, user_id, banned_at, reason, guild_ids, requested_by):
+    """
+    Writes the global ban, its status event and the job that enforces it through one
+    transaction's cursor, so a ban is never recorded without its job. Returns the job ID.
+    """
+    write_global_bans(cursor, [(user_id, banned_at, reason)])
+    event_bus.write_events(cursor, "ban", [(user_id, reason)])
+    return job_queue.write_job(
+        cursor, "global_ban", [(guild_id, user_id) for guild_id in guild_ids],
+        target_id=user_id, reason=reason, requested_by=requested_by
+    )
+
 @bot.tree.command(name="global_ban", description="Globally ban a user from all servers.")
 @discord.app_commands.checks.has_permissions(ban_members=True)
-async def global_ban(interaction: discord.Interaction, member: str, reason: str = "No reason provided"):
+async def global_ban(interaction: discord.Interaction, member: str, reason: discord.app_commands.Range[str, 1, MAX_REASON_LENGTH] = "No reason provided"):
     """
     Bans the user from all servers where the bot can ban, and records the ban in the database.
     """
@@ -873,8 +1117,6 @@ async def global_ban(interaction: discord.Interaction, member: str, reason: str
         await interaction.followup.send("Please provide a valid user mention or ID.", ephemeral=True)
         return
 
-    conn = db_connection()
-    cursor = conn.cursor()
     try:
         try:
             user = await bot.fetch_user(user_id)
@@ -882,72 +1124,96 @@ async def global_ban(interaction: discord.Interaction, member: str, reason: str
             await interaction.followup.send("Could not find a user with that ID.", ephemeral=True)
             return
 
-        sql_insert_ban = """
-        INSERT INTO global_bans (discord_id, banned_at, reason)
-        VALUES (%s, %s, %s)
-        ON DUPLICATE KEY UPDATE banned_at = VALUES(banned_at), reason = VALUES(reason)
-        """
-        cursor.execute(sql_insert_ban, (user_id, mountain_time, reason))
-        conn.commit()
-
-        # Also reset verify_status to 0 for that user
-        sql_update_status = "UPDATE users SET verify_status = %s WHERE discord_id = %s"
-        cursor.execute(sql_update_status, (0, user_id))
-        conn.commit()
-
-        # Ban from all guilds
-        for g in bot.guilds:
-            member_in_guild = g.get_member(user_id)
-            if member_in_guild:
-                # remove verified role if present
-                global_verified_role = discord.utils.find(
-                    lambda r: r.name.lower().strip() == GLOBAL_VERIFIED_ROLE_NAME.lower(), g.roles
-                )
-                if global_verified_role and global_verified_role in member_in_guild.roles:
-                    if g.me.top_role > global_verified_role:
-                        await member_in_guild.remove_roles(global_verified_role)
-
-                if g.me.guild_permissions.ban_members:
-                    try:
-                        await g.ban(member_in_guild, reason=f"Global ban: {reason}")
-                    except Exception as e:
-                        print(f"Error banning {member_in_guild} from {g.name}: {e}")
-                else:
-                    print(f"Bot lacks 'Ban Members' permission in {g.name}.")
-
-        # Also ban in Zions Gate if present
-        await perform_zions_gate_server_actions(
-            user_id,
-            remove_global_verified_role=False,
-            ban_user=True,
-            reason=f"Global ban: {reason}"
+        # Records the ban (resetting verify_status), its status event and the job that
+        # bans them in every guild, Zions Gate included, in one transaction
+        banned_at = datetime.now(ZoneInfo("America/Denver")).replace(tzinfo=None)
+        job_id = await db_pool.transaction(
+            record_global_ban, user_id, banned_at, reason, [g.id for g in bot.guilds], interaction.user.id
         )
+        job_queue.notify()
+        ban_index.add(user_id, reason, banned_at)
+        verify_cache.invalidate(user_id)
 
         await log_action(
             interaction.guild,
-            f"{user.mention} ({user.id}) globally banned by {interaction.user}. Reason: {reason}"
+            f"{user.mention} ({user.id}) globally banned by {interaction.user}. Reason: {reason} (job #{job_id})"
+        )
+        await interaction.followup.send(
+            f"{user} globally banned. Banning them in {len(bot.guilds)} servers as job #{job_id}; "
+            f"use /job_status to follow it.",
+            ephemeral=True
         )
-        await interaction.followup.send(f"{user} globally banned from all servers.", ephemeral=True)
     except Exception as e:
         await interaction.followup.send("An error occurred while trying to globally ban the user.", ephemeral=True)
         print(f"Error during global ban: {e}")
         traceback.print_exc()
-    finally:
-        cursor.close()
-        conn.close()
+
+# ----------------------------------------------------------------------------------------
+# BULK GLOBAL BAN COMMAND
+# ----------------------------------------------------------------------------------------
+@bot.tree.command(name="bulk_global_ban", description="Globally ban every user ID listed in a CSV or text file.")
+@discord.app_commands.checks.has_permissions(ban_members=True)
+async def bulk_global_ban(interaction: discord.Interaction, file: discord.Attachment, reason: str = "Bulk global ban import"):
+    """
+    Globally bans the IDs in an uploaded 'id[,reason]' list. IDs already globally banned
+    are skipped; the rest are recorded in one transaction and banned in every guild with
+    bulk ban requests. Replies with a per-ID CSV report.
+    """
+    await interaction.response.defer(ephemeral=True)
+    try:
+        text = (await file.read()).decode("utf-8-sig", errors="replace")
+        entries, rejected = parse_ban_list(text, reason)
+        new_entries = []
+        for entry in entries:
+            if entry.discord_id in ban_index:
+                entry.status = "already_banned"
+            else:
+                new_entries.append(entry)
+
+        if new_entries:
+            banned_at = datetime.now(ZoneInfo("America/Denver")).replace(tzinfo=None)
+            await upsert_global_bans(db_pool, [(entry.discord_id, entry.reason) for entry in new_entries], banned_at)
+            for entry in new_entries:
+                ban_index.add(entry.discord_id, entry.reason, banned_at)
+                verify_cache.invalidate(entry.discord_id)
+            await event_bus.publish_many("ban", [(entry.discord_id, entry.reason) for entry in new_entries])
+
+            progress_message = await interaction.followup.send(
+                f"Recorded {len(new_entries)} new global bans. Banning them in {len(bot.guilds)} servers...",
+                ephemeral=True, wait=True
+            )
+            report = await bulk_ban_guilds(
+                bot.guilds, new_entries, f"Global ban: {reason}",
+                progress=progress_editor(progress_message, "Bulk banning")
+            )
+            for result in report.results:
+                if result.error:
+                    print(f"Error bulk banning in {result.item[0].name}: {result.error}")
+
+        await log_action(
+            interaction.guild,
+            f"{len(new_entries)} users globally banned by {interaction.user} from a bulk import ({file.filename}). Reason: {reason}"
+        )
+        await interaction.followup.send(
+            f"Bulk global ban finished: {summarize(entries + rejected) or 'no IDs found'}.",
+            file=build_report(entries + rejected),
+            ephemeral=True
+        )
+    except Exception as e:
+        await interaction.followup.send("An error occurred during the bulk global ban.", ephemeral=True)
+        print(f"Error during bulk global ban: {e}")
+        traceback.print_exc()
 
 # ----------------------------------------------------------------------------------------
 # GLOBAL UNBAN COMMAND
 # ----------------------------------------------------------------------------------------
 @bot.tree.command(name="global_unban", description="Globally unban a user from all servers.")
 @discord.app_commands.checks.has_permissions(ban_members=True)
-async def global_unban(interaction: discord.Interaction, user_id: str, reason: str = "No reason provided"):
+async def global_unban(interaction: discord.Interaction, user_id: str, reason: discord.app_commands.Range[str, 1, MAX_REASON_LENGTH] = "No reason provided"):
     """
     Unbans the user from all servers (where the bot can unban) and removes them from the global ban list.
     """
     await interaction.response.defer(ephemeral=True)
-    conn = db_connection()
-    cursor = conn.cursor()
     try:
         try:
             user_id_int = int(user_id)
@@ -961,45 +1227,36 @@ async def global_unban(interaction: discord.Interaction, user_id: str, reason: s
             return
 
         sql_delete_ban = "DELETE FROM global_bans WHERE discord_id = %s"
-        cursor.execute(sql_delete_ban, (user_id_int,))
-        conn.commit()
-
-        # Unban from all guilds
-        for g in bot.guilds:
-            if g.me.guild_permissions.ban_members:
-                try:
-                    await g.unban(user, reason=f"Global unban: {reason}")
-                except discord.NotFound:
-                    pass
-                except discord.Forbidden:
-                    print(f"Bot lacks permission to unban in {g.name}.")
-                except Exception as e:
-                    print(f"Error unbanning user {user_id_int} from {g.name}: {e}")
-                finally:
-                    await asyncio.sleep(1)
-            else:
-                print(f"Bot lacks 'Ban Members' permission in {g.name}.")
+        await db_pool.execute(sql_delete_ban, (user_id_int,))
+        ban_index.remove(user_id_int)
+        await event_bus.publish("unban", user_id_int, reason)
+
+        # The job queue unbans them in every guild
+        job_id = await job_queue.enqueue(
+            "global_unban", [(g.id, user_id_int) for g in bot.guilds],
+            target_id=user_id_int, reason=reason, requested_by=interaction.user.id
+        )
 
         await log_action(
             interaction.guild,
-            f"{user.mention} ({user.id}) globally unbanned by {interaction.user}. Reason: {reason}"
+            f"{user.mention} ({user.id}) globally unbanned by {interaction.user}. Reason: {reason} (job #{job_id})"
+        )
+        await interaction.followup.send(
+            f"User {user} globally unbanned. Unbanning them in {len(bot.guilds)} servers as job #{job_id}.",
+            ephemeral=True
         )
-        await interaction.followup.send(f"User {user} globally unbanned.", ephemeral=True)
 
     except Exception as e:
         await interaction.followup.send("An error occurred while trying to globally unban the user.", ephemeral=True)
         print(f"Error during global unban: {e}")
         traceback.print_exc()
-    finally:
-        cursor.close()
-        conn.close()
 
 # ----------------------------------------------------------------------------------------
 # GLOBAL KICK COMMAND
 # ----------------------------------------------------------------------------------------
 @bot.tree.command(name="global_kick", description="Globally kick a user from all servers.")
 @discord.app_commands.checks.has_permissions(ban_members=True)
-async def global_kick(interaction: discord.Interaction, member: str, reason: str = "No reason provided"):
+async def global_kick(interaction: discord.Interaction, member: str, reason: discord.app_commands.Range[str, 1, MAX_REASON_LENGTH] = "No reason provided"):
     """
     Kicks the user from all servers (except Zions Gate is simply unaffected or optional) 
     and sets verify_status=0 in the database.
@@ -1010,39 +1267,15 @@ async def global_kick(interaction: discord.Interaction, member: str, reason: str
         await interaction.followup.send("Please provide a valid user mention or ID.", ephemeral=True)
         return
 
-    conn = db_connection()
-    cursor = conn.cursor()
     try:
         # Set verify_status=0
-        sql_update_status = "UPDATE users SET verify_status = %s WHERE discord_id = %s"
-        cursor.execute(sql_update_status, (0, user_id))
-        conn.commit()
-
-        # Kick from all guilds (except we do not necessarily ban them from Zions Gate)
-        for g in bot.guilds:
-            member_in_guild = g.get_member(user_id)
-            if member_in_guild:
-                global_verified_role = discord.utils.find(
-                    lambda r: r.name.lower().strip() == GLOBAL_VERIFIED_ROLE_NAME.lower(), g.roles
-                )
-                if global_verified_role and global_verified_role in member_in_guild.roles:
-                    if g.me.top_role > global_verified_role:
-                        await member_in_guild.remove_roles(global_verified_role)
-
-                if g.me.guild_permissions.kick_members:
-                    try:
-                        await member_in_guild.kick(reason=f"Global kick: {reason}")
-                    except Exception as e:
-                        print(f"Error kicking {member_in_guild} from {g.name}: {e}")
-                else:
-                    print(f"Bot lacks 'Kick Members' permission in {g.name}.")
-
-        # Perform optional actions in Zions Gate if needed
-        await perform_zions_gate_server_actions(
-            user_id,
-            remove_global_verified_role=False,
-            ban_user=False,
-            reason=f"Global kick: {reason}"
+        await verify_cache.set_status(db_pool, user_id, 0)
+        await event_bus.publish("kick", user_id, reason)
+
+        # The job queue kicks them from every guild they are in
+        job_id = await job_queue.enqueue(
+            "global_kick", [(g.id, user_id) for g in bot.guilds if g.get_member(user_id)],
+            target_id=user_id, reason=reason, requested_by=interaction.user.id
         )
 
         try:
@@ -1053,28 +1286,25 @@ async def global_kick(interaction: discord.Interaction, member: str, reason: str
         if isinstance(user, discord.User):
             await log_action(
                 interaction.guild,
-                f"{user.mention} ({user.id}) globally kicked by {interaction.user}. Reason: {reason}"
+                f"{user.mention} ({user.id}) globally kicked by {interaction.user}. Reason: {reason} (job #{job_id})"
             )
             await interaction.followup.send(
-                f"{user} globally kicked from all servers (except the Zions Gate server).",
+                f"{user} globally kicked. Kicking them from all servers as job #{job_id}.",
                 ephemeral=True
             )
         else:
             await log_action(
                 interaction.guild,
-                f"{user} globally kicked by {interaction.user}. Reason: {reason}"
+                f"{user} globally kicked by {interaction.user}. Reason: {reason} (job #{job_id})"
             )
             await interaction.followup.send(
-                f"{user} globally kicked from all servers (except the Zions Gate server).",
+                f"{user} globally kicked. Kicking them from all servers as job #{job_id}.",
                 ephemeral=True
             )
     except Exception as e:
         await interaction.followup.send("An error occurred while trying to globally kick the user.", ephemeral=True)
         print(f"Error during global kick: {e}")
         traceback.print_exc()
-    finally:
-        cursor.close()
-        conn.close()
 
 # ----------------------------------------------------------------------------------------
 # LOCAL KICK COMMAND
@@ -1211,23 +1441,22 @@ async def purge(interaction: discord.Interaction, channel: discord.TextChannel,
 
     if WEBHOOK_URL:
         try:
-            async with aiohttp.ClientSession() as session:
-                with open(log_filename, "rb") as log_file:
-                    data = aiohttp.FormData()
-                    data.add_field(
-                        "content",
-                        f"Purged {len(deleted_messages)} messages from {channel.mention}. Log file attached:",
-                    )
-                    data.add_field(
-                        "file",
-                        log_file,
-                        filename=log_filename,
-                        content_type="text/csv"
-                    )
-                    async with session.post(WEBHOOK_URL, data=data) as response:
-                        if response.status not in [200, 204]:
-                            response_text = await response.text()
-                            print(f"Failed to send log file to the webhook: {response.status} {response_text}")
+            with open(log_filename, "rb") as log_file:
+                data = aiohttp.FormData()
+                data.add_field(
+                    "content",
+                    f"Purged {len(deleted_messages)} messages from {channel.mention}. Log file attached:",
+                )
+                data.add_field(
+                    "file",
+                    log_file,
+                    filename=log_filename,
+                    content_type="text/csv"
+                )
+                async with bot.http_session.post(WEBHOOK_URL, data=data) as response:
+                    if response.status not in [200, 204]:
+                        response_text = await response.text()
+                        print(f"Failed to send log file to the webhook: {response.status} {response_text}")
         except Exception as e:
             print(f"Error sending log file to the webhook: {e}")
     else:
@@ -1261,6 +1490,149 @@ async def wipe_commands(interaction: discord.Interaction, guild_id: str):
         print(f"Error wiping commands: {e}")
         traceback.print_exc()
 
+# ----------------------------------------------------------------------------------------
+# RECONCILE_BANS COMMAND
+# ----------------------------------------------------------------------------------------
+@bot.tree.command(name="reconcile_bans", description="Compare every server's ban list with the global ban list.")
+@discord.app_commands.checks.has_permissions(administrator=True)
+async def reconcile_bans_command(interaction: discord.Interaction, dry_run: bool = True, full: bool = False):
+    """
+    Reports ban drift per guild and, unless dry_run is set, fixes it.
+    """
+    await interaction.response.defer(ephemeral=True)
+    try:
+        await ban_index.load(db_pool)
+        drifts, report = await ban_reconciler.run(bot.guilds, ban_index.ids(), full=full, dry_run=dry_run)
+        drift_lines = format_drift(drifts)
+        lines = [f"Checked {len(drifts)} servers; {len(drift_lines)} drifted."] + drift_lines
+        if report is not None:
+            lines.append(f"Applied: {format_status_counts(report.counts()) or 'nothing to do'}.")
+            await log_action(
+                interaction.guild,
+                f"Ban reconciliation run by {interaction.user}: {format_status_counts(report.counts()) or 'no drift'}."
+            )
+        await interaction.followup.send("\n".join(lines)[:2000], ephemeral=True)
+    except Exception as e:
+        await interaction.followup.send("An error occurred during ban reconciliation.", ephemeral=True)
+        print(f"Error during reconcile_bans: {e}")
+        traceback.print_exc()
+
+# ----------------------------------------------------------------------------------------
+# RECONCILE_ROLES COMMAND
+# ----------------------------------------------------------------------------------------
+@bot.tree.command(name="reconcile_roles", description="Compare every server's global verified role with the database.")
+@discord.app_commands.checks.has_permissions(administrator=True)
+async def reconcile_roles_command(interaction: discord.Interaction, dry_run: bool = True, full: bool = False):
+    """
+    Reports role drift per guild and, unless dry_run is set, fixes it.
+    """
+    await interaction.response.defer(ephemeral=True)
+    try:
+        drifts, report = await role_reconciler.run(db_pool, bot.guilds, ban_index.ids(), full=full, dry_run=dry_run)
+        drift_lines = format_role_drift(drifts)
+        lines = [f"Checked {len(drifts)} servers; {len(drift_lines)} drifted."] + drift_lines
+        if report is not None:
+            lines.append(f"Applied: {format_status_counts(report.counts()) or 'nothing to do'}.")
+            await log_action(
+                interaction.guild,
+                f"Role reconciliation run by {interaction.user}: {format_status_counts(report.counts()) or 'no drift'}."
+            )
+        await interaction.followup.send("\n".join(lines)[:2000], ephemeral=True)
+    except Exception as e:
+        await interaction.followup.send("An error occurred during role reconciliation.", ephemeral=True)
+        print(f"Error during reconcile_roles: {e}")
+        traceback.print_exc()
+
+# ----------------------------------------------------------------------------------------
+# JOB_STATUS COMMAND
+# ----------------------------------------------------------------------------------------
+@bot.tree.command(name="job_status", description="Show the progress of a moderation job.")
+@discord.app_commands.checks.has_permissions(ban_members=True)
+async def job_status(interaction: discord.Interaction, job_id: int):
+    """
+    Reports how many of a job's per-guild tasks have finished and how they ended.
+    """
+    await interaction.response.defer(ephemeral=True)
+    try:
+        status = await job_queue.job_status(job_id)
+        if status is None:
+            await interaction.followup.send(f"No moderation job #{job_id}.", ephemeral=True)
+            return
+        await interaction.followup.send(format_job_status(job_id, *status), ephemeral=True)
+    except Exception as e:
+        await interaction.followup.send("An error occurred while looking up the job.", ephemeral=True)
+        print(f"Error during job_status: {e}")
+        traceback.print_exc()
+
+# ----------------------------------------------------------------------------------------
+# CACHE_STATS COMMAND
+# ----------------------------------------------------------------------------------------
+@bot.tree.command(name="cache_stats", description="Show in-memory cache statistics.")
+@discord.app_commands.checks.has_permissions(administrator=True)
+async def cache_stats(interaction: discord.Interaction):
+    """
+    Reports the size and hit/miss counters of the in-memory ban index and verification cache.
+    """
+    stats = verify_cache.stats()
+    await interaction.response.send_message(
+        f"Ban index: {len(ban_index)} bans\n"
+        f"Verification cache: {stats['size']} users, {stats['hits']} hits, "
+        f"{stats['misses']} misses ({stats['hit_rate']:.1%} hit rate)",
+        ephemeral=True
+    )
+
+# ----------------------------------------------------------------------------------------
+# JOIN QUEUE STATS COMMAND (Administrator only)
+# ----------------------------------------------------------------------------------------
+@bot.tree.command(name="join_queue_stats", description="Show onboarding join queue depth and wait times.")
+@discord.app_commands.checks.has_permissions(administrator=True)
+async def join_queue_stats(interaction: discord.Interaction):
+    """
+    Reports the join queue's depth, throughput counters and recent wait times.
+    """
+    stats = join_queue.stats()
+    await interaction.response.send_message(
+        f"Join queue: {stats['depth']} waiting (max {stats['max_depth']}), {stats['active']} being onboarded\n"
+        f"Admitted {stats['admitted']}, onboarded {stats['processed']}, coalesced {stats['coalesced']}, "
+        f"dropped {stats['dropped']} (left while queued), rejected {stats['rejected']} (queue full), {stats['errors']} errors\n"
+        f"Wait: p50 {stats['wait_p50']:.1f}s, p95 {stats['wait_p95']:.1f}s, max {stats['wait_max']:.1f}s",
+        ephemeral=True
+    )
+
+# ----------------------------------------------------------------------------------------
+# ONBOARDING_GC COMMAND (Administrator only)
+# ----------------------------------------------------------------------------------------
+@bot.tree.command(name="onboarding_gc", description="Clean up onboarding channels of members who left or gave up.")
+@discord.app_commands.checks.has_permissions(administrator=True)
+async def onboarding_gc(interaction: discord.Interaction, dry_run: bool = True):
+    """
+    Reports stale onboarding sessions and orphaned channels and, unless dry_run is set,
+    deletes them. Also shows the collector's totals since startup.
+    """
+    await interaction.response.defer(ephemeral=True)
+    try:
+        result = await run_onboarding_gc(dry_run=dry_run)
+        if result is None:
+            await interaction.followup.send("Zions Gate server not found.", ephemeral=True)
+            return
+        stale, report = result
+        stats = onboarding_collector.stats()
+        lines = format_gc_report(stale, report)
+        lines.append(
+            f"Totals: {stats['runs']} runs, {stats['channels_reclaimed']} channels reclaimed, "
+            f"{stats['sessions_purged']} sessions purged, {stats['failures']} failed."
+        )
+        if report is not None:
+            await log_action(
+                interaction.guild,
+                f"Onboarding cleanup run by {interaction.user}: {format_status_counts(report.counts()) or 'nothing to do'}."
+            )
+        await interaction.followup.send("\n".join(lines)[:2000], ephemeral=True)
+    except Exception as e:
+        await interaction.followup.send("An error occurred during onboarding cleanup.", ephemeral=True)
+        print(f"Error during onboarding_gc: {e}")
+        traceback.print_exc()
+
 # ----------------------------------------------------------------------------------------
 # RUN THE BOT
 # ----------------------------------------------------------------------------------------
@@ -1,24 +1,47 @@
 import discord
-import asyncio
 import os
+import time
 import aiohttp
-from discord.ext import commands
+from discord.ext import commands, tasks
 from dotenv import load_dotenv
-from datetime import datetime, timezone
+from datetime import datetime
 from zoneinfo import ZoneInfo
 import traceback
 import csv
 
 load_dotenv()
-from db_connection import db_connection
+from db_connection import db_pool
+from schema import ensure_schema
+from ban_index import ban_index
+from verify_cache import verify_cache
+from join_check import join_decision
+from bulk_users import load_user_ids, insert_new_users, upsert_verified_users, upsert_global_bans, write_global_bans
+from bulk_ban import MAX_REASON_LENGTH, parse_ban_list, bulk_ban_guilds, summarize, build_report
+from ban_reconcile import BAN_RECONCILE_INTERVAL, BanReconciler, format_drift
+from moderation import MAX_RATELIMIT_TIMEOUT, format_status_counts, progress_editor
+from webhook_logger import WEBHOOK_SPOOL_DIR, WebhookDispatcher
+from job_queue import JobQueue, format_job_status, format_job_summary
+from event_bus import EventBus
+import shard_metrics
+from member_snapshot import MEMBER_SNAPSHOT_INTERVAL, save_snapshots, sweep_candidates
 
-mountain_time = datetime.now(ZoneInfo("America/Denver"))
 intents = discord.Intents.default()
 intents.members = True
 intents.guilds = True
 intents.messages = True
 intents.message_content = True
-bot = commands.Bot(command_prefix="!", intents=intents)
+
+# Sharding: launcher.py sets these per cluster process; unset, a single process runs
+# every shard Discord recommends
+SHARD_COUNT = int(os.getenv("shard_count", "0")) or None
+SHARD_IDS = [int(shard_id) for shard_id in os.getenv("shard_ids", "").split(",") if shard_id.strip()] or None
+CLUSTER_ID = os.getenv("cluster_id")
+# Names this process in the job queue, event bus and webhook spool, which are per cluster
+INSTANCE_ID = "zions_key" if CLUSTER_ID is None else f"zions_key_{CLUSTER_ID}"
+bot = commands.AutoShardedBot(
+    command_prefix="!", intents=intents, max_ratelimit_timeout=MAX_RATELIMIT_TIMEOUT,
+    shard_count=SHARD_COUNT, shard_ids=SHARD_IDS
+)
 
 WEBHOOK_URL = os.getenv("webhook_url")
 ZIONS_KEY_BOT_TOKEN = os.getenv("zions_key_bot_token")
@@ -26,116 +49,214 @@ ZIONS_GATE_GUILD_ID = int(os.getenv("zions_gate_guild_id", "0"))
 GLOBAL_VERIFIED_ROLE_NAME = os.getenv("global_verified_role_name", "global verified")
 CHECK_VERIFICATION_ON_STARTUP = os.getenv("check_verification_on_startup", "true").lower() == "true"
 
+# Log lines are queued and packed into as few webhook messages as possible by a background sender
+log_dispatcher = WebhookDispatcher(default_username="Zions Key Bot", spool_dir=os.path.join(WEBHOOK_SPOOL_DIR, INSTANCE_ID))
+# Global moderation runs as persistent per-guild tasks (see Moderation Job Handlers).
+# Each cluster only queues tasks for the guilds on its own shards.
+job_queue = JobQueue(db_pool, INSTANCE_ID)
+ban_reconciler = BanReconciler()
+# Tells the Zions Gate process and the other clusters about status changes made here
+event_bus = EventBus(db_pool, INSTANCE_ID)
+
 async def log_action(guild, message):
     if not WEBHOOK_URL:
         print("Error: 'webhook_url' is not set.")
         return
-    data = {
-        "username": f"{guild.name} Bot",
-        "content": f"**[{guild.name}]** {message}"
-    }
-    async with aiohttp.ClientSession() as session:
-        async with session.post(WEBHOOK_URL, json=data) as response:
-            if response.status != 204:
-                response_text = await response.text()
-                print(f"Failed to send log message: {response.status} {response_text}")
+    guild_name = guild.name if guild else "Unknown Guild"
+    log_dispatcher.enqueue(WEBHOOK_URL, content=f"**[{guild_name}]** {message}", username=f"{guild_name} Bot")
+
+async def setup_hook():
+    # Opens the shared database pool and HTTP session once, before the gateway connects,
+    # adds any columns an existing database is missing, starts the webhook log sender
+    # and loads the ban index
+    await db_pool.start()
+    try:
+        await ensure_schema(db_pool)
+    except Exception as e:
+        print(f"Error updating the database schema: {e}")
+    bot.http_session = aiohttp.ClientSession()
+    log_dispatcher.start(bot.http_session, urls=[WEBHOOK_URL])
+    try:
+        await ban_index.load(db_pool)
+    except Exception as e:
+        print(f"Error loading ban index: {e}")
+    try:
+        await verify_cache.load(db_pool)
+    except Exception as e:
+        print(f"Error loading verification cache: {e}")
+
+bot.setup_hook = setup_hook
+
+async def close_bot():
+    # Flushes queued log messages and closes shared resources before disconnecting
+    await event_bus.close()
+    await job_queue.close()
+    await log_dispatcher.close()
+    if getattr(bot, "http_session", None):
+        await bot.http_session.close()
+    await db_pool.close()
+    await commands.AutoShardedBot.close(bot)
+
+bot.close = close_bot
 
 @bot.event
 async def on_ready():
     # On Ready Event
     print(f'Logged in as {bot.user} (ID: {bot.user.id})')
+    print(f'Shards {sorted(bot.shards)} of {bot.shard_count} (cluster {CLUSTER_ID or 0})')
     print('------')
+    # Commands are global, so only the first cluster needs to sync them
+    if CLUSTER_ID in (None, "0"):
+        try:
+            synced = await bot.tree.sync()
+            print(f'Synced {len(synced)} commands globally.')
+        except Exception as e:
+            print(f'Error syncing commands: {e}')
+
+    if not refresh_ban_index.is_running():
+        refresh_ban_index.start()
+    if not reconcile_bans.is_running():
+        reconcile_bans.start()
+    if not report_shard_metrics.is_running():
+        report_shard_metrics.start()
+
+    # Work through moderation jobs, including any left over from the last run
+    try:
+        await job_queue.start()
+    except Exception as e:
+        print(f"Error starting moderation job queue: {e}")
+    try:
+        await event_bus.start()
+    except Exception as e:
+        print(f"Error starting status event bus: {e}")
+
+    # Startup checks only cover members who joined since the last member snapshot and
+    # users whose status changed since it; guilds without a recent snapshot are checked in full
     try:
-        synced = await bot.tree.sync()
-        print(f'Synced {len(synced)} commands globally.')
+        candidates, full = await sweep_candidates(db_pool, "zions_key", bot.guilds)
+        print(f"Startup checks cover {sum(map(len, candidates.values()))} members ({full} of {len(bot.guilds)} guilds in full).")
     except Exception as e:
-        print(f'Error syncing commands: {e}')
+        print(f"Error loading member snapshots, checking every member: {e}")
+        candidates = {guild.id: guild.members for guild in bot.guilds}
 
     # Always perform global ban check on startup
-    total_banned = 0
     try:
         print("Performing global ban check on startup...")
-        conn = db_connection()
-        cursor = conn.cursor()
-        try:
-            sql_get_bans = "SELECT discord_id FROM global_bans"
-            cursor.execute(sql_get_bans)
-            banned_ids = [row[0] for row in cursor.fetchall()]
-            for guild in bot.guilds:
-                for member in guild.members:
-                    if member.id in banned_ids:
-                        if guild.me.guild_permissions.ban_members:
-                            try:
-                                await guild.ban(member, reason="Globally banned.")
-                                print(f"Banned globally banned user {member} in {guild.name}.")
-                                await log_action(guild, f"Banned globally banned user {member}.")
-                                total_banned += 1
-                            except Exception as e:
-                                print(f"Error banning {member} in {guild.name}: {e}")
-                        else:
-                            print(f"Bot lacks 'Ban Members' permission in {guild.name}.")
-        finally:
-            cursor.close()
-            conn.close()
+        if not ban_index.loaded:
+            await ban_index.load(db_pool)
+        pending = [(guild_id, member.id) for guild_id, members in candidates.items() for member in members if member.id in ban_index]
+        if pending:
+            job_id = await job_queue.enqueue("global_ban", pending, reason="Startup global ban check")
+            print(f"Queued {len(pending)} startup bans as moderation job #{job_id}.")
+        else:
+            print("Global ban check complete. No globally banned members found.")
     except Exception as e:
         print(f"Error during global ban check on startup: {e}")
         traceback.print_exc()
-    print(f"Global ban check complete. Total users banned: {total_banned}.")
 
     if CHECK_VERIFICATION_ON_STARTUP:
-        await verify_members_on_startup()
+        await verify_members_on_startup(candidates)
 
     try:
-        conn = db_connection()
-        conn.close()
+        await save_snapshots(db_pool, "zions_key", bot.guilds, event_bus.start_id)
     except Exception as e:
-        print(f'Failed to connect to database: {e}')
+        print(f"Error saving member snapshots: {e}")
+    if not refresh_member_snapshots.is_running():
+        refresh_member_snapshots.start()
 
-async def verify_members_on_startup():
+# Ban Index Refresh Task
+# Reads only bans newer than the watermark, with a full reload every
+# BAN_INDEX_FULL_RELOAD_EVERY runs to pick up unbans made by the other bot process.
+BAN_INDEX_FULL_RELOAD_EVERY = 30
+
+@tasks.loop(minutes=1)
+async def refresh_ban_index():
+    try:
+        loop_count = refresh_ban_index.current_loop
+        if loop_count and loop_count % BAN_INDEX_FULL_RELOAD_EVERY == 0:
+            await ban_index.load(db_pool)
+        else:
+            await ban_index.refresh(db_pool)
+    except Exception as e:
+        print(f"Error refreshing ban index: {e}")
+
+# Ban Reconciliation Task
+# Pre-bans globally banned users missing from a guild's ban list and lifts global bans
+# that no longer apply. Most runs diff the cached ban lists; every
+# BAN_RECONCILE_FULL_EVERY runs they are re-read in full.
+@tasks.loop(minutes=BAN_RECONCILE_INTERVAL)
+async def reconcile_bans():
+    try:
+        # A full reload also picks up unbans made by the other bot process
+        await ban_index.load(db_pool)
+        drifts, report = await ban_reconciler.run(bot.guilds, ban_index.ids())
+        drift_lines = format_drift(drifts)
+        if drift_lines:
+            await log_action(bot.get_guild(ZIONS_GATE_GUILD_ID), f"Ban reconciliation: {format_status_counts(report.counts())}.\n" + "\n".join(drift_lines))
+    except Exception as e:
+        print(f"Error during ban reconciliation: {e}")
+        traceback.print_exc()
+
+# Shard Metrics Task
+# Records latency, guild and member counts for this cluster's shards (see /shard_stats)
+@tasks.loop(seconds=shard_metrics.SHARD_METRICS_INTERVAL)
+async def report_shard_metrics():
+    try:
+        await shard_metrics.publish(db_pool, "zions_key", int(CLUSTER_ID or 0), shard_metrics.collect(bot))
+    except Exception as e:
+        print(f"Error recording shard metrics: {e}")
+
+# Member Snapshot Task
+# Keeps the snapshots recent so the next restart only checks members who joined after it;
+# members who joined in the meantime have been through on_member_join already
+@tasks.loop(minutes=MEMBER_SNAPSHOT_INTERVAL)
+async def refresh_member_snapshots():
+    if refresh_member_snapshots.current_loop == 0:
+        return
+    try:
+        await save_snapshots(db_pool, "zions_key", bot.guilds, event_bus.delivered_through)
+    except Exception as e:
+        print(f"Error saving member snapshots: {e}")
+
+@bot.event
+async def on_member_ban(guild, user):
+    ban_reconciler.note_ban(guild.id, user.id, global_ban=user.id in ban_index)
+
+@bot.event
+async def on_member_unban(guild, user):
+    ban_reconciler.note_unban(guild.id, user.id)
+
+@bot.event
+async def on_guild_remove(guild):
+    ban_reconciler.forget(guild.id)
+
+async def verify_members_on_startup(candidates):
     # Verification Check on Startup (controlled by CHECK_VERIFICATION_ON_STARTUP)
-    print("Starting verification check for all members in all guilds...")
-    total_kicked = 0
+    # Checks the members in candidates ({guild_id: members}) from sweep_candidates
+    print("Starting verification check for members in all guilds...")
     try:
-        conn = db_connection()
-        cursor = conn.cursor()
-        try:
-            for guild in bot.guilds:
-                if guild.id == ZIONS_GATE_GUILD_ID:
+        pending = []
+        for guild in bot.guilds:
+            if guild.id == ZIONS_GATE_GUILD_ID:
+                continue
+            print(f"Checking members in guild: {guild.name} (ID: {guild.id})")
+            if not guild.me.guild_permissions.kick_members:
+                print(f"Bot lacks 'Kick Members' permission in {guild.name}. Cannot kick unverified members.")
+                continue
+            for member in candidates.get(guild.id, ()):
+                if member.bot:
                     continue
-                print(f"Checking members in guild: {guild.name} (ID: {guild.id})")
-                sql_get_verified_users = "SELECT discord_id FROM users WHERE verify_status = %s"
-                cursor.execute(sql_get_verified_users, (1,))
-                verified_ids = {row[0] for row in cursor.fetchall()}
-                for member in guild.members:
-                    if member.bot:
-                        continue
-                    if member.id not in verified_ids:
-                        if guild.me.guild_permissions.kick_members:
-                            try:
-                                await member.send(
-                                    f"You have been kicked from **{guild.name}** because you are not verified in the Zions Gate server."
-                                )
-                            except discord.Forbidden:
-                                pass
-                            try:
-                                await member.kick(reason="Member not verified in the Zions Gate server.")
-                                total_kicked += 1
-                                print(f"Kicked unverified member: {member} from {guild.name}")
-                                await log_action(guild, f"Kicked unverified member: {member} ({member.id})")
-                                await asyncio.sleep(1)
-                            except discord.Forbidden:
-                                print(f"Failed to kick {member} from {guild.name}: Missing Permissions.")
-                            except Exception as e:
-                                print(f"Error kicking {member} from {guild.name}: {e}")
-                        else:
-                            print(f"Bot lacks 'Kick Members' permission in {guild.name}. Cannot kick {member}.")
-        finally:
-            cursor.close()
-            conn.close()
+                if await verify_cache.get(db_pool, member.id) != 1:
+                    pending.append((guild.id, member.id))
+        if pending:
+            # Guilds are kicked in parallel by the job queue, each as fast as its own bucket allows
+            job_id = await job_queue.enqueue("kick_unverified", pending, reason="Member not verified in the Zions Gate server.")
+            print(f"Verification check complete. Queued {len(pending)} kicks as moderation job #{job_id}.")
+        else:
+            print("Verification check complete. No unverified members found.")
     except Exception as e:
         print(f"Error during verification check on startup: {e}")
         traceback.print_exc()
-    print(f"Verification check complete. Total members kicked: {total_kicked}.")
 
 @bot.event
 async def on_member_join(member):
@@ -145,25 +266,18 @@ async def on_member_join(member):
     if ZIONS_GATE_GUILD_ID and guild.id == ZIONS_GATE_GUILD_ID:
         print(f"User {member} joined the Zions Gate server.")
         return
-    conn = db_connection()
-    cursor = conn.cursor()
     try:
-        sql_check_ban = "SELECT reason FROM global_bans WHERE discord_id = %s"
-        cursor.execute(sql_check_ban, (user_id,))
-        ban_result = cursor.fetchone()
-        if ban_result:
-            reason = ban_result[0]
+        # Ban and verification status in one lookup, from memory when the caches are warm
+        decision = await join_decision(db_pool, user_id)
+        if decision.banned:
             try:
-                await member.send(f"You are globally banned. Reason: {reason}")
+                await member.send(f"You are globally banned. Reason: {decision.reason}")
             except discord.Forbidden:
                 pass
             await member.ban(reason="Globally banned.")
             await log_action(guild, f"Globally banned user {member} attempted to join and was banned.")
             return
-        sql_check = "SELECT verify_status FROM users WHERE discord_id = %s"
-        cursor.execute(sql_check, (user_id,))
-        result = cursor.fetchone()
-        if result and result[0] == 1:
+        if decision.verified:
             global_verified_role = discord.utils.find(
                 lambda r: r.name.lower().strip() == GLOBAL_VERIFIED_ROLE_NAME.lower(), guild.roles)
             if global_verified_role:
@@ -184,9 +298,6 @@ async def on_member_join(member):
     except Exception as e:
         print(f"Error during member join handling: {e}")
         traceback.print_exc()
-    finally:
-        cursor.close()
-        conn.close()
 
 # add_all_to_database Command
 @bot.command(name="add_all_to_database", help="Adds all members of the server to the database. Skips existing members.")
@@ -195,32 +306,22 @@ async def add_all_to_database(ctx):
     if not guild:
         await ctx.send("This command can only be used in a server.")
         return
-    conn = db_connection()
-    cursor = conn.cursor()
     try:
-        await ctx.send("Starting to add all members to the database. This may take a while...")
-        added_members = 0
-        skipped_members = 0
-        for member in guild.members:
-            if member.bot:
-                continue
-            sql_check_user = "SELECT COUNT(*) FROM users WHERE discord_id = %s"
-            cursor.execute(sql_check_user, (member.id,))
-            result = cursor.fetchone()
-            user_exists = result[0] > 0
-            if not user_exists:
-                sql_insert_user = """
-                INSERT INTO users (discord_id, time_created, verify_status, username)
-                VALUES (%s, %s, %s, %s)
-                """
-                cursor.execute(sql_insert_user, (member.id, datetime.now(timezone.utc), 0, member.name))
-                conn.commit()
-                added_members += 1
-                print(f"Added {member.name} (ID: {member.id}) to the database.")
-            else:
-                skipped_members += 1
+        status_message = await ctx.send("Starting to add all members to the database...")
+        started = time.monotonic()
+        existing_ids = await load_user_ids(db_pool)
+        humans = [member for member in guild.members if not member.bot]
+        new_members = [member for member in humans if member.id not in existing_ids]
+
+        async def report_progress(done, total):
+            await status_message.edit(content=f"Adding members to the database... {done}/{total}")
+
+        added_members = await insert_new_users(db_pool, new_members, progress=report_progress)
+        for member in new_members:
+            verify_cache.put(member.id, 0)
+        skipped_members = len(humans) - added_members
         await ctx.send(
-            f"Finished adding members to the database.\n"
+            f"Finished adding members to the database in {time.monotonic() - started:.1f}s.\n"
             f"Added: {added_members}\n"
             f"Skipped (already in database): {skipped_members}"
         )
@@ -228,37 +329,6 @@ async def add_all_to_database(ctx):
         await ctx.send("An error occurred while adding members to the database.")
         print(f"Error in add_all_to_database: {e}")
         traceback.print_exc()
-    finally:
-        cursor.close()
-        conn.close()
-
-async def perform_zions_gate_server_actions(user_id, remove_global_verified_role=False, ban_user=False, reason=None):
-    zions_gate_guild = bot.get_guild(ZIONS_GATE_GUILD_ID)
-    if not zions_gate_guild:
-        print(f"Bot is not in the Zions Gate server with ID {ZIONS_GATE_GUILD_ID}.")
-        return
-    member = zions_gate_guild.get_member(user_id)
-    if not member:
-        print(f"User with ID {user_id} not found in the Zions Gate server.")
-        return
-    try:
-        if remove_global_verified_role:
-            global_verified_role = discord.utils.find(lambda r: r.name.lower().strip() == GLOBAL_VERIFIED_ROLE_NAME.lower(), zions_gate_guild.roles)
-            if global_verified_role and global_verified_role in member.roles:
-                if zions_gate_guild.me.top_role > global_verified_role:
-                    await member.remove_roles(global_verified_role)
-                    print(f"Removed '{GLOBAL_VERIFIED_ROLE_NAME}' role from {member} in the Zions Gate server.")
-                else:
-                    print(f"Bot's role is not higher than '{GLOBAL_VERIFIED_ROLE_NAME}' role.")
-        if ban_user:
-            if zions_gate_guild.me.guild_permissions.ban_members:
-                await zions_gate_guild.ban(member, reason=reason)
-                print(f"Banned {member} from the Zions Gate server. Reason: {reason}")
-            else:
-                print("Bot lacks 'Ban Members' permission in the Zions Gate server.")
-    except Exception as e:
-        print(f"Error performing actions in Zions Gate server for user {user_id}: {e}")
-        traceback.print_exc()
 
 def extract_id_from_input(input_str: str):
     if input_str.isdigit():
@@ -269,70 +339,206 @@ def extract_id_from_input(input_str: str):
             return int(extracted)
     return None
 
+# Moderation Job Handlers
+# Each handler runs one guild's share of a global action. Handlers may run again after a
+# restart, so they check the current state first and report it instead of failing.
+async def strip_global_verified_role(g, member_in_guild):
+    global_verified_role = discord.utils.find(lambda r: r.name.lower().strip() == GLOBAL_VERIFIED_ROLE_NAME.lower(), g.roles)
+    if global_verified_role and global_verified_role in member_in_guild.roles:
+        if g.me.top_role > global_verified_role:
+            await member_in_guild.remove_roles(global_verified_role)
+
+async def global_ban_task(task):
+    g = bot.get_guild(task.guild_id)
+    if not g:
+        return "guild_gone"
+    member_in_guild = g.get_member(task.target_id)
+    if not member_in_guild:
+        return "not_present"
+    if not g.me.guild_permissions.ban_members:
+        await strip_global_verified_role(g, member_in_guild)
+        return "forbidden"
+    try:
+        await g.ban(member_in_guild, reason=f"Global ban: {task.reason}")
+    except discord.Forbidden:
+        await strip_global_verified_role(g, member_in_guild)
+        raise
+    return "banned"
+
+async def global_unban_task(task):
+    g = bot.get_guild(task.guild_id)
+    if not g:
+        return "guild_gone"
+    if not g.me.guild_permissions.ban_members:
+        return "forbidden"
+    try:
+        await g.unban(discord.Object(id=task.target_id), reason=f"Global unban: {task.reason}")
+    except discord.NotFound:
+        return "not_banned"
+    return "unbanned"
+
+async def global_kick_task(task):
+    g = bot.get_guild(task.guild_id)
+    if not g:
+        return "guild_gone"
+    member_in_guild = g.get_member(task.target_id)
+    if not member_in_guild:
+        return "not_present"
+    if not g.me.guild_permissions.kick_members:
+        await strip_global_verified_role(g, member_in_guild)
+        return "forbidden"
+    await member_in_guild.kick(reason=f"Global kick: {task.reason}")
+    return "kicked"
+
+async def kick_unverified_task(task):
+    g = bot.get_guild(task.guild_id)
+    if not g:
+        return "guild_gone"
+    member = g.get_member(task.target_id)
+    if not member:
+        return "not_present"
+    if await verify_cache.get(db_pool, member.id) == 1:
+        # Verified since the sweep was queued
+        return "verified"
+    try:
+        await member.send(f"You have been kicked from **{g.name}** because you are not verified in the Zions Gate server.")
+    except discord.Forbidden:
+        pass
+    await member.kick(reason=task.reason)
+    print(f"Kicked unverified member: {member} from {g.name}")
+    await log_action(g, f"Kicked unverified member: {member} ({member.id})")
+    return "kicked"
+
+async def grant_verified_task(task):
+    g = bot.get_guild(task.guild_id)
+    if not g:
+        return "guild_gone"
+    member_in_guild = g.get_member(task.target_id)
+    if not member_in_guild:
+        return "not_present"
+    global_verified_role = discord.utils.find(lambda r: r.name.lower().strip() == GLOBAL_VERIFIED_ROLE_NAME.lower(), g.roles)
+    if not global_verified_role:
+        return "role_missing"
+    if global_verified_role in member_in_guild.roles:
+        return "already_verified"
+    await member_in_guild.add_roles(global_verified_role, reason=task.reason)
+    return "granted"
+
+async def report_finished_job(job_id, job, counts):
+    await log_action(bot.get_guild(ZIONS_GATE_GUILD_ID), format_job_summary(job_id, job, counts))
+
+job_queue.register("global_ban", global_ban_task)
+job_queue.register("global_unban", global_unban_task)
+job_queue.register("global_kick", global_kick_task)
+job_queue.register("kick_unverified", kick_unverified_task)
+job_queue.register("grant_verified", grant_verified_task)
+job_queue.on_job_done = report_finished_job
+
+# Status Events From Zions Gate
+# Bans, unbans, kicks and verifications made by the other bot process arrive here within
+# a poll interval; caches are updated and the action is repeated in this bot's guilds.
+async def on_remote_ban(event):
+    ban_index.add(event.discord_id, event.value)
+    verify_cache.put(event.discord_id, 0)
+    pending = [(g.id, event.discord_id) for g in bot.guilds if g.get_member(event.discord_id)]
+    if pending:
+        await job_queue.enqueue("global_ban", pending, target_id=event.discord_id, reason=event.value)
+
+async def on_remote_unban(event):
+    ban_index.remove(event.discord_id)
+    await job_queue.enqueue("global_unban", [(g.id, event.discord_id) for g in bot.guilds], target_id=event.discord_id, reason=event.value)
+
+async def on_remote_kick(event):
+    verify_cache.put(event.discord_id, 0)
+    pending = [(g.id, event.discord_id) for g in bot.guilds if g.id != ZIONS_GATE_GUILD_ID and g.get_member(event.discord_id)]
+    if pending:
+        await job_queue.enqueue("global_kick", pending, target_id=event.discord_id, reason=event.value)
+
+async def on_remote_verify(event):
+    verify_cache.put(event.discord_id, int(event.value))
+
+event_bus.subscribe("ban", on_remote_ban)
+event_bus.subscribe("unban", on_remote_unban)
+event_bus.subscribe("kick", on_remote_kick)
+event_bus.subscribe("verify", on_remote_verify)
+
+def record_global_ban(cursor, user_id, banned_at, reason, guild_ids, requested_by):
+    # The ban row, its status event and the enforcing job commit together or not at all
+    write_global_bans(cursor, [(user_id, banned_at, reason)])
+    event_bus.write_events(cursor, "ban", [(user_id, reason)])
+    return job_queue.write_job(
+        cursor, "global_ban", [(guild_id, user_id) for guild_id in guild_ids],
+        target_id=user_id, reason=reason, requested_by=requested_by
+    )
+
 # global_ban Command
 @bot.tree.command(name="global_ban", description="Globally ban a user from all servers.")
 @discord.app_commands.checks.has_permissions(ban_members=True)
-async def global_ban(interaction: discord.Interaction, member: str, reason: str = "No reason provided"):
+async def global_ban(interaction: discord.Interaction, member: str, reason: discord.app_commands.Range[str, 1, MAX_REASON_LENGTH] = "No reason provided"):
     await interaction.response.defer(ephemeral=True)
     user_id = extract_id_from_input(member)
     if not user_id:
         await interaction.followup.send("Please provide a valid user mention or ID.", ephemeral=True)
         return
-    conn = db_connection()
-    cursor = conn.cursor()
     try:
         try:
             user = await bot.fetch_user(user_id)
         except:
             await interaction.followup.send("Could not find a user with that ID.", ephemeral=True)
             return
-        sql_insert_ban = """
-        INSERT INTO global_bans (discord_id, banned_at, reason)
-        VALUES (%s, %s, %s)
-        ON DUPLICATE KEY UPDATE banned_at = VALUES(banned_at), reason = VALUES(reason)
-        """
-        cursor.execute(sql_insert_ban, (user_id, mountain_time, reason))
-        conn.commit()
-        sql_update_status = "UPDATE users SET verify_status = %s WHERE discord_id = %s"
-        cursor.execute(sql_update_status, (0, user_id))
-        conn.commit()
-        for g in bot.guilds:
-            member_in_guild = g.get_member(user_id)
-            if member_in_guild:
-                global_verified_role = discord.utils.find(lambda r: r.name.lower().strip() == GLOBAL_VERIFIED_ROLE_NAME.lower(), g.roles)
-                if global_verified_role and global_verified_role in member_in_guild.roles:
-                    if g.me.top_role > global_verified_role:
-                        await member_in_guild.remove_roles(global_verified_role)
-                if g.me.guild_permissions.ban_members:
-                    try:
-                        await g.ban(member_in_guild, reason=f"Global ban: {reason}")
-                    except Exception as e:
-                        print(f"Error banning {member_in_guild} from {g.name}: {e}")
-                else:
-                    print(f"Bot lacks 'Ban Members' permission in {g.name}.")
-        await perform_zions_gate_server_actions(
-            user_id,
-            remove_global_verified_role=False,
-            ban_user=True,
-            reason=f"Global ban: {reason}"
-        )
-        await log_action(interaction.guild,  f"{user.mention} ({user.id}) globally banned by {interaction.user}. Reason: {reason}")
-        await interaction.followup.send(f"{user} globally banned from all servers.", ephemeral=True)
+        banned_at = datetime.now(ZoneInfo("America/Denver")).replace(tzinfo=None)
+        # The job queue bans them in every guild, Zions Gate included
+        job_id = await db_pool.transaction(record_global_ban, user_id, banned_at, reason, [g.id for g in bot.guilds], interaction.user.id)
+        job_queue.notify()
+        ban_index.add(user_id, reason, banned_at)
+        verify_cache.invalidate(user_id)
+        await log_action(interaction.guild,  f"{user.mention} ({user.id}) globally banned by {interaction.user}. Reason: {reason} (job #{job_id})")
+        await interaction.followup.send(f"{user} globally banned. Banning them in {len(bot.guilds)} servers as job #{job_id}; use /job_status to follow it.", ephemeral=True)
     except Exception as e:
         await interaction.followup.send("An error occurred while trying to globally ban the user.", ephemeral=True)
         print(f"Error during global ban: {e}")
         traceback.print_exc()
-    finally:
-        cursor.close()
-        conn.close()
+
+# bulk_global_ban Command
+# Skips IDs already globally banned, records the rest in one transaction and bans them
+# everywhere with bulk ban requests; replies with a per-ID CSV report
+@bot.tree.command(name="bulk_global_ban", description="Globally ban every user ID listed in a CSV or text file.")
+@discord.app_commands.checks.has_permissions(ban_members=True)
+async def bulk_global_ban(interaction: discord.Interaction, file: discord.Attachment, reason: str = "Bulk global ban import"):
+    await interaction.response.defer(ephemeral=True)
+    try:
+        text = (await file.read()).decode("utf-8-sig", errors="replace")
+        entries, rejected = parse_ban_list(text, reason)
+        new_entries = []
+        for entry in entries:
+            if entry.discord_id in ban_index:
+                entry.status = "already_banned"
+            else:
+                new_entries.append(entry)
+        if new_entries:
+            banned_at = datetime.now(ZoneInfo("America/Denver")).replace(tzinfo=None)
+            await upsert_global_bans(db_pool, [(entry.discord_id, entry.reason) for entry in new_entries], banned_at)
+            for entry in new_entries:
+                ban_index.add(entry.discord_id, entry.reason, banned_at)
+                verify_cache.invalidate(entry.discord_id)
+            await event_bus.publish_many("ban", [(entry.discord_id, entry.reason) for entry in new_entries])
+            progress_message = await interaction.followup.send(f"Recorded {len(new_entries)} new global bans. Banning them in {len(bot.guilds)} servers...", ephemeral=True, wait=True)
+            report = await bulk_ban_guilds(bot.guilds, new_entries, f"Global ban: {reason}", progress=progress_editor(progress_message, "Bulk banning"))
+            for result in report.results:
+                if result.error:
+                    print(f"Error bulk banning in {result.item[0].name}: {result.error}")
+        await log_action(interaction.guild, f"{len(new_entries)} users globally banned by {interaction.user} from a bulk import ({file.filename}). Reason: {reason}")
+        await interaction.followup.send(f"Bulk global ban finished: {summarize(entries + rejected) or 'no IDs found'}.", file=build_report(entries + rejected), ephemeral=True)
+    except Exception as e:
+        await interaction.followup.send("An error occurred during the bulk global ban.", ephemeral=True)
+        print(f"Error during bulk global ban: {e}")
+        traceback.print_exc()
 
 # global_unban Command
 @bot.tree.command(name="global_unban", description="Globally unban a user from all servers.")
 @discord.app_commands.checks.has_permissions(ban_members=True)
-async def global_unban(interaction: discord.Interaction, user_id: str, reason: str = "No reason provided"):
+async def global_unban(interaction: discord.Interaction, user_id: str, reason: discord.app_commands.Range[str, 1, MAX_REASON_LENGTH] = "No reason provided"):
     await interaction.response.defer(ephemeral=True)
-    conn = db_connection()
-    cursor = conn.cursor()
     try:
         try:
             user_id_int = int(user_id)
@@ -345,87 +551,46 @@ async def global_unban(interaction: discord.Interaction, user_id: str, reason: s
             print(f"Error fetching user: {e}")
             return
         sql_delete_ban = "DELETE FROM global_bans WHERE discord_id = %s"
-        cursor.execute(sql_delete_ban, (user_id_int,))
-        conn.commit()
-        for g in bot.guilds:
-            if g.me.guild_permissions.ban_members:
-                try:
-                    await g.unban(user, reason=f"Global unban: {reason}")
-                except discord.NotFound:
-                    pass
-                except discord.Forbidden:
-                    print(f"Bot lacks permission to unban in {g.name}.")
-                except Exception as e:
-                    print(f"Error unbanning user {user_id_int} from {g.name}: {e}")
-                finally:
-                    await asyncio.sleep(1)
-            else:
-                print(f"Bot lacks 'Ban Members' permission in {g.name}.")
-        await log_action(interaction.guild,  f"{user.mention} ({user.id}) globally unbanned by {interaction.user}. Reason: {reason}")
-        await interaction.followup.send(f"User {user} globally unbanned.", ephemeral=True)
+        await db_pool.execute(sql_delete_ban, (user_id_int,))
+        ban_index.remove(user_id_int)
+        await event_bus.publish("unban", user_id_int, reason)
+        job_id = await job_queue.enqueue("global_unban", [(g.id, user_id_int) for g in bot.guilds], target_id=user_id_int, reason=reason, requested_by=interaction.user.id)
+        await log_action(interaction.guild,  f"{user.mention} ({user.id}) globally unbanned by {interaction.user}. Reason: {reason} (job #{job_id})")
+        await interaction.followup.send(f"User {user} globally unbanned. Unbanning them in {len(bot.guilds)} servers as job #{job_id}.", ephemeral=True)
     except Exception as e:
         await interaction.followup.send("An error occurred while trying to globally unban the user.", ephemeral=True)
         print(f"Error during global unban: {e}")
         traceback.print_exc()
-    finally:
-        cursor.close()
-        conn.close()
 
 # global_kick Command
 @bot.tree.command(name="global_kick", description="Globally kick a user from all servers.")
 @discord.app_commands.checks.has_permissions(ban_members=True)
-async def global_kick(interaction: discord.Interaction, member: str, reason: str = "No reason provided"):
+async def global_kick(interaction: discord.Interaction, member: str, reason: discord.app_commands.Range[str, 1, MAX_REASON_LENGTH] = "No reason provided"):
     await interaction.response.defer(ephemeral=True)
     user_id = extract_id_from_input(member)
     if not user_id:
         await interaction.followup.send("Please provide a valid user mention or ID.", ephemeral=True)
         return
-    conn = db_connection()
-    cursor = conn.cursor()
     try:
-        sql_update_status = "UPDATE users SET verify_status = %s WHERE discord_id = %s"
-        cursor.execute(sql_update_status, (0, user_id))
-        conn.commit()
-        for g in bot.guilds:
-            if g.id == ZIONS_GATE_GUILD_ID:
-                continue
-            member_in_guild = g.get_member(user_id)
-            if member_in_guild:
-                global_verified_role = discord.utils.find(lambda r: r.name.lower().strip() == GLOBAL_VERIFIED_ROLE_NAME.lower(), g.roles)
-                if global_verified_role and global_verified_role in member_in_guild.roles:
-                    if g.me.top_role > global_verified_role:
-                        await member_in_guild.remove_roles(global_verified_role)
-                if g.me.guild_permissions.kick_members:
-                    try:
-                        await member_in_guild.kick(reason=f"Global kick: {reason}")
-                    except Exception as e:
-                        print(f"Error kicking {member_in_guild} from {g.name}: {e}")
-                else:
-                    print(f"Bot lacks 'Kick Members' permission in {g.name}.")
-        await perform_zions_gate_server_actions(
-            user_id,
-            remove_global_verified_role=False,
-            ban_user=False,
-            reason=f"Global kick: {reason}"
-        )
+        await verify_cache.set_status(db_pool, user_id, 0)
+        await event_bus.publish("kick", user_id, reason)
+        pending = [(g.id, user_id) for g in bot.guilds if g.id != ZIONS_GATE_GUILD_ID and g.get_member(user_id)]
+        job_id = await job_queue.enqueue("global_kick", pending, target_id=user_id, reason=reason, requested_by=interaction.user.id)
 
         try:
             user = await bot.fetch_user(user_id)
         except:
             user = f"User ID {user_id}"
         if isinstance(user, discord.User):
-            await log_action(interaction.guild, f"{user.mention} ({user.id}) globally kicked by {interaction.user}. Reason: {reason}")
-            await interaction.followup.send(f"{user} globally kicked from all servers (except the Zions Gate server).", ephemeral=True)
+            await log_action(interaction.guild, f"{user.mention} ({user.id}) globally kicked by {interaction.user}. Reason: {reason} (job #{job_id})")
+            await interaction.followup.send(f"{user} globally kicked. Kicking them from all servers (except the Zions Gate server) as job #{job_id}.", ephemeral=True)
         else:
-            await log_action(interaction.guild, f"{user} globally kicked by {interaction.user}. Reason: {reason}")
-            await interaction.followup.send(f"{user} globally kicked from all servers (except the Zions Gate server).", ephemeral=True)
+            await log_action(interaction.guild, f"{user} globally kicked by {interaction.user}. Reason: {reason} (job #{job_id})")
+            await interaction.followup.send(f"{user} globally kicked. Kicking them from all servers (except the Zions Gate server) as job #{job_id}.", ephemeral=True)
     except Exception as e:
         await interaction.followup.send("An error occurred while trying to globally kick the user.", ephemeral=True)
         print(f"Error during global kick: {e}")
         traceback.print_exc()
-    finally:
-        cursor.close()
-        conn.close()
 
 # local_kick Command
 @bot.tree.command(name="local_kick", description="Kick a user from this server.")
@@ -507,8 +672,6 @@ async def local_ban(interaction: discord.Interaction, member: str, reason: str =
 @bot.tree.command(name="verify_all", description="Verify all users in the server.")
 @discord.app_commands.checks.has_permissions(administrator=True)
 async def verify_all(interaction: discord.Interaction):
-    conn = db_connection()
-    cursor = conn.cursor()
     try:
         guild = interaction.guild
         if not guild:
@@ -519,35 +682,23 @@ async def verify_all(interaction: discord.Interaction):
             await interaction.response.send_message(f"'{GLOBAL_VERIFIED_ROLE_NAME}' role not found in the server.", ephemeral=True)
             return
         await interaction.response.send_message("Starting the verification process for all members...", ephemeral=True)
-        for member in guild.members:
-            try:
-                if member.bot:
-                    continue
-                sql_check_user = "SELECT COUNT(*) FROM users WHERE discord_id = %s"
-                cursor.execute(sql_check_user, (member.id,))
-                result = cursor.fetchone()
-                user_exists = result[0] > 0
-                if not user_exists:
-                    sql_insert_user = "INSERT INTO users (discord_id, verify_status) VALUES (%s, %s)"
-                    cursor.execute(sql_insert_user, (member.id, 1))
-                    conn.commit()
-                else:
-                    sql_update_status = "UPDATE users SET verify_status = %s WHERE discord_id = %s"
-                    cursor.execute(sql_update_status, (1, member.id))
-                    conn.commit()
-                if global_verified_role not in member.roles:
-                    await member.add_roles(global_verified_role)
-            except Exception as e:
-                print(f"Error verifying member {member}: {e}")
-                continue
-        await interaction.followup.send("Verification process completed for all members.", ephemeral=True)
+        started = time.monotonic()
+        humans = [member for member in guild.members if not member.bot]
+        await upsert_verified_users(db_pool, humans)
+        for member in humans:
+            verify_cache.put(member.id, 1)
+        await event_bus.publish_many("verify", [(member.id, 1) for member in humans])
+        missing_role = [member for member in humans if global_verified_role not in member.roles]
+        job_id = await job_queue.enqueue("grant_verified", [(guild.id, member.id) for member in missing_role], reason="verify_all", requested_by=interaction.user.id)
+        elapsed = time.monotonic() - started
+        await interaction.edit_original_response(
+            content=f"Marked {len(humans)} members verified in the database in {elapsed:.1f}s. "
+                    f"Granting '{GLOBAL_VERIFIED_ROLE_NAME}' to {len(missing_role)} members as job #{job_id}; use /job_status for its progress, throughput and ETA."
+        )
     except Exception as e:
         await interaction.followup.send("An error occurred during the verification process.", ephemeral=True)
         print(f"Error during verify_all: {e}")
         traceback.print_exc()
-    finally:
-        cursor.close()
-        conn.close()
 
 # purge Command
 @bot.tree.command(name="purge", description="Delete messages and log them.")
@@ -572,23 +723,22 @@ async def purge(interaction: discord.Interaction, channel: discord.TextChannel,
     webhook_url = WEBHOOK_URL
     if webhook_url:
         try:
-            async with aiohttp.ClientSession() as session:
-                with open(log_filename, "rb") as log_file:
-                    data = aiohttp.FormData()
-                    data.add_field(
-                        "content",
-                        f"Purged {len(deleted_messages)} messages from {channel.mention}. Log file attached:",
-                    )
-                    data.add_field(
-                        "file",
-                        log_file,
-                        filename=log_filename,
-                        content_type="text/csv"
-                    )
-                    async with session.post(webhook_url, data=data) as response:
-                        if response.status not in [200, 204]:
-                            response_text = await response.text()
-                            print(f"Failed to send log file to the webhook: {response.status} {response_text}")
+            with open(log_filename, "rb") as log_file:
+                data = aiohttp.FormData()
+                data.add_field(
+                    "content",
+                    f"Purged {len(deleted_messages)} messages from {channel.mention}. Log file attached:",
+                )
+                data.add_field(
+                    "file",
+                    log_file,
+                    filename=log_filename,
+                    content_type="text/csv"
+                )
+                async with bot.http_session.post(webhook_url, data=data) as response:
+                    if response.status not in [200, 204]:
+                        response_text = await response.text()
+                        print(f"Failed to send log file to the webhook: {response.status} {response_text}")
         except Exception as e:
             print(f"Error sending log file to the webhook: {e}")
     else:
@@ -615,4 +765,67 @@ async def wipe_commands(interaction: discord.Interaction, guild_id: str):
         print(f"Error wiping commands: {e}")
         traceback.print_exc()
 
+# reconcile_bans Command
+# Reports ban drift per guild and, unless dry_run is set, fixes it
+@bot.tree.command(name="reconcile_bans", description="Compare every server's ban list with the global ban list.")
+@discord.app_commands.checks.has_permissions(administrator=True)
+async def reconcile_bans_command(interaction: discord.Interaction, dry_run: bool = True, full: bool = False):
+    await interaction.response.defer(ephemeral=True)
+    try:
+        await ban_index.load(db_pool)
+        drifts, report = await ban_reconciler.run(bot.guilds, ban_index.ids(), full=full, dry_run=dry_run)
+        drift_lines = format_drift(drifts)
+        lines = [f"Checked {len(drifts)} servers; {len(drift_lines)} drifted."] + drift_lines
+        if report is not None:
+            lines.append(f"Applied: {format_status_counts(report.counts()) or 'nothing to do'}.")
+            await log_action(interaction.guild, f"Ban reconciliation run by {interaction.user}: {format_status_counts(report.counts()) or 'no drift'}.")
+        await interaction.followup.send("\n".join(lines)[:2000], ephemeral=True)
+    except Exception as e:
+        await interaction.followup.send("An error occurred during ban reconciliation.", ephemeral=True)
+        print(f"Error during reconcile_bans: {e}")
+        traceback.print_exc()
+
+# job_status Command
+@bot.tree.command(name="job_status", description="Show the progress of a moderation job.")
+@discord.app_commands.checks.has_permissions(ban_members=True)
+async def job_status(interaction: discord.Interaction, job_id: int):
+    await interaction.response.defer(ephemeral=True)
+    try:
+        status = await job_queue.job_status(job_id)
+        if status is None:
+            await interaction.followup.send(f"No moderation job #{job_id}.", ephemeral=True)
+            return
+        await interaction.followup.send(format_job_status(job_id, *status), ephemeral=True)
+    except Exception as e:
+        await interaction.followup.send("An error occurred while looking up the job.", ephemeral=True)
+        print(f"Error during job_status: {e}")
+        traceback.print_exc()
+
+# cache_stats Command
+@bot.tree.command(name="cache_stats", description="Show in-memory cache statistics.")
+@discord.app_commands.checks.has_permissions(administrator=True)
+async def cache_stats(interaction: discord.Interaction):
+    stats = verify_cache.stats()
+    await interaction.response.send_message(
+        f"Ban index: {len(ban_index)} bans\n"
+        f"Verification cache: {stats['size']} users, {stats['hits']} hits, "
+        f"{stats['misses']} misses ({stats['hit_rate']:.1%} hit rate)",
+        ephemeral=True
+    )
+
+# shard_stats Command
+@bot.tree.command(name="shard_stats", description="Show latency and load for every shard.")
+@discord.app_commands.checks.has_permissions(administrator=True)
+async def shard_stats(interaction: discord.Interaction):
+    await interaction.response.defer(ephemeral=True)
+    try:
+        rows = await shard_metrics.load(db_pool, "zions_key")
+        if not rows:
+            rows = [(row[0], int(CLUSTER_ID or 0), *row[1:], 0) for row in shard_metrics.collect(bot)]
+        await interaction.followup.send("\n".join(shard_metrics.format_shard_metrics(rows))[:2000], ephemeral=True)
+    except Exception as e:
+        await interaction.followup.send("An error occurred while reading shard metrics.", ephemeral=True)
+        print(f"Error during shard_stats: {e}")
+        traceback.print_exc()
+
 bot.run(ZIONS_KEY_BOT_TOKEN)
@@ -0,0 +1,126 @@
+"""
+Bounded admission queue drained by a fixed pool of workers.
+
+on_member_join only records the member here and returns; `workers` background tasks
+take members oldest first and run the onboarding handler, so a join burst costs one
+dict entry per member instead of one coroutine blocked on the channel-creation rate
+limit. Pending members are keyed by ID: a member who joins twice while queued keeps
+their place, and one who leaves before their turn is dropped (discard). Once
+`max_pending` members are waiting, further joins are rejected and counted rather than
+queued without bound.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+
+import discord
+from dotenv import load_dotenv
+
+load_dotenv()
+
+JOIN_WORKERS = int(os.getenv("join_workers", "4"))
+JOIN_QUEUE_SIZE = int(os.getenv("join_queue_size", "2000"))
+WAIT_SAMPLES = 1000
+
+def _percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class AdmissionQueue:
+    def __init__(self, handler, workers=JOIN_WORKERS, max_pending=JOIN_QUEUE_SIZE):
+        # Awaited as handler(item, waited_seconds) for every admitted item
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pending = OrderedDict()
+        self._ready = asyncio.Event()
+        self._tasks = []
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self.active = 0
+        self.max_depth = 0
+        self.admitted = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.processed = 0
+        self.errors = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def submit(self, key, item):
+        """
+        Queues `item` under `key`. Returns False if the queue is full.
+        """
+        if key in self._pending:
+            self._pending[key] = (item, self._pending[key][1])
+            self.coalesced += 1
+            return True
+        if len(self._pending) >= self.max_pending:
+            self.rejected += 1
+            return False
+        self._pending[key] = (item, time.monotonic())
+        self.admitted += 1
+        self.max_depth = max(self.max_depth, len(self._pending))
+        self._ready.set()
+        return True
+
+    def discard(self, key):
+        if self._pending.pop(key, None) is not None:
+            self.dropped += 1
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    async def _worker(self):
+        while True:
+            if not self._pending:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            key, (item, queued_at) = self._pending.popitem(last=False)
+            waited = time.monotonic() - queued_at
+            self._waits.append(waited)
+            self.active += 1
+            try:
+                await self.handler(item, waited)
+                self.processed += 1
+            except discord.RateLimited as e:
+                # Longer than the client will wait by itself: back off and retry this item first
+                print(f"Join queue rate limited for {e.retry_after:.0f}s; retrying {key}.")
+                if key not in self._pending:
+                    self._pending[key] = (item, queued_at)
+                    self._pending.move_to_end(key, last=False)
+                await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                self.errors += 1
+                print(f"Error handling queued join {key}: {e}")
+            finally:
+                self.active -= 1
+
+    def stats(self):
+        waits = list(self._waits)
+        return {
+            "depth": len(self._pending),
+            "max_depth": self.max_depth,
+            "active": self.active,
+            "admitted": self.admitted,
+            "processed": self.processed,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "wait_p50": _percentile(waits, 0.5),
+            "wait_p95": _percentile(waits, 0.95),
+            "wait_max": max(waits, default=0.0),
+        }
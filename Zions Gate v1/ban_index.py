@@ -0,0 +1,86 @@
+"""
+In-memory index of the global_bans table, shared by everything in one bot process.
+
+The index is loaded once at startup, updated in place by the ban/unban commands and
+refreshed periodically from the database using the newest `banned_at` it has seen as
+a watermark, so join checks and startup sweeps are a dict lookup instead of a query.
+
+banned_at is a MySQL DATETIME holding Denver local time, which the driver returns
+naive, so the watermark is kept naive Denver time too.
+"""
+
+from zoneinfo import ZoneInfo
+
+DENVER = ZoneInfo("America/Denver")
+
+def denver_naive(moment):
+    """
+    Returns `moment` as a naive Denver-local datetime, the form global_bans stores.
+    """
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(DENVER).replace(tzinfo=None)
+
+class BanIndex:
+    def __init__(self):
+        self._reasons = {}
+        self._watermark = None
+        self.loaded = False
+
+    def __contains__(self, discord_id):
+        return discord_id in self._reasons
+
+    def __len__(self):
+        return len(self._reasons)
+
+    def reason(self, discord_id):
+        """
+        Returns the recorded ban reason, or None if the user is not globally banned.
+        """
+        return self._reasons.get(discord_id)
+
+    def ids(self):
+        return self._reasons.keys()
+
+    def add(self, discord_id, reason, banned_at=None):
+        self._reasons[discord_id] = reason
+        # Aware and naive datetimes cannot be compared, so callers passing
+        # datetime.now(DENVER) are normalized to the database's naive form
+        banned_at = denver_naive(banned_at)
+        if banned_at is not None and (self._watermark is None or banned_at > self._watermark):
+            self._watermark = banned_at
+
+    def remove(self, discord_id):
+        self._reasons.pop(discord_id, None)
+
+    async def load(self, pool):
+        """
+        Replaces the whole index with the current contents of global_bans.
+        This is also what picks up unbans made by another process.
+        """
+        rows = await pool.fetchall("SELECT discord_id, reason, banned_at FROM global_bans")
+        self._reasons = {discord_id: reason for discord_id, reason, _ in rows}
+        self._watermark = max((banned_at for _, _, banned_at in rows), default=None)
+        self.loaded = True
+        print(f"Loaded {len(self._reasons)} global bans into the ban index.")
+
+    async def refresh(self, pool):
+        """
+        Pulls in bans recorded since the watermark. Returns how many rows were read.
+        """
+        if not self.loaded:
+            await self.load(pool)
+            return len(self._reasons)
+        # >= rather than > so bans sharing the watermark's second are never missed;
+        # re-adding an id that is already present is harmless.
+        rows = await pool.fetchall(
+            "SELECT discord_id, reason, banned_at FROM global_bans WHERE banned_at >= %s",
+            (self._watermark,)
+        ) if self._watermark is not None else await pool.fetchall(
+            "SELECT discord_id, reason, banned_at FROM global_bans"
+        )
+        for discord_id, reason, banned_at in rows:
+            self.add(discord_id, reason, banned_at)
+        return len(rows)
+
+ban_index = BanIndex()
@@ -0,0 +1,146 @@
+"""
+Reconciles every guild's ban list with the global ban list.
+
+Each guild's bans are streamed from guild.bans() into a dict of user ID -> whether the
+ban was placed for a global ban, and diffed against the ban index with set arithmetic:
+
+    missing = global bans - guild bans                 (pre-banned, members or not)
+    stale   = guild bans placed globally - global bans (lifted)
+
+Only bans whose reason marks them as global are ever lifted, so bans made by a
+server's own staff are left alone. The streamed lists are kept in memory and updated
+from on_member_ban / on_member_unban and from the bot's own actions, so scheduled runs
+diff against that copy and only call the API for the changes; every `full_every`
+runs (and on demand) the lists are streamed again to catch anything that was missed.
+"""
+
+import os
+from dataclasses import dataclass, field
+
+import discord
+from dotenv import load_dotenv
+
+from moderation import ModerationExecutor
+
+load_dotenv()
+
+BAN_RECONCILE_INTERVAL = float(os.getenv("ban_reconcile_interval_minutes", "15"))
+BAN_RECONCILE_FULL_EVERY = int(os.getenv("ban_reconcile_full_every", "24"))
+# Reasons the bots have used for global bans, old and new
+GLOBAL_BAN_REASON_PREFIXES = ("Global ban", "Globally banned")
+# Discord accepts at most 200 users per bulk ban request
+BULK_BAN_CHUNK = 200
+
+def is_global_reason(reason):
+    return bool(reason) and reason.startswith(GLOBAL_BAN_REASON_PREFIXES)
+
+@dataclass
+class GuildDrift:
+    guild: discord.Guild
+    missing: set = field(default_factory=set)
+    stale: set = field(default_factory=set)
+
+    def __bool__(self):
+        return bool(self.missing or self.stale)
+
+def format_drift(drifts, limit=15):
+    """
+    Formats one line per guild that has drifted, e.g. 'Guild: 3 missing, 1 stale'.
+    """
+    drifted = [drift for drift in drifts if drift]
+    lines = [f"{drift.guild.name}: {len(drift.missing)} missing, {len(drift.stale)} stale" for drift in drifted[:limit]]
+    if len(drifted) > limit:
+        lines.append(f"...and {len(drifted) - limit} more guilds")
+    return lines
+
+class BanReconciler:
+    def __init__(self, executor=None, full_every=BAN_RECONCILE_FULL_EVERY):
+        self.executor = executor or ModerationExecutor()
+        self.full_every = full_every
+        # guild_id -> {user_id: True if the ban was placed for a global ban}
+        self._bans = {}
+        self.runs = 0
+
+    def note_ban(self, guild_id, user_id, global_ban=False):
+        if guild_id in self._bans:
+            self._bans[guild_id][user_id] = self._bans[guild_id].get(user_id, False) or global_ban
+
+    def note_unban(self, guild_id, user_id):
+        if guild_id in self._bans:
+            self._bans[guild_id].pop(user_id, None)
+
+    def forget(self, guild_id):
+        self._bans.pop(guild_id, None)
+
+    async def scan(self, guild):
+        bans = {}
+        async for entry in guild.bans(limit=None):
+            bans[entry.user.id] = is_global_reason(entry.reason)
+        self._bans[guild.id] = bans
+
+    async def diff(self, guilds, global_ids, full=False):
+        """
+        Returns a GuildDrift for every guild the bot can ban in. Guilds without a cached
+        ban list, or all of them when `full` is set, are streamed from the API first.
+        """
+        global_ids = set(global_ids)
+        drifts = []
+        for guild in guilds:
+            if not guild.me.guild_permissions.ban_members:
+                continue
+            if full or guild.id not in self._bans:
+                try:
+                    await self.scan(guild)
+                except discord.HTTPException as e:
+                    print(f"Error reading bans for {guild.name}: {e}")
+                    continue
+            bans = self._bans[guild.id]
+            global_in_guild = {user_id for user_id, is_global in bans.items() if is_global}
+            drifts.append(GuildDrift(guild, global_ids - bans.keys(), global_in_guild - global_ids))
+        return drifts
+
+    async def run(self, guilds, global_ids, full=None, dry_run=False, progress=None):
+        """
+        Diffs every guild and, unless `dry_run`, applies the missing bans and unbans.
+        Returns (drifts, RunReport or None).
+        """
+        if full is None:
+            full = self.runs % self.full_every == 0
+        self.runs += 1
+        drifts = await self.diff(guilds, global_ids, full=full)
+        if dry_run:
+            return drifts, None
+        return drifts, await self.apply(drifts, progress=progress)
+
+    async def apply(self, drifts, progress=None):
+        items = []
+        for drift in drifts:
+            missing = sorted(drift.missing)
+            if drift.guild.me.guild_permissions.manage_guild:
+                items.extend(("ban", drift.guild, missing[start:start + BULK_BAN_CHUNK]) for start in range(0, len(missing), BULK_BAN_CHUNK))
+            else:
+                # bulk_ban also needs Manage Server; fall back to one ban per user
+                items.extend(("ban", drift.guild, [user_id]) for user_id in missing)
+            items.extend(("unban", drift.guild, user_id) for user_id in drift.stale)
+
+        async def reconcile(item):
+            action, guild, target = item
+            if action == "unban":
+                try:
+                    await guild.unban(discord.Object(id=target), reason="Global unban: reconciliation")
+                except discord.NotFound:
+                    pass
+                self.note_unban(guild.id, target)
+                return "unbanned"
+            users = [discord.Object(id=user_id) for user_id in target]
+            if len(users) == 1:
+                await guild.ban(users[0], reason="Global ban: reconciliation", delete_message_seconds=0)
+                banned = target
+            else:
+                result = await guild.bulk_ban(users, reason="Global ban: reconciliation", delete_message_seconds=0)
+                banned = [user.id for user in result.banned]
+            for user_id in banned:
+                self.note_ban(guild.id, user_id, global_ban=True)
+            return "banned"
+
+        return await self.executor.run(items, reconcile, key=lambda item: item[1].id, progress=progress)
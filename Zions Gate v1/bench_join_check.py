@@ -0,0 +1,79 @@
+"""
+Benchmark: join-handling latency of Zions_Key.on_member_join's database checks.
+
+Compares the old check (a global_bans query, then a users query) with join_decision
+on cold caches (one query) and warm caches (no query). The database is simulated by a
+pool whose every round trip sleeps for `rtt_ms` (default 1.0), so the numbers show
+what the round trips cost on top of the in-process work. Reports p50/p99 per join.
+
+    python bench_join_check.py [joins] [rtt_ms]
+"""
+
+import asyncio
+import sys
+import time
+
+from ban_index import ban_index
+from join_check import join_decision
+from verify_cache import verify_cache
+
+BANNED_EVERY = 50
+
+class SimulatedPool:
+    def __init__(self, rtt):
+        self.rtt = rtt
+        self.round_trips = 0
+
+    async def fetchone(self, sql, params=()):
+        self.round_trips += 1
+        await asyncio.sleep(self.rtt)
+        discord_id = params[0]
+        banned = discord_id % BANNED_EVERY == 0
+        if "FROM global_bans" in sql and "users" not in sql:
+            return ("Global ban: benchmark",) if banned else None
+        if "FROM users" in sql and "global_bans" not in sql:
+            return (1,)
+        return (1, banned, "Global ban: benchmark" if banned else None)
+
+async def legacy_check(pool, discord_id):
+    ban = await pool.fetchone("SELECT reason FROM global_bans WHERE discord_id = %s", (discord_id,))
+    if ban:
+        return True, ban[0], None
+    row = await pool.fetchone("SELECT verify_status FROM users WHERE discord_id = %s", (discord_id,))
+    return False, None, row[0] if row else None
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def measure(label, check, pool, member_ids):
+    pool.round_trips = 0
+    latencies = []
+    for member_id in member_ids:
+        started = time.perf_counter()
+        await check(pool, member_id)
+        latencies.append((time.perf_counter() - started) * 1e3)
+    print(f"{label:>14}: p50 {percentile(latencies, 0.5):6.3f} ms, p99 {percentile(latencies, 0.99):6.3f} ms, "
+          f"{pool.round_trips / len(member_ids):.2f} round trips/join")
+
+async def main():
+    joins = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rtt_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    pool = SimulatedPool(rtt_ms / 1e3)
+    member_ids = [10**17 + i for i in range(joins)]
+    print(f"{joins} joins, {rtt_ms} ms per database round trip:")
+
+    await measure("before", legacy_check, pool, member_ids)
+
+    ban_index.loaded = False
+    await measure("after (cold)", join_decision, pool, member_ids)
+
+    for member_id in member_ids:
+        if member_id % BANNED_EVERY == 0:
+            ban_index.add(member_id, "Global ban: benchmark")
+        verify_cache.put(member_id, 1)
+    ban_index.loaded = True
+    await measure("after (warm)", join_decision, pool, member_ids)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+"""
+Micro-benchmark: onboarding embeds built from scratch vs. the cached templates.
+
+Simulates a burst of joins, each of which builds the three onboarding pages the way
+on_member_join and the onboarding buttons do and serializes them (as sending does).
+Reports CPU time per join and the memory held by the embeds of the whole burst.
+
+    python bench_onboarding_embeds.py [joins]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from onboarding_embeds import (
+    OnboardingEmbeds, build_rules_embed, build_verification_embed, build_welcome_embed, welcome_description
+)
+
+IMAGE_URL = "https://example.com/welcome.png"
+
+class FakeMember:
+    def __init__(self, member_id):
+        self.mention = f"<@{member_id}>"
+
+def uncached_pages(member):
+    return [
+        build_welcome_embed(welcome_description(member), IMAGE_URL),
+        build_rules_embed(),
+        build_verification_embed(),
+    ]
+
+def cached_pages(member, embeds):
+    return [embeds.welcome(member), embeds.rules(), embeds.verification()]
+
+def measure(label, build_pages, members):
+    # CPU: build and serialize every page, as on_member_join and the buttons do
+    started = time.process_time()
+    for member in members:
+        for page in build_pages(member):
+            page.to_dict()
+    cpu = time.process_time() - started
+
+    # Memory: the embeds held by a burst of joins waiting to be sent
+    tracemalloc.start()
+    pending = [build_pages(member) for member in members]
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del pending
+
+    per_join_us = cpu / len(members) * 1e6
+    print(f"{label:>10}: {per_join_us:7.1f} us CPU/join, {held / len(members):7.0f} B held/pending join, "
+          f"{peak / 1024:9.1f} KiB peak")
+    return per_join_us
+
+def main():
+    joins = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    members = [FakeMember(10**17 + i) for i in range(joins)]
+    embeds = OnboardingEmbeds(IMAGE_URL)
+    print(f"Burst of {joins} joins, three onboarding pages each:")
+    uncached = measure("uncached", uncached_pages, members)
+    cached = measure("cached", lambda member: cached_pages(member, embeds), members)
+    print(f"Speedup: {uncached / cached:.1f}x ({embeds.builds} template builds)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Set-based helpers for writing many rows of the users and global_bans tables at once.
+
+Existing IDs are read in one query and diffed against the guild in memory; the
+remaining rows are written as multi-row statements, one transaction per chunk.
+"""
+
+from datetime import datetime, timezone
+
+BULK_CHUNK_SIZE = 1000
+
+def _chunks(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+def _insert_chunk(cursor, sql, chunk):
+    # mysql.connector turns an INSERT executemany into a single multi-row statement.
+    cursor.executemany(sql, chunk)
+    return cursor.rowcount
+
+async def load_user_ids(pool):
+    """
+    Returns the set of every discord_id already in the users table.
+    """
+    rows = await pool.fetchall("SELECT discord_id FROM users")
+    return {row[0] for row in rows}
+
+async def insert_new_users(pool, members, progress=None, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Inserts `members` as unverified users with INSERT IGNORE, committing once per chunk.
+    `progress(done, total)` is awaited after each chunk. Returns the number of rows inserted.
+    """
+    sql = """
+    INSERT IGNORE INTO users (discord_id, time_created, verify_status, username)
+    VALUES (%s, %s, %s, %s)
+    """
+    now = datetime.now(timezone.utc)
+    rows = [(member.id, now, 0, member.name) for member in members]
+    inserted = 0
+    done = 0
+    for chunk in _chunks(rows, chunk_size):
+        inserted += await pool.transaction(_insert_chunk, sql, chunk)
+        done += len(chunk)
+        if progress:
+            await progress(done, len(rows))
+    return inserted
+
+async def upsert_verified_users(pool, members, progress=None, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Marks every member verified with one INSERT ... ON DUPLICATE KEY UPDATE per chunk,
+    creating users rows for members who do not have one yet.
+    """
+    sql = """
+    INSERT INTO users (discord_id, time_created, verify_status, username)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE verify_status = VALUES(verify_status)
+    """
+    now = datetime.now(timezone.utc)
+    rows = [(member.id, now, 1, member.name) for member in members]
+    done = 0
+    for chunk in _chunks(rows, chunk_size):
+        await pool.transaction(_insert_chunk, sql, chunk)
+        done += len(chunk)
+        if progress:
+            await progress(done, len(rows))
+
+def write_global_bans(cursor, rows, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Writes (discord_id, banned_at, reason) rows and resets those users' verify_status
+    through `cursor`, as part of the caller's transaction.
+    """
+    for chunk in _chunks(rows, chunk_size):
+        cursor.executemany(
+            """
+            INSERT INTO global_bans (discord_id, banned_at, reason)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE banned_at = VALUES(banned_at), reason = VALUES(reason)
+            """,
+            chunk
+        )
+        placeholders = ", ".join(["%s"] * len(chunk))
+        cursor.execute(
+            f"UPDATE users SET verify_status = 0 WHERE discord_id IN ({placeholders})",
+            [row[0] for row in chunk]
+        )
+
+async def upsert_global_bans(pool, bans, banned_at, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Records (discord_id, reason) pairs in global_bans and resets those users'
+    verify_status, all in a single transaction.
+    """
+    rows = [(discord_id, banned_at, reason) for discord_id, reason in bans]
+    if rows:
+        await pool.transaction(write_global_bans, rows, chunk_size)
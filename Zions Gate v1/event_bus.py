@@ -0,0 +1,146 @@
+"""
+Status-change events shared between the Zions Gate and Zions Key processes.
+
+Whenever one bot bans, unbans, kicks or (un)verifies a user it appends a row to the
+status_events outbox table. Each process tails that table every `poll_interval`
+seconds and hands rows written by the other process to its subscribers, which update
+the in-memory caches and act in that bot's own guilds.
+
+Delivery is at-least-once. Auto-increment IDs can commit out of order, so every poll
+re-reads the last `lookback` IDs as well as anything newer; rows already delivered are
+skipped by ID. A process starts tailing from the newest row at boot, since its caches
+are loaded fresh from the database then. Rows older than EVENT_RETENTION_HOURS are
+pruned as the bus goes.
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EVENT_POLL_INTERVAL = float(os.getenv("event_poll_interval", "0.5"))
+EVENT_LOOKBACK = 200
+EVENT_BATCH_SIZE = 1000
+EVENT_RETENTION_HOURS = 24
+EVENT_PRUNE_EVERY = 7200
+
+@dataclass
+class StatusEvent:
+    id: int
+    origin: str
+    kind: str
+    discord_id: int
+    value: Optional[str]
+
+class EventBus:
+    def __init__(self, pool, origin, poll_interval=EVENT_POLL_INTERVAL, lookback=EVENT_LOOKBACK):
+        self.pool = pool
+        self.origin = origin
+        self.poll_interval = poll_interval
+        self.lookback = lookback
+        self._handlers = {}
+        self._last_id = 0
+        self._start_id = 0
+        self._delivered = set()
+        self._task = None
+        self.received = 0
+
+    @property
+    def start_id(self):
+        """
+        The newest event ID at boot; everything up to it is reflected in the database.
+        """
+        return self._start_id
+
+    @property
+    def delivered_through(self):
+        """
+        An event ID no newer than the oldest event that may still be undelivered.
+        """
+        return max(self._start_id, self._last_id - self.lookback)
+
+    def subscribe(self, kind, handler):
+        """
+        Registers `handler(event)` for events of `kind` published by other processes.
+        """
+        self._handlers.setdefault(kind, []).append(handler)
+
+    async def publish(self, kind, discord_id, value=None):
+        await self.publish_many(kind, [(discord_id, value)])
+
+    async def publish_many(self, kind, events):
+        """
+        Appends one event per (discord_id, value) pair in a single statement.
+        """
+        rows = [(self.origin, kind, discord_id, None if value is None else str(value)) for discord_id, value in events]
+        if rows:
+            await self.pool.executemany(
+                "INSERT INTO status_events (origin, kind, discord_id, value) VALUES (%s, %s, %s, %s)",
+                rows
+            )
+
+    def write_events(self, cursor, kind, events):
+        """
+        Like publish_many, but writes through `cursor` as part of the caller's transaction.
+        """
+        rows = [(self.origin, kind, discord_id, None if value is None else str(value)) for discord_id, value in events]
+        if rows:
+            cursor.executemany(
+                "INSERT INTO status_events (origin, kind, discord_id, value) VALUES (%s, %s, %s, %s)",
+                rows
+            )
+
+    async def start(self):
+        if self._task:
+            return
+        row = await self.pool.fetchone("SELECT COALESCE(MAX(id), 0) FROM status_events")
+        self._last_id = self._start_id = row[0]
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+
+    async def _run(self):
+        polls = 0
+        while True:
+            try:
+                await self._poll()
+                polls += 1
+                if polls % EVENT_PRUNE_EVERY == 0:
+                    await self.pool.execute(
+                        "DELETE FROM status_events WHERE created_at < NOW() - INTERVAL %s HOUR LIMIT 10000",
+                        (EVENT_RETENTION_HOURS,)
+                    )
+            except Exception as e:
+                print(f"Error polling status events: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _poll(self):
+        rows = await self.pool.fetchall(
+            """
+            SELECT id, origin, kind, discord_id, value FROM status_events
+            WHERE id > %s ORDER BY id LIMIT %s
+            """,
+            (max(0, self._last_id - self.lookback), EVENT_BATCH_SIZE + self.lookback)
+        )
+        for row in rows:
+            event = StatusEvent(*row)
+            if event.id <= self._start_id or event.id in self._delivered:
+                continue
+            self._delivered.add(event.id)
+            self._last_id = max(self._last_id, event.id)
+            if event.origin == self.origin:
+                continue
+            self.received += 1
+            for handler in self._handlers.get(event.kind, ()):
+                try:
+                    await handler(event)
+                except Exception as e:
+                    print(f"Error handling {event.kind} event {event.id}: {e}")
+        floor = self._last_id - self.lookback
+        self._delivered = {event_id for event_id in self._delivered if event_id > floor}
@@ -0,0 +1,299 @@
+"""
+MySQL-backed queue of per-guild moderation tasks.
+
+A moderation job (a global ban, kick or unban, verify_all, a startup sweep) is written
+as one moderation_jobs row plus one moderation_tasks row per guild or member it
+touches, and the slash command acknowledges as soon as those rows are committed. Each
+bot runs a worker loop that claims batches of its own due tasks with
+SELECT ... FOR UPDATE SKIP LOCKED, leases them, and runs them through the
+ModerationExecutor keyed by guild. Handlers must be idempotent: a task whose lease
+runs out (for instance because the bot restarted halfway through a job) is claimed
+and run again, and on boot the bot releases its own leases so unfinished jobs resume.
+
+Every task accumulates the time its action took and the time it spent parked on rate
+limits across attempts, so job_status() and the job-done summary can report a job's
+throughput, ETA and rate-limit waits like the commands that used to run inline.
+"""
+
+import asyncio
+import os
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from moderation import ModerationExecutor, format_progress, format_status_counts, format_wait_totals
+
+load_dotenv()
+
+JOB_BATCH_SIZE = int(os.getenv("job_batch_size", "200"))
+JOB_LEASE_SECONDS = int(os.getenv("job_lease_seconds", "300"))
+JOB_POLL_INTERVAL = float(os.getenv("job_poll_interval", "10"))
+JOB_MAX_ATTEMPTS = int(os.getenv("job_max_attempts", "5"))
+JOB_INSERT_CHUNK = 1000
+RETRY_STATUSES = ("error", "rate_limited")
+
+@dataclass
+class ModerationTask:
+    id: int
+    job_id: int
+    kind: str
+    guild_id: int
+    target_id: int
+    reason: Optional[str]
+    attempts: int
+
+def _insert_job(cursor, bot_id, kind, tasks, target_id, reason, requested_by):
+    cursor.execute(
+        """
+        INSERT INTO moderation_jobs (bot_id, kind, target_id, reason, requested_by, finished_at)
+        VALUES (%s, %s, %s, %s, %s, IF(%s, NULL, NOW()))
+        """,
+        (bot_id, kind, target_id, reason, requested_by, bool(tasks))
+    )
+    job_id = cursor.lastrowid
+    rows = [(job_id, bot_id, kind, guild_id, task_target) for guild_id, task_target in tasks]
+    for start in range(0, len(rows), JOB_INSERT_CHUNK):
+        cursor.executemany(
+            """
+            INSERT IGNORE INTO moderation_tasks (job_id, bot_id, kind, guild_id, target_id)
+            VALUES (%s, %s, %s, %s, %s)
+            """,
+            rows[start:start + JOB_INSERT_CHUNK]
+        )
+    return job_id
+
+def _claim(cursor, bot_id, limit, lease):
+    cursor.execute(
+        """
+        SELECT t.id, t.job_id, t.kind, t.guild_id, t.target_id, j.reason, t.attempts
+        FROM moderation_tasks t
+        JOIN moderation_jobs j ON j.id = t.job_id
+        WHERE t.bot_id = %s AND t.status IN ('pending', 'claimed') AND t.available_at <= NOW()
+        ORDER BY t.id
+        LIMIT %s
+        FOR UPDATE OF t SKIP LOCKED
+        """,
+        (bot_id, limit)
+    )
+    rows = cursor.fetchall()
+    if rows:
+        placeholders = ", ".join(["%s"] * len(rows))
+        cursor.execute(
+            f"""
+            UPDATE moderation_tasks
+            SET status = 'claimed', attempts = attempts + 1, available_at = NOW() + INTERVAL %s SECOND
+            WHERE id IN ({placeholders})
+            """,
+            (lease, *[row[0] for row in rows])
+        )
+    return [ModerationTask(*row[:6], attempts=row[6] + 1) for row in rows]
+
+def _record(cursor, finished, retries, job_ids):
+    if finished:
+        cursor.executemany(
+            """
+            UPDATE moderation_tasks
+            SET status = 'done', result = %s, error = %s, elapsed = elapsed + %s, waited = waited + %s
+            WHERE id = %s
+            """,
+            finished
+        )
+    if retries:
+        cursor.executemany(
+            """
+            UPDATE moderation_tasks
+            SET status = 'pending', error = %s, elapsed = elapsed + %s, waited = waited + %s,
+                available_at = NOW() + INTERVAL %s SECOND
+            WHERE id = %s
+            """,
+            retries
+        )
+    # Close out jobs whose last task just finished; the rowcount tells us who got there first
+    completed = []
+    for job_id in job_ids:
+        cursor.execute(
+            """
+            UPDATE moderation_jobs SET finished_at = NOW()
+            WHERE id = %s AND finished_at IS NULL
+              AND NOT EXISTS (SELECT 1 FROM moderation_tasks WHERE job_id = %s AND status <> 'done')
+            """,
+            (job_id, job_id)
+        )
+        if cursor.rowcount:
+            completed.append(job_id)
+    return completed
+
+def _tasks_done(counts):
+    return sum(count for status, count in counts.items() if status not in ("pending", "claimed"))
+
+def format_job_status(job_id, job, counts):
+    """
+    Formats a job_status() result as a short multi-line summary.
+    """
+    state = f"finished {job['finished_at']}" if job["finished_at"] else "in progress"
+    lines = [
+        f"Job #{job_id} ({job['kind']}, target {job['target_id']}): {state}.",
+        f"{format_progress(_tasks_done(counts), sum(counts.values()), job['runtime'])} tasks done: "
+        f"{format_status_counts(counts) or 'none'}.",
+        f"Actions took {job['work']:.1f}s, {format_wait_totals(job['waited'], job['longest_wait'])}.",
+    ]
+    if job["reason"]:
+        lines.append(f"Reason: {job['reason']}")
+    return "\n".join(lines)
+
+def format_job_summary(job_id, job, counts):
+    """
+    Formats a finished job as the one-line summary the bots log.
+    """
+    done = _tasks_done(counts)
+    rate = done / job["runtime"] if job["runtime"] > 0 else 0.0
+    return (
+        f"Moderation job #{job_id} ({job['kind']}) finished {done} tasks in {job['runtime']:.0f}s "
+        f"({rate:.1f}/s): {format_status_counts(counts) or 'none'}; "
+        f"{format_wait_totals(job['waited'], job['longest_wait'])}."
+    )
+
+class JobQueue:
+    def __init__(self, pool, bot_id, batch_size=JOB_BATCH_SIZE, lease=JOB_LEASE_SECONDS,
+                 poll_interval=JOB_POLL_INTERVAL, max_attempts=JOB_MAX_ATTEMPTS, executor=None):
+        self.pool = pool
+        self.bot_id = bot_id
+        self.batch_size = batch_size
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.executor = executor or ModerationExecutor()
+        # Awaited as on_job_done(job_id, job, counts) once every task of a job has finished
+        self.on_job_done = None
+        self._handlers = {}
+        self._wakeup = asyncio.Event()
+        self._worker = None
+
+    def register(self, kind, handler):
+        """
+        Registers `handler(task)` for tasks of `kind`. It returns a status string like a
+        ModerationExecutor action and must be safe to run more than once.
+        """
+        self._handlers[kind] = handler
+
+    async def enqueue(self, kind, tasks, target_id=None, reason=None, requested_by=None):
+        """
+        Writes a job and its (guild_id, target_id) tasks in one transaction and returns the job ID.
+        """
+        tasks = list(tasks)
+        job_id = await self.pool.transaction(_insert_job, self.bot_id, kind, tasks, target_id, reason, requested_by)
+        self.notify()
+        return job_id
+
+    def write_job(self, cursor, kind, tasks, target_id=None, reason=None, requested_by=None):
+        """
+        Like enqueue, but writes through `cursor` as part of the caller's transaction.
+        Call notify() once that transaction has committed.
+        """
+        return _insert_job(cursor, self.bot_id, kind, list(tasks), target_id, reason, requested_by)
+
+    def notify(self):
+        self._wakeup.set()
+
+    async def job_status(self, job_id):
+        """
+        Returns the job's row and a Counter of its task outcomes, or None if there is no such job.
+        The row also carries `runtime` (seconds since the job was created, up to when it
+        finished), `work` (seconds its actions took), and `waited` and `longest_wait`
+        (seconds its tasks spent parked on rate limits).
+        """
+        job = await self.pool.fetchone(
+            """
+            SELECT j.kind, j.target_id, j.reason, j.requested_by, j.created_at, j.finished_at,
+                   TIMESTAMPDIFF(SECOND, j.created_at, COALESCE(j.finished_at, NOW())),
+                   COALESCE(SUM(t.elapsed), 0), COALESCE(SUM(t.waited), 0), COALESCE(MAX(t.waited), 0)
+            FROM moderation_jobs j
+            LEFT JOIN moderation_tasks t ON t.job_id = j.id
+            WHERE j.id = %s
+            GROUP BY j.id
+            """,
+            (job_id,)
+        )
+        if job is None:
+            return None
+        rows = await self.pool.fetchall(
+            """
+            SELECT IF(status = 'done', result, status), COUNT(*)
+            FROM moderation_tasks WHERE job_id = %s GROUP BY 1
+            """,
+            (job_id,)
+        )
+        keys = ("kind", "target_id", "reason", "requested_by", "created_at", "finished_at",
+                "runtime", "work", "waited", "longest_wait")
+        job = dict(zip(keys, job))
+        for key in ("runtime", "work", "waited", "longest_wait"):
+            job[key] = float(job[key])
+        return job, Counter({status: count for status, count in rows})
+
+    async def start(self):
+        """
+        Releases leases left by a previous run of this bot and starts the worker loop.
+        """
+        if self._worker:
+            return
+        released = await self.pool.execute(
+            "UPDATE moderation_tasks SET available_at = NOW() WHERE bot_id = %s AND status = 'claimed'",
+            (self.bot_id,)
+        )
+        if released:
+            print(f"Resuming {released} moderation tasks left unfinished by the last run.")
+        self._worker = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._worker:
+            self._worker.cancel()
+
+    async def _dispatch(self, task):
+        handler = self._handlers.get(task.kind)
+        if handler is None:
+            return "unknown_kind"
+        return await handler(task)
+
+    async def _run(self):
+        while True:
+            try:
+                tasks = await self.pool.transaction(_claim, self.bot_id, self.batch_size, self.lease)
+            except Exception as e:
+                print(f"Error claiming moderation tasks: {e}")
+                tasks = []
+            if not tasks:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run_batch(tasks)
+            except Exception as e:
+                # The leases lapse and the batch is claimed again
+                print(f"Error running moderation tasks: {e}")
+
+    async def _run_batch(self, tasks):
+        report = await self.executor.run(tasks, self._dispatch, key=lambda task: task.guild_id)
+        finished, retries = [], []
+        for result in report.results:
+            task = result.item
+            error = str(result.error)[:255] if result.error else None
+            if result.error:
+                print(f"Moderation task {task.kind} in guild {task.guild_id} for {task.target_id} failed: {result.error}")
+            if result.status in RETRY_STATUSES and task.attempts < self.max_attempts:
+                retries.append((error, result.elapsed, result.waited, min(5 * 2 ** task.attempts, 600), task.id))
+            else:
+                finished.append((result.status, error, result.elapsed, result.waited, task.id))
+        job_ids = sorted({task.job_id for task in tasks})
+        completed = await self.pool.transaction(_record, finished, retries, job_ids)
+        if self.on_job_done:
+            for job_id in completed:
+                try:
+                    job, counts = await self.job_status(job_id)
+                    await self.on_job_done(job_id, job, counts)
+                except Exception as e:
+                    print(f"Error reporting finished moderation job {job_id}: {e}")
@@ -0,0 +1,52 @@
+"""
+One lookup for everything on_member_join needs to decide what to do with a member.
+
+A JoinDecision carries the global ban status and reason and the users.verify_status.
+When the ban index is loaded and the verification cache holds the user, it is answered
+from memory. Otherwise a single query reads both tables by primary/unique key, instead
+of loading the whole ban index and then querying users, and its result warms the
+verification cache.
+
+bench_join_check.py compares this with the two-query join check it replaces.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from ban_index import ban_index
+from verify_cache import verify_cache
+
+JOIN_DECISION_SQL = """
+SELECT u.verify_status, b.discord_id IS NOT NULL, b.reason
+FROM (SELECT %s AS discord_id) AS joined
+LEFT JOIN users u ON u.discord_id = joined.discord_id
+LEFT JOIN global_bans b ON b.discord_id = joined.discord_id
+"""
+
+@dataclass(frozen=True)
+class JoinDecision:
+    banned: bool
+    reason: Optional[str]
+    # None when the user has no users row
+    verify_status: Optional[int]
+    cached: bool = False
+
+    @property
+    def verified(self):
+        return self.verify_status == 1
+
+async def join_decision(pool, discord_id):
+    """
+    Returns the JoinDecision for a member, reading the database at most once.
+    """
+    cached, status = verify_cache.peek(discord_id)
+    if cached and ban_index.loaded:
+        return JoinDecision(discord_id in ban_index, ban_index.reason(discord_id), status, cached=True)
+
+    status, banned, reason = await pool.fetchone(JOIN_DECISION_SQL, (discord_id,))
+    verify_cache.put(discord_id, status)
+    if ban_index.loaded:
+        # The index also reflects bans and unbans this process has made but that the
+        # refresh has not read back yet
+        banned, reason = discord_id in ban_index, ban_index.reason(discord_id)
+    return JoinDecision(bool(banned), reason, status)
@@ -0,0 +1,122 @@
+"""
+Runs Zions Key as several shard clusters, one OS process each.
+
+The shard count comes from the `shard_count` env variable, or from Discord's
+recommendation for the bot token when it is unset. Shards are split into
+`cluster_count` contiguous ranges (default: one per CPU core) and each range is started
+as `Zions_Key.py` with shard_ids/shard_count/cluster_id set in its environment.
+Clusters share state through MySQL: the ban index and verification cache are loaded
+from it, changes travel through the status event bus and each cluster runs its own
+moderation job queue for the guilds it owns. A cluster that exits is restarted with
+exponential backoff; SIGINT/SIGTERM stop them all.
+
+    python launcher.py
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import requests
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ZIONS_KEY_BOT_TOKEN = os.getenv("zions_key_bot_token")
+SHARD_COUNT = int(os.getenv("shard_count", "0"))
+CLUSTER_COUNT = int(os.getenv("cluster_count", str(os.cpu_count() or 1)))
+MAX_RESTART_BACKOFF = 300
+BOT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Zions_Key.py")
+
+def recommended_shard_count(token):
+    response = requests.get(
+        "https://discord.com/api/v10/gateway/bot",
+        headers={"Authorization": f"Bot {token}"},
+        timeout=10
+    )
+    response.raise_for_status()
+    return response.json()["shards"]
+
+def split_shards(shard_count, cluster_count):
+    """
+    Splits shard IDs 0..shard_count-1 into at most cluster_count contiguous, non-empty ranges.
+    """
+    cluster_count = max(1, min(cluster_count, shard_count))
+    return [list(range(i * shard_count // cluster_count, (i + 1) * shard_count // cluster_count)) for i in range(cluster_count)]
+
+class Cluster:
+    def __init__(self, cluster_id, shard_ids, shard_count):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.process = None
+        self.restarts = 0
+        self.restart_at = 0.0
+        self.started_at = 0.0
+
+    def start(self):
+        env = dict(os.environ)
+        env["shard_ids"] = ",".join(str(shard_id) for shard_id in self.shard_ids)
+        env["shard_count"] = str(self.shard_count)
+        env["cluster_id"] = str(self.cluster_id)
+        self.process = subprocess.Popen([sys.executable, BOT_SCRIPT], env=env)
+        self.started_at = time.monotonic()
+        print(f"Started cluster {self.cluster_id} (shards {self.shard_ids[0]}-{self.shard_ids[-1]}) as PID {self.process.pid}.")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+
+def main():
+    if not ZIONS_KEY_BOT_TOKEN:
+        print("Error: 'zions_key_bot_token' is not set.")
+        return 1
+    shard_count = SHARD_COUNT or recommended_shard_count(ZIONS_KEY_BOT_TOKEN)
+    clusters = [Cluster(cluster_id, shard_ids, shard_count) for cluster_id, shard_ids in enumerate(split_shards(shard_count, CLUSTER_COUNT))]
+    print(f"Running {shard_count} shards in {len(clusters)} clusters.")
+
+    stopping = False
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    for cluster in clusters:
+        cluster.start()
+        # Staggered so the clusters do not all IDENTIFY at once
+        time.sleep(5)
+    while not stopping:
+        now = time.monotonic()
+        for cluster in clusters:
+            code = cluster.process.poll() if cluster.process else None
+            if cluster.process and code is not None:
+                # A cluster that stayed up for a while starts over at the shortest backoff
+                if now - cluster.started_at > MAX_RESTART_BACKOFF:
+                    cluster.restarts = 0
+                delay = min(5 * 2 ** cluster.restarts, MAX_RESTART_BACKOFF)
+                print(f"Cluster {cluster.cluster_id} exited with code {code}; restarting in {delay}s.")
+                cluster.process = None
+                cluster.restarts += 1
+                cluster.restart_at = now + delay
+            elif cluster.process is None and now >= cluster.restart_at:
+                cluster.start()
+        time.sleep(1)
+
+    print("Stopping clusters...")
+    for cluster in clusters:
+        cluster.stop()
+    for cluster in clusters:
+        if cluster.process:
+            try:
+                cluster.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                cluster.process.kill()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
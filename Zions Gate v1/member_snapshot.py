@@ -0,0 +1,120 @@
+"""
+Per-guild snapshots of the member IDs a bot has already swept, for incremental startup.
+
+A snapshot is the guild's member IDs as a sorted array('Q'), delta-encoded and
+zlib-compressed into the member_snapshots table, together with the status_events ID
+everything up to which had been applied when it was taken. On boot only two groups of
+members need checking against the ban index and the verification cache:
+
+    members who joined since the snapshot  (current members not in the sorted array)
+    users with a status event since it     (bans, unbans, kicks, verifications)
+
+A guild is swept in full when it has no snapshot yet, or when its snapshot is older
+than the event retention window, since the events it would need may have been pruned.
+"""
+
+import os
+import zlib
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from itertools import accumulate
+
+from dotenv import load_dotenv
+
+from event_bus import EVENT_RETENTION_HOURS
+
+load_dotenv()
+
+MEMBER_SNAPSHOT_INTERVAL = float(os.getenv("member_snapshot_interval_minutes", "30"))
+
+@dataclass
+class MemberSnapshot:
+    member_ids: array
+    event_id: int
+    age_hours: float
+
+    @property
+    def usable(self):
+        return self.age_hours < EVENT_RETENTION_HOURS
+
+def pack(member_ids):
+    ids = sorted(member_ids)
+    deltas = array("Q", (b - a for a, b in zip([0] + ids, ids)))
+    return zlib.compress(deltas.tobytes(), 1)
+
+def unpack(blob):
+    deltas = array("Q")
+    deltas.frombytes(zlib.decompress(blob))
+    return array("Q", accumulate(deltas))
+
+def joined_since(snapshot_ids, member_ids):
+    """
+    Returns the IDs in member_ids that are not in the sorted snapshot array.
+    """
+    size = len(snapshot_ids)
+    joined = []
+    for member_id in member_ids:
+        index = bisect_left(snapshot_ids, member_id)
+        if index == size or snapshot_ids[index] != member_id:
+            joined.append(member_id)
+    return joined
+
+async def load_snapshots(pool, bot_id):
+    """
+    Returns {guild_id: MemberSnapshot} for every guild the bot has a snapshot of.
+    """
+    rows = await pool.fetchall(
+        """
+        SELECT guild_id, member_ids, event_id, TIMESTAMPDIFF(SECOND, updated_at, NOW()) / 3600
+        FROM member_snapshots WHERE bot_id = %s
+        """,
+        (bot_id,)
+    )
+    return {guild_id: MemberSnapshot(unpack(blob), event_id, float(age)) for guild_id, blob, event_id, age in rows}
+
+async def save_snapshots(pool, bot_id, guilds, event_id):
+    """
+    Stores every guild's current members as swept up to status event `event_id`.
+    """
+    # One guild per statement, since a large guild's blob can approach max_allowed_packet
+    for guild in guilds:
+        member_ids = [member.id for member in guild.members]
+        await pool.execute(
+            """
+            INSERT INTO member_snapshots (bot_id, guild_id, member_ids, member_count, event_id, updated_at)
+            VALUES (%s, %s, %s, %s, %s, NOW())
+            ON DUPLICATE KEY UPDATE member_ids = VALUES(member_ids), member_count = VALUES(member_count),
+                event_id = VALUES(event_id), updated_at = NOW()
+            """,
+            (bot_id, guild.id, pack(member_ids), len(member_ids), event_id)
+        )
+
+async def changed_since(pool, event_id):
+    """
+    Returns {discord_id: newest status event ID} for users with an event after event_id.
+    """
+    rows = await pool.fetchall(
+        "SELECT discord_id, MAX(id) FROM status_events WHERE id > %s GROUP BY discord_id",
+        (event_id,)
+    )
+    return dict(rows)
+
+async def sweep_candidates(pool, bot_id, guilds):
+    """
+    Returns ({guild_id: members to check}, number of guilds swept in full).
+    """
+    snapshots = await load_snapshots(pool, bot_id)
+    usable = [snapshot for snapshot in snapshots.values() if snapshot.usable]
+    changed = await changed_since(pool, min(snapshot.event_id for snapshot in usable)) if usable else {}
+    candidates, full = {}, 0
+    for guild in guilds:
+        snapshot = snapshots.get(guild.id)
+        if snapshot is None or not snapshot.usable:
+            candidates[guild.id] = list(guild.members)
+            full += 1
+            continue
+        member_ids = set(joined_since(snapshot.member_ids, [member.id for member in guild.members]))
+        member_ids.update(user_id for user_id, last_event in changed.items() if last_event > snapshot.event_id)
+        candidates[guild.id] = [member for member in map(guild.get_member, member_ids) if member is not None]
+    return candidates, full
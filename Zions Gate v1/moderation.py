@@ -0,0 +1,211 @@
+"""
+Concurrency-limited executor for bulk Discord moderation actions.
+
+Items are handed to a fixed pool of workers. Discord rate-limits most moderation
+routes per guild, so on top of the global concurrency limit no more than `per_key`
+actions sharing a key (normally the guild ID) are in flight at once; discord.py then
+spends that guild's bucket as fast as its X-RateLimit-* headers allow, with no fixed
+sleeps. When a bucket needs a longer wait than the bot's `max_ratelimit_timeout`,
+discord.py raises RateLimited instead of blocking; the executor parks that key until
+the bucket resets and keeps working through other keys in the meantime. Every result
+records how long its action spent parked.
+"""
+
+import asyncio
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import discord
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MODERATION_CONCURRENCY = int(os.getenv("moderation_concurrency", "8"))
+MODERATION_PER_GUILD_CONCURRENCY = int(os.getenv("moderation_per_guild_concurrency", "4"))
+MAX_RATE_LIMIT_RETRIES = int(os.getenv("moderation_rate_limit_retries", "5"))
+# The smallest timeout discord.py accepts; longer bucket waits surface as RateLimited
+MAX_RATELIMIT_TIMEOUT = 30.0
+PROGRESS_INTERVAL = 5.0
+FAILED_STATUSES = ("forbidden", "not_found", "rate_limited", "error")
+
+@dataclass
+class ActionResult:
+    item: Any
+    key: Any
+    status: str
+    error: Optional[BaseException] = None
+    elapsed: float = 0.0
+    waited: float = 0.0
+
+@dataclass
+class RunReport:
+    results: list = field(default_factory=list)
+    duration: float = 0.0
+
+    def counts(self):
+        return Counter(result.status for result in self.results)
+
+    @property
+    def throughput(self):
+        return len(self.results) / self.duration if self.duration > 0 else 0.0
+
+    @property
+    def rate_limit_wait(self):
+        return sum(result.waited for result in self.results)
+
+    @property
+    def max_rate_limit_wait(self):
+        return max((result.waited for result in self.results), default=0.0)
+
+def format_progress(done, total, elapsed):
+    """
+    Formats progress as 'done/total (rate/s, ETA ...)'.
+    """
+    rate = done / elapsed if elapsed > 0 else 0.0
+    if rate > 0 and done < total:
+        eta = f"ETA {(total - done) / rate:.0f}s"
+    elif done >= total:
+        eta = "done"
+    else:
+        eta = "ETA unknown"
+    return f"{done}/{total} ({rate:.1f}/s, {eta})"
+
+def format_status_counts(counts):
+    """
+    Formats a Counter of statuses as 'n status, ...', most common first.
+    """
+    return ", ".join(f"{count} {status.replace('_', ' ')}" for status, count in counts.most_common())
+
+def format_counts(report):
+    return format_status_counts(report.counts())
+
+def format_wait_totals(total, longest):
+    """
+    Formats a total and longest time spent parked on rate limits.
+    """
+    if not total:
+        return "no rate-limit waits"
+    return f"{total:.1f}s parked on rate limits (longest {longest:.1f}s)"
+
+def format_waits(report):
+    """
+    Formats how long the report's actions spent parked on rate limits.
+    """
+    return format_wait_totals(report.rate_limit_wait, report.max_rate_limit_wait)
+
+def describe_failures(report, describe=str, limit=10):
+    """
+    Returns one line per failed item (at most `limit`) for a command's final summary.
+    """
+    failed = [result for result in report.results if result.status in FAILED_STATUSES]
+    lines = [f"{describe(result.item)}: {result.status.replace('_', ' ')}" for result in failed[:limit]]
+    if len(failed) > limit:
+        lines.append(f"...and {len(failed) - limit} more")
+    return lines
+
+def progress_editor(message, label):
+    """
+    Returns a progress callback that keeps `message` updated with '<label>... done/total ...'.
+    """
+    async def report_progress(done, total, elapsed):
+        await message.edit(content=f"{label}... {format_progress(done, total, elapsed)}")
+    return report_progress
+
+def _classify(error):
+    if isinstance(error, discord.Forbidden):
+        return "forbidden"
+    if isinstance(error, discord.NotFound):
+        return "not_found"
+    return "error"
+
+class ModerationExecutor:
+    def __init__(self, concurrency=MODERATION_CONCURRENCY, per_key=MODERATION_PER_GUILD_CONCURRENCY,
+                 progress_interval=PROGRESS_INTERVAL, max_retries=MAX_RATE_LIMIT_RETRIES):
+        self.concurrency = concurrency
+        self.per_key = per_key
+        self.progress_interval = progress_interval
+        self.max_retries = max_retries
+
+    async def run(self, items, action, key=None, progress=None):
+        """
+        Awaits `action(item)` for every item and returns a RunReport.
+
+        `action` may return a status string (None counts as "ok"); exceptions are caught
+        and recorded as "forbidden", "not_found" or "error". `key(item)` groups items
+        that share a rate-limit bucket. An action that raises RateLimited is retried
+        once its key's bucket resets, up to `max_retries` times before it is recorded as
+        "rate_limited". `progress(done, total, elapsed)` is awaited every
+        `progress_interval` seconds while the run is in flight.
+        """
+        items = list(items)
+        report = RunReport()
+        if not items:
+            return report
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        # (item, attempts so far, seconds spent parked)
+        for item in items:
+            queue.put_nowait((item, 0, 0.0))
+        key_slots = {}
+        parked_until = {}
+        finished = asyncio.Event()
+        started = time.monotonic()
+
+        def park(entry, delay):
+            loop.call_later(delay, queue.put_nowait, entry)
+
+        async def worker():
+            while True:
+                item, attempts, waited = await queue.get()
+                item_key = key(item) if key else None
+                delay = parked_until.get(item_key, 0.0) - time.monotonic()
+                if delay > 0:
+                    # The bucket is still exhausted; come back once it resets
+                    park((item, attempts, waited + delay), delay)
+                    continue
+                slot = key_slots.setdefault(item_key, asyncio.Semaphore(self.per_key))
+                async with slot:
+                    action_started = time.monotonic()
+                    try:
+                        status = await action(item) or "ok"
+                        error = None
+                    except discord.RateLimited as e:
+                        if attempts < self.max_retries:
+                            parked_until[item_key] = max(parked_until.get(item_key, 0.0), time.monotonic() + e.retry_after)
+                            park((item, attempts + 1, waited + e.retry_after), e.retry_after)
+                            continue
+                        status, error = "rate_limited", e
+                    except Exception as e:
+                        status, error = _classify(e), e
+                report.results.append(ActionResult(item, item_key, status, error, time.monotonic() - action_started, waited))
+                if len(report.results) == len(items):
+                    finished.set()
+
+        async def reporter():
+            while True:
+                await asyncio.sleep(self.progress_interval)
+                try:
+                    await progress(len(report.results), len(items), time.monotonic() - started)
+                except Exception as e:
+                    print(f"Error reporting moderation progress: {e}")
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.concurrency, len(items)))]
+        reporter_task = asyncio.create_task(reporter()) if progress else None
+        waiter = asyncio.create_task(finished.wait())
+        try:
+            done, _ = await asyncio.wait([waiter, *workers], return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                # Workers only finish early by raising; surface that instead of hanging
+                if task is not waiter:
+                    task.result()
+        finally:
+            for task in [waiter, *workers]:
+                task.cancel()
+            if reporter_task:
+                reporter_task.cancel()
+        report.duration = time.monotonic() - started
+        return report
@@ -0,0 +1,168 @@
+"""
+Onboarding embeds for the Zions Gate server, built once and reused.
+
+Each page's payload (the dict discord.py sends) is built the first time it is needed
+and kept. Every call then returns a regular discord.Embed made with Embed.from_dict
+from a copy of that payload, with the member mention patched into the welcome page's
+description, instead of building the page field by field. Like Embed.copy(), the copy
+has its own field list, so adding or removing fields never touches the cache. The
+cached payloads are rebuilt when the welcome image URL changes (set_image_url).
+
+bench_onboarding_embeds.py compares this with building every page from scratch.
+"""
+
+import os
+
+import discord
+from dotenv import load_dotenv
+
+load_dotenv()
+
+WELCOME_DESCRIPTION_TAIL = (
+    ", and welcome to **Zions Gate**, your gateway to a network of inspiring "
+    "and faith-filled communities centered on **The Church of Jesus Christ of Latter-day Saints**.\n\n"
+    "We are thrilled to have you here! This server is the first step into a larger, vibrant network where "
+    "members and friends of the Church can explore gospel truths, build uplifting connections, and strengthen "
+    "their testimony of Jesus Christ."
+)
+
+def welcome_description(member):
+    return "Hello, " + member.mention + WELCOME_DESCRIPTION_TAIL
+
+def build_welcome_embed(description, image_url):
+    embed = discord.Embed(
+        title="Welcome to the Zions Gate Server!",
+        description=description,
+        color=0x1E90FF
+    )
+    embed.add_field(
+        name="🌟 A Place of Connection and Growth:",
+        value=(
+            "Here at Zions Gate, you are stepping into a virtual gateway that connects you to an array of communities "
+            "designed to inspire, uplift, and strengthen your testimony. You’ll find spaces where Saints gather to study "
+            "the word of God, share their testimonies, and help one another walk the covenant path."
+        ),
+        inline=False
+    )
+    embed.add_field(
+        name="✨ A Spiritual Thought:",
+        value=(
+            "*\"And now, my beloved brethren, after ye have gotten into this straight and narrow path, I would ask if all is done? "
+            "Behold, I say unto you, Nay; ... relying wholly upon the merits of him who is mighty to save.\"*\n"
+            "– **2 Nephi 31:19**\n\n"
+            "As we press forward with faith, the Savior walks with us."
+        ),
+        inline=False
+    )
+    embed.add_field(
+        name="💡 Why This Community Matters:",
+        value=(
+            "- **Fellowship**: Meet others who share your beliefs.\n"
+            "- **Learning**: Discussions deepen understanding.\n"
+            "- **Service**: Uplifting activities strengthen communities.\n"
+            "- **Growth**: Every interaction builds testimony."
+        ),
+        inline=False
+    )
+    embed.set_footer(text="Welcome to Zions Gate! It’s a gateway to Zion. 💙")
+    if image_url:
+        embed.set_image(url=image_url)
+    return embed
+
+def build_rules_embed():
+    embed = discord.Embed(
+        title="📜 Global Server Rules",
+        description="Please read and follow all the rules below for a friendly and welcoming environment.",
+        color=0x1ABC9C
+    )
+    rules = [
+        ("1️⃣ No Harassment or Hate Speech", "Treat all with respect."),
+        ("2️⃣ No Spamming", "Avoid repetitive spam."),
+        ("3️⃣ No NSFW Outside NSFW Areas", "Keep adult content in 18+ areas."),
+        ("4️⃣ Follow Discord’s Guidelines", "No illegal activities/hacking."),
+        ("5️⃣ No Impersonation", "Be yourself, no impersonation."),
+        ("6️⃣ No Doxxing", "Don't share personal info without consent."),
+        ("7️⃣ No Unauthorized Promotion", "Promote content only if allowed."),
+        ("8️⃣ Respect Channels", "Stay on-topic."),
+        ("9️⃣ No Malicious Exploits", "No bots/scripts to exploit."),
+        ("🔟 Appropriate Usernames/Avatars", "Keep them suitable."),
+        ("⚖️ Enforcement", "Penalties increase for repeated offenses."),
+        ("📌 Disclaimer", "Rules may change at any time.")
+    ]
+    for name, value in rules:
+        embed.add_field(name=name, value=value, inline=False)
+    embed.set_footer(text="Thank you for being part of our community!")
+    return embed
+
+def build_verification_embed():
+    embed = discord.Embed(
+        title="Verification Process",
+        description=(
+            "Thank you for agreeing to the rules. Before you can access our servers, we need you to take one more step "
+            "by answering a few verification questions. These questions are not meant to challenge you, but to get a "
+            "sense of what you know. If you don’t know something, feel free to say so—you may be asked a few follow-up "
+            "questions. We appreciate your time and patience; we wouldn’t ask if it wasn’t necessary.\n\n"
+            "Click **Get Verified** below to open a private verification channel."
+        ),
+        color=0x1E90FF
+    )
+    embed.set_footer(text="We appreciate your patience.")
+    return embed
+
+class OnboardingEmbeds:
+    def __init__(self, image_url=""):
+        self.image_url = image_url
+        self._payloads = {}
+        self.builds = 0
+
+    def set_image_url(self, image_url):
+        """
+        Changes the welcome image; the cached pages are rebuilt on next use if it differs.
+        """
+        if image_url != self.image_url:
+            self.image_url = image_url
+            self.invalidate()
+
+    def invalidate(self):
+        self._payloads = {}
+
+    def _payload(self, page):
+        payload = self._payloads.get(page)
+        if payload is None:
+            if page == "welcome":
+                embed = build_welcome_embed(None, self.image_url)
+            elif page == "rules":
+                embed = build_rules_embed()
+            else:
+                embed = build_verification_embed()
+            payload = self._payloads[page] = embed.to_dict()
+            self.builds += 1
+        return payload
+
+    def _embed(self, page, description=None):
+        data = dict(self._payload(page))
+        if "fields" in data:
+            data["fields"] = list(data["fields"])
+        if description is not None:
+            data["description"] = description
+        return discord.Embed.from_dict(data)
+
+    def welcome(self, member):
+        return self._embed("welcome", welcome_description(member))
+
+    def rules(self):
+        return self._embed("rules")
+
+    def verification(self):
+        return self._embed("verification")
+
+onboarding_embeds = OnboardingEmbeds(os.getenv("zions_gate_welcome_img_url", ""))
+
+def create_page1_embed(member):
+    return onboarding_embeds.welcome(member)
+
+def create_rules_page2_embed():
+    return onboarding_embeds.rules()
+
+def create_verification_page3_embed():
+    return onboarding_embeds.verification()
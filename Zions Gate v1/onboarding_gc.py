@@ -0,0 +1,177 @@
+"""
+Garbage collection of abandoned onboarding and verification channels.
+
+Channels are normally deleted by /verify. A session is stale when its member has left
+the guild, or when it has seen no activity for `max_age_hours` (abandoned). Candidates
+come from one query on the indexed onboarding_sessions.updated_at and are checked
+against a set of the guild's member IDs built once per run. Onboarding channels that no
+session points at (orphans, e.g. verification channels from before their IDs were
+stored) are collected under the same rules: when the member they were opened for, read
+from the channel's member overwrites or the thread's members, has left, or when the
+channel is older than `max_age_hours`. Deletes go through the ModerationExecutor, so they are paced by the
+guild's rate-limit bucket, and the sessions of everything that was reclaimed are
+purged in one statement.
+"""
+
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+
+import discord
+from dotenv import load_dotenv
+
+from moderation import ModerationExecutor, format_status_counts
+
+load_dotenv()
+
+ONBOARDING_GC_INTERVAL = float(os.getenv("onboarding_gc_interval_minutes", "30"))
+ONBOARDING_SESSION_MAX_AGE = float(os.getenv("onboarding_session_max_age_hours", "168"))
+# Sessions and channels younger than this are never touched, so a member who is still
+# being onboarded cannot race the collector
+ONBOARDING_GC_GRACE_MINUTES = 10
+SESSION_PURGE_CHUNK = 1000
+
+@dataclass
+class StaleSession:
+    user_id: Optional[int]
+    reason: str
+    channel_ids: list = field(default_factory=list)
+
+def format_gc_report(stale, report=None, limit=10):
+    """
+    Summarizes a collection run: stale sessions by reason and, after a real run, the deletes.
+    """
+    reasons = Counter(session.reason for session in stale)
+    channels = sum(len(session.channel_ids) for session in stale)
+    lines = [f"{len(stale)} stale ({format_status_counts(reasons) or 'none'}), {channels} channels."]
+    for session in stale[:limit]:
+        who = f"<@{session.user_id}>" if session.user_id else "no session"
+        lines.append(f"{who}: {session.reason}, channels {', '.join(f'<#{channel_id}>' for channel_id in session.channel_ids) or 'none'}")
+    if len(stale) > limit:
+        lines.append(f"...and {len(stale) - limit} more")
+    if report is not None:
+        lines.append(f"Deleted: {format_status_counts(report.counts()) or 'nothing to do'}.")
+    return lines
+
+class OnboardingCollector:
+    def __init__(self, pool, executor=None, max_age_hours=ONBOARDING_SESSION_MAX_AGE,
+                 grace_minutes=ONBOARDING_GC_GRACE_MINUTES):
+        self.pool = pool
+        self.executor = executor or ModerationExecutor()
+        self.max_age_hours = max_age_hours
+        self.grace_minutes = grace_minutes
+        self.runs = 0
+        self.channels_reclaimed = 0
+        self.sessions_purged = 0
+        self.failures = 0
+
+    async def find(self, guild, spaces=(), tracked_ids=()):
+        """
+        Returns the guild's stale sessions, plus one StaleSession per orphaned channel among
+        `spaces` (onboarding channels or threads) whose ID is not in `tracked_ids`.
+        """
+        rows = await self.pool.fetchall(
+            """
+            SELECT user_id, onboarding_channel_id, verification_channel_id,
+                   updated_at < NOW() - INTERVAL %s HOUR
+            FROM onboarding_sessions
+            WHERE updated_at < NOW() - INTERVAL %s MINUTE
+            """,
+            (self.max_age_hours, self.grace_minutes)
+        )
+        member_ids = {member.id for member in guild.members}
+        stale = []
+        for user_id, onboarding_id, verification_id, expired in rows:
+            if user_id not in member_ids:
+                reason = "left"
+            elif expired:
+                reason = "abandoned"
+            else:
+                continue
+            stale.append(StaleSession(user_id, reason, [channel_id for channel_id in (onboarding_id, verification_id) if channel_id]))
+
+        tracked_ids = set(tracked_ids)
+        now = discord.utils.utcnow().timestamp()
+        for space in spaces:
+            age = now - space.created_at.timestamp()
+            if space.id in tracked_ids or age < self.grace_minutes * 60:
+                continue
+            if age >= self.max_age_hours * 3600:
+                reason = "orphan_abandoned"
+            else:
+                owners = await self._space_member_ids(guild, space)
+                # Unknown owners are left alone until the channel is old enough
+                if not owners or owners & member_ids:
+                    continue
+                reason = "orphan_left"
+            stale.append(StaleSession(None, reason, [space.id]))
+        return stale
+
+    async def _space_member_ids(self, guild, space):
+        """
+        Returns the IDs of the members a channel was opened for (its member overwrites)
+        or who are in a thread, not counting the bot.
+        """
+        if isinstance(space, discord.Thread):
+            members = space.members
+            if not members:
+                try:
+                    members = await space.fetch_members()
+                except discord.HTTPException as e:
+                    print(f"Error reading members of thread {space.id}: {e}")
+                    return set()
+            ids = {member.id for member in members}
+        else:
+            # Members who left show up as Objects typed as Member
+            ids = {
+                target.id for target in space.overwrites
+                if isinstance(target, discord.Member) or getattr(target, "type", None) is discord.Member
+            }
+        ids.discard(guild.me.id)
+        return ids
+
+    async def collect(self, guild, spaces=(), tracked_ids=(), dry_run=False, progress=None):
+        """
+        Finds stale sessions and, unless `dry_run`, deletes their channels and purges them.
+        Returns (stale sessions, RunReport or None, purged user IDs).
+        """
+        stale = await self.find(guild, spaces, tracked_ids)
+        self.runs += 1
+        if dry_run or not stale:
+            return stale, None, []
+
+        async def delete_channel(item):
+            session, channel_id = item
+            space = guild.get_channel_or_thread(channel_id)
+            if space is None:
+                try:
+                    # Archived threads are not cached
+                    space = await guild.fetch_channel(channel_id)
+                except discord.NotFound:
+                    return "gone"
+            await space.delete(reason=f"Onboarding cleanup: {session.reason}")
+            return "deleted"
+
+        items = [(session, channel_id) for session in stale for channel_id in session.channel_ids]
+        report = await self.executor.run(items, delete_channel, key=lambda item: guild.id, progress=progress)
+        failed = {id(result.item[0]) for result in report.results if result.status not in ("deleted", "gone", "not_found")}
+        self.channels_reclaimed += sum(1 for result in report.results if result.status == "deleted")
+        self.failures += len(failed)
+
+        # Sessions keep their row until every one of their channels is gone, so failures are retried
+        purged = [session.user_id for session in stale if session.user_id and id(session) not in failed]
+        for start in range(0, len(purged), SESSION_PURGE_CHUNK):
+            chunk = purged[start:start + SESSION_PURGE_CHUNK]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            await self.pool.execute(f"DELETE FROM onboarding_sessions WHERE user_id IN ({placeholders})", chunk)
+        self.sessions_purged += len(purged)
+        return stale, report, purged
+
+    def stats(self):
+        return {
+            "runs": self.runs,
+            "channels_reclaimed": self.channels_reclaimed,
+            "sessions_purged": self.sessions_purged,
+            "failures": self.failures,
+        }
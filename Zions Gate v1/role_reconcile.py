@@ -0,0 +1,146 @@
+"""
+Reconciles the global verified role in every guild with the users table.
+
+The desired holders of a guild's role are its members who are verified and not
+globally banned; the actual holders are role.members. Both are sets of user IDs:
+
+    add    = desired - actual
+    remove = actual - desired
+
+Only those deltas are applied, so a run costs API calls in proportion to the drift,
+not to the size of the guilds. The verified user IDs are kept in memory and refreshed
+from users.updated_at like the ban index; every `full_every` runs (and on demand) they
+are re-read in full.
+"""
+
+import os
+from dataclasses import dataclass, field
+
+import discord
+from dotenv import load_dotenv
+
+from moderation import ModerationExecutor
+
+load_dotenv()
+
+ROLE_RECONCILE_INTERVAL = float(os.getenv("role_reconcile_interval_minutes", "30"))
+ROLE_RECONCILE_FULL_EVERY = int(os.getenv("role_reconcile_full_every", "12"))
+
+@dataclass
+class RoleDrift:
+    guild: discord.Guild
+    role: discord.Role
+    add: set = field(default_factory=set)
+    remove: set = field(default_factory=set)
+
+    def __bool__(self):
+        return bool(self.add or self.remove)
+
+def format_role_drift(drifts, limit=15):
+    """
+    Formats one line per guild that has drifted, e.g. 'Guild: 3 to add, 1 to remove'.
+    """
+    drifted = [drift for drift in drifts if drift]
+    lines = [f"{drift.guild.name}: {len(drift.add)} to add, {len(drift.remove)} to remove" for drift in drifted[:limit]]
+    if len(drifted) > limit:
+        lines.append(f"...and {len(drifted) - limit} more guilds")
+    return lines
+
+def find_role(guild, name):
+    return discord.utils.find(lambda r: r.name.lower().strip() == name.lower(), guild.roles)
+
+def _read_verified(cursor):
+    # Both reads run in one transaction, so the watermark matches the verified set
+    cursor.execute("SELECT discord_id FROM users WHERE verify_status = 1")
+    verified = {discord_id for (discord_id,) in cursor.fetchall()}
+    cursor.execute("SELECT MAX(updated_at) FROM users")
+    return verified, cursor.fetchone()[0]
+
+class RoleReconciler:
+    def __init__(self, role_name, executor=None, full_every=ROLE_RECONCILE_FULL_EVERY):
+        self.role_name = role_name
+        self.executor = executor or ModerationExecutor()
+        self.full_every = full_every
+        self._verified = set()
+        self._watermark = None
+        self.loaded = False
+        self.runs = 0
+
+    async def load(self, pool):
+        """
+        Replaces the verified set with every user whose verify_status is 1.
+        """
+        self._verified, self._watermark = await pool.transaction(_read_verified)
+        self.loaded = True
+
+    async def refresh(self, pool):
+        """
+        Applies users rows changed since the watermark to the verified set.
+        """
+        if not self.loaded or self._watermark is None:
+            await self.load(pool)
+            return
+        # >= rather than >, as in BanIndex.refresh
+        rows = await pool.fetchall(
+            "SELECT discord_id, verify_status, updated_at FROM users WHERE updated_at >= %s",
+            (self._watermark,)
+        )
+        for discord_id, status, updated_at in rows:
+            if status == 1:
+                self._verified.add(discord_id)
+            else:
+                self._verified.discard(discord_id)
+            self._watermark = max(self._watermark, updated_at)
+
+    def diff(self, guilds, banned_ids):
+        """
+        Returns a RoleDrift for every guild that has the role and lets the bot manage it.
+        """
+        desired = self._verified - set(banned_ids)
+        drifts = []
+        for guild in guilds:
+            role = find_role(guild, self.role_name)
+            if role is None or not guild.me.guild_permissions.manage_roles or guild.me.top_role <= role:
+                continue
+            actual = {member.id for member in role.members if not member.bot}
+            # Walks this guild's own members, so each guild costs its size, not the
+            # number of verified users overall
+            wanted = {member.id for member in guild.members if not member.bot and member.id in desired}
+            drifts.append(RoleDrift(guild, role, wanted - actual, actual - wanted))
+        return drifts
+
+    async def run(self, pool, guilds, banned_ids, full=None, dry_run=False, progress=None):
+        """
+        Refreshes the verified set, diffs every guild and, unless `dry_run`, applies the
+        deltas. Returns (drifts, RunReport or None).
+        """
+        if full is None:
+            full = self.runs % self.full_every == 0
+        self.runs += 1
+        if full:
+            await self.load(pool)
+        else:
+            await self.refresh(pool)
+        drifts = self.diff(guilds, banned_ids)
+        if dry_run:
+            return drifts, None
+        return drifts, await self.apply(drifts, progress=progress)
+
+    async def apply(self, drifts, progress=None):
+        items = []
+        for drift in drifts:
+            items.extend(("add", drift.guild, drift.role, user_id) for user_id in drift.add)
+            items.extend(("remove", drift.guild, drift.role, user_id) for user_id in drift.remove)
+
+        async def reconcile(item):
+            action, guild, role, user_id = item
+            member = guild.get_member(user_id)
+            if member is None:
+                return "gone"
+            if action == "add":
+                await member.add_roles(role, reason="Global verified role: reconciliation")
+                return "added"
+            await member.remove_roles(role, reason="Global verified role: reconciliation")
+            return "removed"
+
+        return await self.executor.run(items, reconcile, key=lambda item: item[1].id, progress=progress)
@@ -0,0 +1,60 @@
+"""
+Brings an existing database up to date with Sql.code.discord.sql.
+
+CREATE TABLE IF NOT EXISTS leaves tables that already exist untouched, so columns added
+to them later are added here at startup, once, if information_schema says they are
+missing. Each entry is (table, column, ALTER statement adding it and any index on it).
+"""
+
+SCHEMA_COLUMNS = [
+    (
+        "onboarding_sessions", "verification_channel_id",
+        "ALTER TABLE onboarding_sessions "
+        "ADD verification_channel_id BIGINT NULL DEFAULT NULL"
+    ),
+    (
+        "onboarding_sessions", "updated_at",
+        "ALTER TABLE onboarding_sessions "
+        "ADD updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP, "
+        "ADD INDEX updated_at_idx (updated_at)"
+    ),
+    (
+        "users", "updated_at",
+        "ALTER TABLE users "
+        "ADD updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP, "
+        "ADD INDEX updated_at_idx (updated_at)"
+    ),
+    (
+        "moderation_tasks", "elapsed",
+        "ALTER TABLE moderation_tasks ADD elapsed DOUBLE NOT NULL DEFAULT 0"
+    ),
+    (
+        "moderation_tasks", "waited",
+        "ALTER TABLE moderation_tasks ADD waited DOUBLE NOT NULL DEFAULT 0"
+    ),
+]
+
+COLUMN_EXISTS_SQL = """
+SELECT COUNT(*) FROM information_schema.COLUMNS
+WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+"""
+
+async def _column_exists(pool, table, column):
+    row = await pool.fetchone(COLUMN_EXISTS_SQL, (table, column))
+    return bool(row and row[0])
+
+async def ensure_schema(pool):
+    """
+    Adds every column in SCHEMA_COLUMNS that the database does not have yet. Both bots
+    run this at startup; if the other one adds a column first, that is not an error.
+    """
+    for table, column, alter in SCHEMA_COLUMNS:
+        if await _column_exists(pool, table, column):
+            continue
+        try:
+            await pool.execute(alter)
+        except Exception:
+            if await _column_exists(pool, table, column):
+                continue
+            raise
+        print(f"Added column {table}.{column} to the database.")
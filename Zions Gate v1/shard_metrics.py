@@ -0,0 +1,69 @@
+"""
+Per-shard health numbers for a sharded bot, shared through the shard_metrics table.
+
+Every cluster process writes one row per shard it runs (gateway latency, guild count
+and member count) on a timer, so any cluster can show the whole deployment and see
+which processes are carrying the most members.
+"""
+
+import math
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SHARD_METRICS_INTERVAL = float(os.getenv("shard_metrics_interval_seconds", "60"))
+
+def collect(bot):
+    """
+    Returns (shard_id, latency_ms or None, guilds, members) for each shard this process runs.
+    """
+    latencies = dict(bot.latencies) if hasattr(bot, "latencies") else {0: bot.latency}
+    counts = {shard_id: [0, 0] for shard_id in latencies}
+    for guild in bot.guilds:
+        shard = counts.setdefault(guild.shard_id, [0, 0])
+        shard[0] += 1
+        shard[1] += guild.member_count or 0
+    rows = []
+    for shard_id, (guilds, members) in sorted(counts.items()):
+        latency = latencies.get(shard_id)
+        # Latency is inf/nan until the shard's first heartbeat is acknowledged
+        latency_ms = round(latency * 1000, 1) if latency is not None and math.isfinite(latency) else None
+        rows.append((shard_id, latency_ms, guilds, members))
+    return rows
+
+async def publish(pool, bot_id, cluster_id, rows):
+    await pool.executemany(
+        """
+        INSERT INTO shard_metrics (bot_id, shard_id, cluster_id, latency_ms, guilds, members, updated_at)
+        VALUES (%s, %s, %s, %s, %s, %s, NOW())
+        ON DUPLICATE KEY UPDATE cluster_id = VALUES(cluster_id), latency_ms = VALUES(latency_ms),
+            guilds = VALUES(guilds), members = VALUES(members), updated_at = NOW()
+        """,
+        [(bot_id, shard_id, cluster_id, latency_ms, guilds, members) for shard_id, latency_ms, guilds, members in rows]
+    )
+
+async def load(pool, bot_id):
+    """
+    Returns every cluster's latest rows, oldest shard first, with their age in seconds.
+    """
+    return await pool.fetchall(
+        """
+        SELECT shard_id, cluster_id, latency_ms, guilds, members, TIMESTAMPDIFF(SECOND, updated_at, NOW())
+        FROM shard_metrics WHERE bot_id = %s ORDER BY shard_id
+        """,
+        (bot_id,)
+    )
+
+def format_shard_metrics(rows, stale_after=SHARD_METRICS_INTERVAL * 3, limit=25):
+    lines = []
+    for shard_id, cluster_id, latency_ms, guilds, members, age in rows[:limit]:
+        latency = f"{latency_ms:.0f} ms" if latency_ms is not None else "no heartbeat"
+        stale = f" (stale, {age}s old)" if age is not None and age > stale_after else ""
+        lines.append(f"Shard {shard_id} (cluster {cluster_id}): {latency}, {guilds} guilds, {members} members{stale}")
+    if len(rows) > limit:
+        lines.append(f"...and {len(rows) - limit} more shards")
+    total_members = sum(row[4] for row in rows)
+    lines.append(f"Total: {len(rows)} shards, {sum(row[3] for row in rows)} guilds, {total_members} members")
+    return lines
@@ -0,0 +1,100 @@
+"""
+Write-through cache of users.verify_status keyed by discord_id.
+
+The cache is bulk-loaded at startup and every status change made by this process goes
+through it, so member joins are answered from memory and MySQL only sees writes and
+misses. Entries are evicted least-recently-used once the cache is full and expire after
+a TTL so changes made by another bot process are eventually re-read.
+"""
+
+import os
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+VERIFY_CACHE_SIZE = int(os.getenv("verify_cache_size", "200000"))
+VERIFY_CACHE_TTL = float(os.getenv("verify_cache_ttl", "3600"))
+
+class VerifyCache:
+    def __init__(self, max_size=VERIFY_CACHE_SIZE, ttl=VERIFY_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        # discord_id -> (verify_status or None when there is no users row, stored_at)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def put(self, discord_id, status):
+        self._entries[discord_id] = (status, time.monotonic())
+        self._entries.move_to_end(discord_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, discord_id):
+        self._entries.pop(discord_id, None)
+
+    def peek(self, discord_id):
+        """
+        Returns (True, verify_status) if the user has a fresh entry and (False, None)
+        otherwise, without reading the database. Counts as a hit or a miss.
+        """
+        entry = self._entries.get(discord_id)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl:
+            self.hits += 1
+            self._entries.move_to_end(discord_id)
+            return True, entry[0]
+        self.misses += 1
+        return False, None
+
+    async def get(self, pool, discord_id):
+        """
+        Returns the user's verify_status, or None if they have no users row.
+        """
+        cached, status = self.peek(discord_id)
+        if cached:
+            return status
+        row = await pool.fetchone("SELECT verify_status FROM users WHERE discord_id = %s", (discord_id,))
+        status = row[0] if row else None
+        self.put(discord_id, status)
+        return status
+
+    async def load(self, pool):
+        """
+        Bulk-loads verify_status for every user (up to the cache size).
+        """
+        rows = await pool.fetchall(
+            "SELECT discord_id, verify_status FROM users ORDER BY verify_status DESC LIMIT %s",
+            (self.max_size,)
+        )
+        for discord_id, status in rows:
+            self.put(discord_id, status)
+        print(f"Loaded {len(rows)} users into the verification cache.")
+
+    async def set_status(self, pool, discord_id, status):
+        """
+        Writes verify_status to the database and then to the cache.
+        """
+        await pool.execute("UPDATE users SET verify_status = %s WHERE discord_id = %s", (status, discord_id))
+        entry = self._entries.get(discord_id)
+        if entry is not None and entry[0] is not None:
+            self.put(discord_id, status)
+        else:
+            # The UPDATE cannot tell us whether a row exists, so let the next read find out.
+            self.invalidate(discord_id)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+verify_cache = VerifyCache()
@@ -1,12 +1,18 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import aiohttp
-import asyncio
 import csv
 import os
 from datetime import datetime
 from typing import Optional
-from db_connection import db_connection
+from db_connection import db_pool
+from ban_index import ban_index
+from server_config import server_configs
+from join_check import join_decision
+from bulk_ban import parse_ban_list, bulk_ban_guilds, summarize, build_report
+from moderation import MAX_RATELIMIT_TIMEOUT, ModerationExecutor, describe_failures, format_counts, format_waits, progress_editor
+from webhook_logger import WebhookDispatcher
+from member_snapshot import joined_since, load_snapshot, save_snapshot
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -21,7 +27,10 @@ BOT_TOKEN = os.getenv("BOT_TOKEN")
 
 intents = discord.Intents.default()
 intents.members = True
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot = commands.Bot(command_prefix="!", intents=intents, max_ratelimit_timeout=MAX_RATELIMIT_TIMEOUT)
+
+# Webhook messages are queued and delivered in batches over the bot's shared HTTP session
+log_dispatcher = WebhookDispatcher()
 
 def get_user_display(user) -> str:
     try:
@@ -37,18 +46,13 @@ def get_user_display(user) -> str:
 # Server Registration
 async def register_server(guild: discord.Guild):
     try:
-        connection = db_connection()
-        cursor = connection.cursor()
         query = "SELECT Guild_ID FROM servers WHERE Guild_ID = %s"
-        cursor.execute(query, (guild.id,))
-        result = cursor.fetchone()
+        result = await db_pool.fetchone(query, (guild.id,))
         if result is None:
             insert_query = "INSERT INTO servers (Guild_ID, Server_Name, OwnerID, setup) VALUES (%s, %s, 0, FALSE)"
-            cursor.execute(insert_query, (guild.id, guild.name))
-            connection.commit()
+            await db_pool.execute(insert_query, (guild.id, guild.name))
+            server_configs.invalidate(guild.id)
             print(f"Registered server: {guild.name} (ID: {guild.id})")
-        cursor.close()
-        connection.close()
     except Exception as e:
         print("Error registering server:", e)
 
@@ -60,14 +64,8 @@ async def check_server_setup(interaction: discord.Interaction) -> bool:
     if guild is None:
         return True
     try:
-        connection = db_connection()
-        cursor = connection.cursor()
-        query = "SELECT setup FROM servers WHERE Guild_ID = %s"
-        cursor.execute(query, (guild.id,))
-        result = cursor.fetchone()
-        cursor.close()
-        connection.close()
-        if result and (result[0] == 1 or result[0] is True or result[0] == "True"):
+        config = await server_configs.get(db_pool, guild.id)
+        if config and config.setup:
             return True
         else:
             if not interaction.response.is_done():
@@ -85,7 +83,7 @@ async def check_server_setup(interaction: discord.Interaction) -> bool:
 
 # Command Role Check
 async def check_command_roles(interaction: discord.Interaction) -> bool:
-    restricted_commands = {"localkick", "localban", "globalban", "globalunban"}
+    restricted_commands = {"localkick", "localban", "globalban", "globalunban", "bulkglobalban"}
     if interaction.command is None:
         return True
     command_name = interaction.command.name.lower()
@@ -94,29 +92,19 @@ async def check_command_roles(interaction: discord.Interaction) -> bool:
     guild = interaction.guild
     if guild is None:
         return True
-    allowed_roles = []
+    allowed_roles = frozenset()
     try:
-        connection = db_connection()
-        cursor = connection.cursor()
-        if command_name in ("globalban", "globalunban"):
-            cursor.execute("SELECT Global_1, Global_2, Global_3 FROM servers WHERE Guild_ID = %s", (guild.id,))
-            result = cursor.fetchone()
-            allowed_roles = [role for role in result if role is not None] if result else []
-        elif command_name in ("localkick", "localban"):
-            cursor.execute("SELECT Local_1, Local_2, Local_3 FROM servers WHERE Guild_ID = %s", (guild.id,))
-            local_result = cursor.fetchone()
-            local_roles = [role for role in local_result if role is not None] if local_result else []
-            cursor.execute("SELECT Global_1, Global_2, Global_3 FROM servers WHERE Guild_ID = %s", (guild.id,))
-            global_result = cursor.fetchone()
-            global_roles = [role for role in global_result if role is not None] if global_result else []
-            allowed_roles = local_roles + global_roles
-        cursor.close()
-        connection.close()
+        config = await server_configs.get(db_pool, guild.id)
+        if config:
+            if command_name in ("globalban", "globalunban", "bulkglobalban"):
+                allowed_roles = config.global_roles
+            elif command_name in ("localkick", "localban"):
+                allowed_roles = config.role_ids
     except Exception as e:
         print("Error retrieving command roles:", e)
         raise discord.app_commands.CheckFailure("Access Denied: Could not verify your permissions.")
-    user_role_ids = [role.id for role in interaction.user.roles]
-    if any(r in user_role_ids for r in allowed_roles):
+    user_role_ids = {role.id for role in interaction.user.roles}
+    if not allowed_roles.isdisjoint(user_role_ids):
         return True
     else:
         raise discord.app_commands.CheckFailure("Access Denied: You do not have permission to use this command.")
@@ -165,84 +153,109 @@ async def add_member_to_users(member: discord.Member):
     user_name = get_user_display(member)
     account_age = member.created_at.strftime('%Y-%m-%d')
     try:
-        connection = db_connection()
-        cursor = connection.cursor()
-        select_query = "SELECT User_ID FROM Users WHERE User_ID = %s"
-        cursor.execute(select_query, (user_id,))
-        result = cursor.fetchone()
-        if result is None:
-            insert_query = "INSERT INTO Users (User_ID, User_Name, Account_Age, Global_Banned) VALUES (%s, %s, %s, %s)"
-            data_tuple = (user_id, user_name, account_age, "False")
-            cursor.execute(insert_query, data_tuple)
-            connection.commit()
+        # One statement: the row is only inserted if the user is not in Users yet
+        insert_query = (
+            "INSERT INTO Users (User_ID, User_Name, Account_Age, Global_Banned) "
+            "SELECT %s, %s, %s, %s FROM DUAL WHERE NOT EXISTS (SELECT 1 FROM Users WHERE User_ID = %s)"
+        )
+        if await db_pool.execute(insert_query, (user_id, user_name, account_age, "False", user_id)):
             print(f"Added new user: {user_name} (ID: {user_id}) to Users table.")
-        cursor.close()
-        connection.close()
     except Exception as e:
         print("Database error:", e)
 
+def _insert_new_users(cursor, rows):
+    # Inserts the (User_ID, User_Name, Account_Age) rows that are not in Users yet
+    inserted = 0
+    for start in range(0, len(rows), 1000):
+        chunk = rows[start:start + 1000]
+        placeholders = ", ".join(["%s"] * len(chunk))
+        cursor.execute(f"SELECT User_ID FROM Users WHERE User_ID IN ({placeholders})", [row[0] for row in chunk])
+        existing = {row[0] for row in cursor.fetchall()}
+        missing = [(*row, "False") for row in chunk if row[0] not in existing]
+        if missing:
+            cursor.executemany("INSERT INTO Users (User_ID, User_Name, Account_Age, Global_Banned) VALUES (%s, %s, %s, %s)", missing)
+            inserted += len(missing)
+    return inserted
+
+async def add_members_to_users(members):
+    # Batched add_member_to_users for many members in one transaction
+    rows = [(member.id, get_user_display(member), member.created_at.strftime('%Y-%m-%d')) for member in members if not member.bot]
+    if not rows:
+        return 0
+    return await db_pool.transaction(_insert_new_users, rows)
+
 async def add_user_to_db(user: discord.User):
     user_id = user.id
     user_name = get_user_display(user)
     account_age = user.created_at.strftime('%Y-%m-%d')
     try:
-        connection = db_connection()
-        cursor = connection.cursor()
         select_query = "SELECT User_ID FROM Users WHERE User_ID = %s"
-        cursor.execute(select_query, (user_id,))
-        result = cursor.fetchone()
+        result = await db_pool.fetchone(select_query, (user_id,))
         if result is None:
             insert_query = "INSERT INTO Users (User_ID, User_Name, Account_Age, Global_Banned) VALUES (%s, %s, %s, %s)"
             data_tuple = (user_id, user_name, account_age, "False")
-            cursor.execute(insert_query, data_tuple)
-            connection.commit()
+            await db_pool.execute(insert_query, data_tuple)
             print(f"Added new user: {user_name} (ID: {user_id}) to Users table.")
-        cursor.close()
-        connection.close()
     except Exception as e:
         print("Database error:", e)
 
 async def set_global_ban(user_id: int, banned: bool):
     try:
-        connection = db_connection()
-        cursor = connection.cursor()
         query = "UPDATE Users SET Global_Banned = %s WHERE User_ID = %s"
         value = "True" if banned else "False"
-        cursor.execute(query, (value, user_id))
-        connection.commit()
-        cursor.close()
-        connection.close()
+        await db_pool.execute(query, (value, user_id))
+        if banned:
+            ban_index.add(user_id)
+        else:
+            ban_index.remove(user_id)
     except Exception as e:
         print("Database error:", e)
 
+def _write_global_bans(cursor, user_ids):
+    # Flags existing rows and inserts the rest; Account_Age comes from the ID's snowflake timestamp
+    for start in range(0, len(user_ids), 1000):
+        chunk = user_ids[start:start + 1000]
+        placeholders = ", ".join(["%s"] * len(chunk))
+        cursor.execute(f"SELECT User_ID FROM Users WHERE User_ID IN ({placeholders})", chunk)
+        existing = {row[0] for row in cursor.fetchall()}
+        cursor.execute(f"UPDATE Users SET Global_Banned = 'True' WHERE User_ID IN ({placeholders})", chunk)
+        missing = [(user_id, "Unknown User", discord.utils.snowflake_time(user_id).strftime('%Y-%m-%d'), "True") for user_id in chunk if user_id not in existing]
+        if missing:
+            cursor.executemany("INSERT INTO Users (User_ID, User_Name, Account_Age, Global_Banned) VALUES (%s, %s, %s, %s)", missing)
+
+async def set_global_bans(user_ids: list):
+    # Sets Global_Banned for many users in one transaction
+    await db_pool.transaction(_write_global_bans, user_ids)
+    for user_id in user_ids:
+        ban_index.add(user_id)
+
 async def is_globally_banned(user_id: int) -> bool:
     try:
-        connection = db_connection()
-        cursor = connection.cursor()
-        query = "SELECT Global_Banned FROM Users WHERE User_ID = %s"
-        cursor.execute(query, (user_id,))
-        result = cursor.fetchone()
-        cursor.close()
-        connection.close()
-        return result and result[0] == "True"
+        if not ban_index.loaded:
+            await ban_index.load(db_pool)
+        return user_id in ban_index
     except Exception as e:
         print("Database error:", e)
         return False
 
+# Ban Index Refresh (picks up bans and unbans written outside this process)
+@tasks.loop(minutes=5)
+async def refresh_ban_index():
+    try:
+        await ban_index.load(db_pool)
+    except Exception as e:
+        print("Error refreshing ban index:", e)
+
 # On Member Join
 @bot.event
 async def on_member_join(member: discord.Member):
     try:
-        connection = db_connection()
-        cursor = connection.cursor()
-        query = "SELECT setup FROM servers WHERE Guild_ID = %s"
-        cursor.execute(query, (member.guild.id,))
-        result = cursor.fetchone()
-        cursor.close()
-        connection.close()
-        if result and (result[0] == 1 or result[0] is True or result[0] == "True"):
-            await add_member_to_users(member)
-            if await is_globally_banned(member.id):
+        # Guild setup and ban status in one lookup, from memory when the caches are warm
+        decision = await join_decision(db_pool, member.guild.id, member.id)
+        if decision.setup:
+            if not decision.known:
+                await add_member_to_users(member)
+            if decision.banned:
                 try:
                     await member.guild.ban(member, reason="Global ban active.")
                     print(f"Banned {member} from {member.guild.name} due to global ban.")
@@ -273,13 +286,8 @@ async def setup(interaction: discord.Interaction, local1: discord.Role, global1:
     except Exception as e:
         print("Error registering server in /setup:", e)
     try:
-        connection = db_connection()
-        cursor = connection.cursor()
         query = "SELECT OwnerID FROM servers WHERE Guild_ID = %s"
-        cursor.execute(query, (guild.id,))
-        result = cursor.fetchone()
-        cursor.close()
-        connection.close()
+        result = await db_pool.fetchone(query, (guild.id,))
     except Exception as e:
         print("Error retrieving OwnerID:", e)
         await interaction.response.send_message("Error checking server registration.", ephemeral=True)
@@ -291,14 +299,10 @@ async def setup(interaction: discord.Interaction, local1: discord.Role, global1:
         await interaction.response.send_message("Access Denied: Only the registered server owner can run this command.", ephemeral=True)
         return
     try:
-        connection = db_connection()
-        cursor = connection.cursor()
         update_query = "UPDATE servers SET Server_Name = %s, Local_1 = %s, Local_2 = %s, Local_3 = %s, Global_1 = %s, Global_2 = %s, Global_3 = %s, setup = TRUE WHERE Guild_ID = %s"
         data = (guild.name, local1.id, local2.id if local2 else None, local3.id if local3 else None, global1.id, global2.id if global2 else None, global3.id if global3 else None, guild.id)
-        cursor.execute(update_query, data)
-        connection.commit()
-        cursor.close()
-        connection.close()
+        await db_pool.execute(update_query, data)
+        server_configs.invalidate(guild.id)
         for member in guild.members:
             await add_member_to_users(member)
         await interaction.response.send_message("Server setup complete. Command access is now enabled.", ephemeral=True)
@@ -313,26 +317,23 @@ async def globalban(interaction: discord.Interaction, user: discord.User, reason
     # Ensure the user is in the database
     await add_user_to_db(user)
     await set_global_ban(user.id, True)
-    banned_in = []
-    for guild in bot.guilds:
+    async def ban_in_guild(guild):
         member = guild.get_member(user.id)
         if member is None:
-            try:
-                # Use the provided user object directly
-                try:
-                    await guild.ban(user, reason=reason)
-                    banned_in.append(guild.name)
-                except Exception as e:
-                    print(f"Failed to ban <@{user.id}> in {guild.name}: {e}")
-            except Exception as e:
-                print(f"Error processing user {user.id} in {guild.name}: {e}")
+            # Ban anyway so they can't join later
+            await guild.ban(user, reason=reason)
+            return "not_present"
+        await add_member_to_users(member)
+        await guild.ban(member, reason=reason)
+        return "banned"
+    progress_message = await interaction.followup.send(f"Banning <@{user.id}> across {len(bot.guilds)} servers...", ephemeral=True, wait=True)
+    report = await ModerationExecutor().run(bot.guilds, ban_in_guild, key=lambda guild: guild.id, progress=progress_editor(progress_message, f"Banning <@{user.id}>"))
+    banned_in = []
+    for result in report.results:
+        if result.error:
+            print(f"Failed to ban <@{user.id}> in {result.item.name}: {result.error}")
         else:
-            await add_member_to_users(member)
-            try:
-                await guild.ban(member, reason=reason)
-                banned_in.append(guild.name)
-            except Exception as e:
-                print(f"Failed to ban <@{user.id}> in {guild.name}: {e}")
+            banned_in.append(result.item.name)
     loc = f"{interaction.guild.name} - {interaction.channel.mention}"
     webhook_message = (
         f"**Global Ban executed for <@{user.id}> (ID: {user.id}).**\n"
@@ -342,28 +343,65 @@ async def globalban(interaction: discord.Interaction, user: discord.User, reason
         f"**Servers affected:** {', '.join(banned_in)}\n\n"
         "Please reply with screenshots of evidence supporting this ban."
     )
+    log_dispatcher.enqueue(BAN_WEBHOOK_URL, content=webhook_message)
+    lines = [f"Globally banned <@{user.id}> from: {', '.join(banned_in)}. Database updated.", f"{format_counts(report)} in {report.duration:.1f}s; {format_waits(report)}."]
+    lines.extend(describe_failures(report, describe=lambda guild: guild.name))
+    await interaction.followup.send("\n".join(lines), ephemeral=True)
+
+# Slash Command: Bulk Global Ban
+@bot.tree.command(name="bulkglobalban", description="Globally ban every user ID in a CSV or text file (one ID per line, optional reason).")
+async def bulkglobalban(interaction: discord.Interaction, file: discord.Attachment, reason: str):
+    await interaction.response.defer(ephemeral=True)
     try:
-        async with aiohttp.ClientSession() as session:
-            webhook = discord.Webhook.from_url(BAN_WEBHOOK_URL, session=session)
-            await webhook.send(content=webhook_message)
+        text = (await file.read()).decode("utf-8-sig", errors="replace")
+        entries, rejected = parse_ban_list(text, reason)
+        if not ban_index.loaded:
+            await ban_index.load(db_pool)
+        new_entries = []
+        for entry in entries:
+            if entry.discord_id in ban_index:
+                entry.status = "already_banned"
+            else:
+                new_entries.append(entry)
+        if new_entries:
+            await set_global_bans([entry.discord_id for entry in new_entries])
+            progress_message = await interaction.followup.send(f"Flagged {len(new_entries)} new global bans. Banning them in {len(bot.guilds)} servers...", ephemeral=True, wait=True)
+            report = await bulk_ban_guilds(bot.guilds, new_entries, reason, progress=progress_editor(progress_message, "Bulk banning"))
+            for result in report.results:
+                if result.error:
+                    print(f"Failed to bulk ban in {result.item[0].name}: {result.error}")
+        loc = f"{interaction.guild.name} - {interaction.channel.mention}"
+        webhook_message = (
+            f"**Bulk Global Ban executed for {len(new_entries)} users from {file.filename}.**\n"
+            f"**Reason:** {reason}\n"
+            f"**Banned by:** <@{interaction.user.id}> (ID: {interaction.user.id})\n"
+            f"**Location:** {loc}\n"
+            f"**Results:** {summarize(entries + rejected) or 'no IDs found'}"
+        )
+        log_dispatcher.enqueue(BAN_WEBHOOK_URL, content=webhook_message)
+        await interaction.followup.send(f"Bulk global ban finished: {summarize(entries + rejected) or 'no IDs found'}. Database updated.", file=build_report(entries + rejected), ephemeral=True)
     except Exception as e:
-        print("Error sending webhook message in global ban:", e)
-    await interaction.followup.send(f"Globally banned <@{user.id}> from: {', '.join(banned_in)}. Database updated.", ephemeral=True)
+        print(f"Error during bulk global ban: {e}")
+        await interaction.followup.send("There was an error during the bulk global ban.", ephemeral=True)
 
 # Slash Command: Global Unban
 @bot.tree.command(name="globalunban", description="Globally unban a user from all servers and remove the global ban flag.")
 async def globalunban(interaction: discord.Interaction, user: discord.User):
     await interaction.response.defer(ephemeral=True)
     await set_global_ban(user.id, False)
-    unbanned_in = []
-    for guild in bot.guilds:
+    async def unban_in_guild(guild):
         try:
             await guild.unban(user, reason="Global unban command issued.")
-            unbanned_in.append(guild.name)
         except discord.NotFound:
-            pass
-        except Exception as e:
-            print(f"Failed to unban <@{user.id}> in {guild.name}: {e}")
+            return "not_banned"
+        return "unbanned"
+    report = await ModerationExecutor().run(bot.guilds, unban_in_guild, key=lambda guild: guild.id)
+    unbanned_in = []
+    for result in report.results:
+        if result.error:
+            print(f"Failed to unban <@{user.id}> in {result.item.name}: {result.error}")
+        elif result.status == "unbanned":
+            unbanned_in.append(result.item.name)
     loc = f"{interaction.guild.name} - {interaction.channel.mention}"
     webhook_message = (
         f"**Global Unban executed for <@{user.id}> (ID: {user.id}).**\n"
@@ -371,13 +409,8 @@ async def globalunban(interaction: discord.Interaction, user: discord.User):
         f"**Location:** {loc}\n"
         f"**Guilds affected:** {', '.join(unbanned_in) if unbanned_in else 'None'}."
     )
-    try:
-        async with aiohttp.ClientSession() as session:
-            webhook = discord.Webhook.from_url(BAN_WEBHOOK_URL, session=session)
-            await webhook.send(content=webhook_message)
-    except Exception as e:
-        print("Error sending webhook message in global unban:", e)
-    await interaction.followup.send(f"Global unban executed for <@{user.id}> from: {', '.join(unbanned_in)}. Database updated.", ephemeral=True)
+    log_dispatcher.enqueue(BAN_WEBHOOK_URL, content=webhook_message)
+    await interaction.followup.send(f"Global unban executed for <@{user.id}> from: {', '.join(unbanned_in)}. Database updated. ({format_counts(report)}; {format_waits(report)})", ephemeral=True)
 
 # Slash Command: Report User
 @bot.tree.command(name="reportuser", description="Report a user. Specify the user, reason, and location of the incident.")
@@ -389,9 +422,7 @@ async def reportuser(interaction: discord.Interaction, user: discord.User, reaso
         f"**Location:** {location}\n"
         f"**Reason:** {reason}"
     )
-    async with aiohttp.ClientSession() as session:
-        webhook = discord.Webhook.from_url(REPORT_WEBHOOK_URL, session=session)
-        await webhook.send(content=report_message)
+    log_dispatcher.enqueue(REPORT_WEBHOOK_URL, content=report_message)
     if not interaction.response.is_done():
         await interaction.response.send_message("Your report has been submitted. Moderators or administrators will review your report and may contact you for further details.", ephemeral=True)
     else:
@@ -409,9 +440,7 @@ async def localkick(interaction: discord.Interaction, user: discord.Member, reas
             f"**Location:** {loc}\n\n"
             "Please reply with screenshots of evidence supporting this kick."
         )
-        async with aiohttp.ClientSession() as session:
-            webhook = discord.Webhook.from_url(LK_WEBHOOK_URL, session=session)
-            await webhook.send(content=webhook_message)
+        log_dispatcher.enqueue(LK_WEBHOOK_URL, content=webhook_message)
         if not interaction.response.is_done():
             await interaction.response.send_message(f"Locally kicked <@{user.id}> from {interaction.guild.name}.", ephemeral=True)
         else:
@@ -431,9 +460,7 @@ async def localban(interaction: discord.Interaction, user: discord.Member, reaso
             f"**Location:** {loc}\n\n"
             "Please reply with screenshots of evidence supporting this ban."
         )
-        async with aiohttp.ClientSession() as session:
-            webhook = discord.Webhook.from_url(LB_WEBHOOK_URL, session=session)
-            await webhook.send(content=webhook_message)
+        log_dispatcher.enqueue(LB_WEBHOOK_URL, content=webhook_message)
         if not interaction.response.is_done():
             await interaction.response.send_message(f"Locally banned <@{user.id}> from {interaction.guild.name}.", ephemeral=True)
         else:
@@ -463,21 +490,25 @@ async def purge(interaction: discord.Interaction, channel: discord.TextChannel,
             ])
     if PURGE_WEBHOOK_URL:
         try:
-            async with aiohttp.ClientSession() as session:
-                with open(log_filename, "rb") as log_file:
-                    data = aiohttp.FormData()
-                    data.add_field("content", f"Purged {len(deleted_messages)} messages from {channel.mention}. Log file attached:")
-                    data.add_field("file", log_file, filename=log_filename, content_type="text/csv")
-                    async with session.post(PURGE_WEBHOOK_URL, data=data) as response:
-                        if response.status not in [200, 204]:
-                            response_text = await response.text()
-                            print(f"Failed to send log file to the purge webhook: {response.status} {response_text}")
+            with open(log_filename, "rb") as log_file:
+                data = aiohttp.FormData()
+                data.add_field("content", f"Purged {len(deleted_messages)} messages from {channel.mention}. Log file attached:")
+                data.add_field("file", log_file, filename=log_filename, content_type="text/csv")
+                async with bot.http_session.post(PURGE_WEBHOOK_URL, data=data) as response:
+                    if response.status not in [200, 204]:
+                        response_text = await response.text()
+                        print(f"Failed to send log file to the purge webhook: {response.status} {response_text}")
         except Exception as e:
             print(f"Error sending log file to the purge webhook: {e}")
     else:
         print("Purge webhook URL not set. Log file was not sent.")
     os.remove(log_filename)
 
+# Role Delete (drops the guild's cached config; it is re-read on the next command)
+@bot.event
+async def on_guild_role_delete(role: discord.Role):
+    server_configs.invalidate(role.guild.id)
+
 # Slash Command: Avatar Update (Optional)
 @bot.event
 async def on_user_update(before: discord.User, after: discord.User):
@@ -487,8 +518,28 @@ async def on_user_update(before: discord.User, after: discord.User):
         embed = discord.Embed(description=message)
         if new_avatar_url:
             embed.set_image(url=new_avatar_url)
-        async with aiohttp.ClientSession() as session:
-            await session.post(AVATAR_WEBHOOK_URL, json={"content": message, "embeds": [embed.to_dict()]})
+        log_dispatcher.enqueue(AVATAR_WEBHOOK_URL, content=message, embeds=[embed.to_dict()])
+
+# Setup Hook
+async def setup_hook():
+    await db_pool.start()
+    bot.http_session = aiohttp.ClientSession()
+    log_dispatcher.start(bot.http_session, urls=[BAN_WEBHOOK_URL, AVATAR_WEBHOOK_URL, REPORT_WEBHOOK_URL, LK_WEBHOOK_URL, LB_WEBHOOK_URL])
+    try:
+        await ban_index.load(db_pool)
+    except Exception as e:
+        print("Error loading ban index:", e)
+
+bot.setup_hook = setup_hook
+
+async def close_bot():
+    await log_dispatcher.close()
+    if getattr(bot, "http_session", None):
+        await bot.http_session.close()
+    await db_pool.close()
+    await commands.Bot.close(bot)
+
+bot.close = close_bot
 
 # On Ready
 @bot.event
@@ -499,6 +550,12 @@ async def on_ready():
         print("Slash commands synced.")
     except Exception as e:
         print("Error syncing slash commands:", e)
+    if not refresh_ban_index.is_running():
+        refresh_ban_index.start()
+    try:
+        await server_configs.load_all(db_pool)
+    except Exception as e:
+        print("Error loading server configuration:", e)
     for guild in bot.guilds:
         print(f"Checking members in guild: {guild.name}")
         try:
@@ -506,16 +563,15 @@ async def on_ready():
         except Exception as e:
             print("Error auto-registering server:", e)
         try:
-            connection = db_connection()
-            cursor = connection.cursor()
-            query = "SELECT setup FROM servers WHERE Guild_ID = %s"
-            cursor.execute(query, (guild.id,))
-            result = cursor.fetchone()
-            cursor.close()
-            connection.close()
-            if result and (result[0] == 1 or result[0] is True or result[0] == "True"):
-                for member in guild.members:
-                    await add_member_to_users(member)
+            config = await server_configs.get(db_pool, guild.id)
+            if config and config.setup:
+                # Only members missing from the last snapshot can be missing from Users
+                member_ids = [member.id for member in guild.members]
+                joined = joined_since(load_snapshot(guild.id), member_ids)
+                if joined:
+                    added = await add_members_to_users([guild.get_member(member_id) for member_id in joined])
+                    print(f"Checked {len(joined)} members of {guild.name} new since the last snapshot; added {added} to Users table.")
+                save_snapshot(guild.id, member_ids)
             else:
                 print(f"Server {guild.name} is not set up; not adding members to Users table.")
         except Exception as e:
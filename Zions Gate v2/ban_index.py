@@ -0,0 +1,33 @@
+"""
+In-memory set of globally banned user IDs (Users.Global_Banned = 'True').
+
+The set is loaded once at startup, updated in place by set_global_ban and reloaded
+periodically, so join-time ban checks never need a database round trip. The v2 Users
+table has no ban timestamp to use as a watermark, so refreshes are full reloads of a
+single indexed column.
+"""
+
+class BanIndex:
+    def __init__(self):
+        self._ids = set()
+        self.loaded = False
+
+    def __contains__(self, user_id):
+        return user_id in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, user_id):
+        self._ids.add(user_id)
+
+    def remove(self, user_id):
+        self._ids.discard(user_id)
+
+    async def load(self, pool):
+        rows = await pool.fetchall("SELECT User_ID FROM Users WHERE Global_Banned = %s", ("True",))
+        self._ids = {row[0] for row in rows}
+        self.loaded = True
+        print(f"Loaded {len(self._ids)} global bans into the ban index.")
+
+ban_index = BanIndex()
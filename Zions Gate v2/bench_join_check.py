@@ -0,0 +1,95 @@
+"""
+Benchmark: join-handling latency of on_member_join's database work.
+
+Compares the old path (servers setup query, Users SELECT, INSERT for new users and a
+global ban query) with join_decision on cold caches (one query, plus the insert for
+new users) and warm caches (only the insert-if-missing). The database is simulated by
+a pool whose every round trip sleeps for `rtt_ms` (default 1.0). Half the joining
+members are new. Reports p50/p99 per join.
+
+    python bench_join_check.py [joins] [rtt_ms]
+"""
+
+import asyncio
+import sys
+import time
+
+from ban_index import ban_index
+from join_check import join_decision
+from server_config import server_configs
+
+GUILD_ID = 10**17
+CONFIG_ROW = (GUILD_ID, 1, 1, None, None, 2, None, None)
+
+def is_new(user_id):
+    return user_id % 2 == 0
+
+class SimulatedPool:
+    def __init__(self, rtt):
+        self.rtt = rtt
+        self.round_trips = 0
+
+    async def _round_trip(self):
+        self.round_trips += 1
+        await asyncio.sleep(self.rtt)
+
+    async def fetchone(self, sql, params=()):
+        await self._round_trip()
+        if sql.startswith("SELECT s."):
+            user_id = params[1]
+            return (*CONFIG_ROW, not is_new(user_id), None if is_new(user_id) else "False")
+        if "FROM servers" in sql:
+            return CONFIG_ROW
+        if "Global_Banned" in sql:
+            return None
+        return None if is_new(params[0]) else (params[0],)
+
+    async def execute(self, sql, params=()):
+        await self._round_trip()
+        return 1
+
+async def legacy_join(pool, user_id):
+    config = await pool.fetchone("SELECT Guild_ID, setup FROM servers WHERE Guild_ID = %s", (GUILD_ID,))
+    if config:
+        if await pool.fetchone("SELECT User_ID FROM Users WHERE User_ID = %s", (user_id,)) is None:
+            await pool.execute("INSERT INTO Users (User_ID, User_Name, Account_Age, Global_Banned) VALUES (%s, %s, %s, %s)", ())
+        await pool.fetchone("SELECT User_ID FROM Users WHERE User_ID = %s AND Global_Banned = %s", (user_id, "True"))
+
+async def new_join(pool, user_id):
+    decision = await join_decision(pool, GUILD_ID, user_id)
+    if decision.setup and not decision.known:
+        await pool.execute("INSERT INTO Users ... WHERE NOT EXISTS (...)", ())
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def measure(label, join, pool, user_ids, before=None):
+    pool.round_trips = 0
+    latencies = []
+    for user_id in user_ids:
+        if before:
+            before()
+        started = time.perf_counter()
+        await join(pool, user_id)
+        latencies.append((time.perf_counter() - started) * 1e3)
+    print(f"{label:>14}: p50 {percentile(latencies, 0.5):6.3f} ms, p99 {percentile(latencies, 0.99):6.3f} ms, "
+          f"{pool.round_trips / len(user_ids):.2f} round trips/join")
+
+async def main():
+    joins = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rtt_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    pool = SimulatedPool(rtt_ms / 1e3)
+    user_ids = [10**17 + i for i in range(joins)]
+    print(f"{joins} joins, {rtt_ms} ms per database round trip, half of them new users:")
+
+    await measure("before", legacy_join, pool, user_ids)
+
+    ban_index.loaded = False
+    await measure("after (cold)", new_join, pool, user_ids, before=lambda: server_configs.invalidate(GUILD_ID))
+
+    ban_index.loaded = True
+    await measure("after (warm)", new_join, pool, user_ids)
+
+if __name__ == "__main__":
+    asyncio.run(main())
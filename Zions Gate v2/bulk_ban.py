@@ -0,0 +1,104 @@
+"""
+Bulk global ban import from a CSV or plain list of user IDs.
+
+Each line holds a Discord ID (or mention), optionally followed by a reason. The list is
+parsed and deduplicated here; the caller skips IDs that are already in the ban index
+and records the rest in one batched transaction. Guild bans then go out through
+Guild.bulk_ban, up to 200 IDs per request, as discord.Object so no user has to be
+fetched first. Every guild's requests run through the ModerationExecutor, and the
+outcome for every ID is written to a CSV report.
+"""
+
+import csv
+import io
+from collections import Counter
+from dataclasses import dataclass
+
+import discord
+
+from moderation import ModerationExecutor, format_status_counts
+
+# Discord accepts at most 200 users per bulk ban request
+BULK_BAN_CHUNK = 200
+MAX_REASON_LENGTH = 255
+REPORT_COLUMNS = ("discord_id", "reason", "status", "guilds_banned", "guilds_failed")
+
+@dataclass
+class BanEntry:
+    discord_id: object
+    reason: str
+    status: str = "pending"
+    banned_in: int = 0
+    failed_in: int = 0
+
+def _parse_id(cell):
+    cell = cell.strip().lstrip("<@!").rstrip(">")
+    return int(cell) if cell.isdigit() and 15 <= len(cell) <= 20 else None
+
+def parse_ban_list(text, default_reason):
+    """
+    Parses 'id[,reason]' lines. Returns (entries, rejected): one BanEntry per distinct
+    valid ID in file order, and BanEntry rows marked "invalid" or "duplicate".
+    """
+    entries, rejected, seen = [], [], set()
+    for line_number, row in enumerate(csv.reader(io.StringIO(text)), start=1):
+        if not row or not "".join(row).strip():
+            continue
+        user_id = _parse_id(row[0])
+        if user_id is None:
+            # A header row is expected, anything else is reported
+            if line_number > 1:
+                rejected.append(BanEntry(row[0].strip(), "", status="invalid"))
+            continue
+        reason = ",".join(row[1:]).strip() or default_reason
+        if user_id in seen:
+            rejected.append(BanEntry(user_id, reason, status="duplicate"))
+            continue
+        seen.add(user_id)
+        entries.append(BanEntry(user_id, reason[:MAX_REASON_LENGTH]))
+    return entries, rejected
+
+async def bulk_ban_guilds(guilds, entries, reason, executor=None, progress=None):
+    """
+    Bans every entry in every guild and tallies per-ID results on the entries, whose
+    status becomes "banned" (in at least one guild) or "failed". Returns the RunReport,
+    which has one result per guild and chunk of IDs.
+    """
+    by_id = {entry.discord_id: entry for entry in entries}
+    ids = list(by_id)
+    items = [(guild, ids[start:start + BULK_BAN_CHUNK]) for guild in guilds for start in range(0, len(ids), BULK_BAN_CHUNK)]
+
+    async def ban_chunk(item):
+        guild, chunk = item
+        permissions = guild.me.guild_permissions
+        if not (permissions.ban_members and permissions.manage_guild):
+            return "forbidden"
+        result = await guild.bulk_ban([discord.Object(id=user_id) for user_id in chunk], reason=reason, delete_message_seconds=0)
+        for user in result.banned:
+            by_id[user.id].banned_in += 1
+        for user in result.failed:
+            by_id[user.id].failed_in += 1
+        return "banned"
+
+    report = await (executor or ModerationExecutor()).run(items, ban_chunk, key=lambda item: item[0].id, progress=progress)
+    for result in report.results:
+        if result.status != "banned":
+            for user_id in result.item[1]:
+                by_id[user_id].failed_in += 1
+    for entry in entries:
+        entry.status = "banned" if entry.banned_in else "failed"
+    return report
+
+def summarize(entries):
+    return format_status_counts(Counter(entry.status for entry in entries))
+
+def build_report(entries, filename="bulk_ban_report.csv"):
+    """
+    Returns the per-ID results as a CSV discord.File.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(REPORT_COLUMNS)
+    for entry in entries:
+        writer.writerow((entry.discord_id, entry.reason, entry.status, entry.banned_in, entry.failed_in))
+    return discord.File(io.BytesIO(buffer.getvalue().encode("utf-8")), filename=filename)
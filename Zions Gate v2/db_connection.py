@@ -1,9 +1,17 @@
+import asyncio
+import time
+
 import mysql.connector
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+DB_POOL_SIZE = int(os.getenv("db_pool_size", "8"))
+DB_ACQUIRE_TIMEOUT = float(os.getenv("db_acquire_timeout", "5"))
+DB_QUERY_TIMEOUT = float(os.getenv("db_query_timeout", "10"))
+DB_HEALTH_CHECK_INTERVAL = float(os.getenv("db_health_check_interval", "30"))
+
 def db_connection():
     dbc = mysql.connector.connect(
         host='localhost',
@@ -12,3 +20,181 @@ def db_connection():
         database='Discord'
     )
     return dbc
+
+class PoolTimeout(Exception):
+    """
+    Raised when no pooled connection frees up within the acquire timeout.
+    """
+
+class QueryTimeout(Exception):
+    """
+    Raised when a query does not finish within the per-query timeout.
+    """
+
+def _quiet_close(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+def _fetchone(conn, sql, params):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+
+def _fetchall(conn, sql, params):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+def _execute(conn, sql, params):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+def _executemany(conn, sql, rows):
+    cursor = conn.cursor()
+    try:
+        cursor.executemany(sql, rows)
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+def _in_transaction(conn, work, args):
+    conn.start_transaction()
+    try:
+        cursor = conn.cursor()
+        try:
+            result = work(cursor, *args)
+        finally:
+            cursor.close()
+        conn.commit()
+        return result
+    except BaseException:
+        conn.rollback()
+        raise
+
+class DatabasePool:
+    """
+    A size-bounded pool of MySQL connections for use from coroutines.
+
+    mysql.connector is blocking, so every query runs on a worker thread and the
+    event loop keeps serving the gateway heartbeat while it waits. Connections are
+    opened lazily up to `size`, run in autocommit mode, are pinged before reuse once
+    they have sat idle, and are retired instead of reused after any failure.
+    """
+
+    def __init__(self, connect, size=DB_POOL_SIZE, acquire_timeout=DB_ACQUIRE_TIMEOUT,
+                 query_timeout=DB_QUERY_TIMEOUT, health_check_interval=DB_HEALTH_CHECK_INTERVAL):
+        self._connect = connect
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        self.query_timeout = query_timeout
+        self.health_check_interval = health_check_interval
+        self._idle = []
+        self._slots = None
+
+    async def start(self, warm=1):
+        """
+        Creates the pool and opens `warm` connections up front. Safe to call twice.
+        """
+        if self._slots is not None:
+            return
+        self._slots = asyncio.Semaphore(self.size)
+        for _ in range(min(warm, self.size)):
+            conn = await asyncio.to_thread(self._open)
+            self._idle.append((conn, time.monotonic()))
+        print(f"Database pool started (size={self.size}).")
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            await asyncio.to_thread(_quiet_close, conn)
+
+    def _open(self):
+        conn = self._connect()
+        conn.autocommit = True
+        return conn
+
+    def _retire(self, conn):
+        asyncio.get_running_loop().run_in_executor(None, _quiet_close, conn)
+
+    async def _checkout(self):
+        while self._idle:
+            conn, last_used = self._idle.pop()
+            if time.monotonic() - last_used < self.health_check_interval:
+                return conn
+            try:
+                await asyncio.to_thread(conn.ping, False)
+                return conn
+            except Exception:
+                self._retire(conn)
+        return await asyncio.to_thread(self._open)
+
+    async def run(self, work, *args):
+        """
+        Runs `work(conn, *args)` on a worker thread with a pooled connection and
+        returns its result. Raises PoolTimeout or QueryTimeout on the respective limits.
+        """
+        if self._slots is None:
+            raise RuntimeError("Database pool used before start().")
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise PoolTimeout(f"No database connection available within {self.acquire_timeout}s.") from None
+
+        try:
+            conn = await self._checkout()
+        except BaseException:
+            self._slots.release()
+            raise
+
+        future = asyncio.get_running_loop().run_in_executor(None, work, conn, *args)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), timeout=self.query_timeout)
+        except BaseException as e:
+            # The worker thread may still be using the connection, so the slot is only
+            # freed (and the connection closed) once it has actually finished.
+            def _finished(_):
+                self._retire(conn)
+                self._slots.release()
+            future.add_done_callback(_finished)
+            if isinstance(e, asyncio.TimeoutError):
+                raise QueryTimeout(f"Query did not finish within {self.query_timeout}s.") from None
+            raise
+        self._idle.append((conn, time.monotonic()))
+        self._slots.release()
+        return result
+
+    async def fetchone(self, sql, params=()):
+        return await self.run(_fetchone, sql, params)
+
+    async def fetchall(self, sql, params=()):
+        return await self.run(_fetchall, sql, params)
+
+    async def execute(self, sql, params=()):
+        """
+        Executes a single write statement and returns the affected row count.
+        """
+        return await self.run(_execute, sql, params)
+
+    async def executemany(self, sql, rows):
+        return await self.run(_executemany, sql, rows)
+
+    async def transaction(self, work, *args):
+        """
+        Runs `work(cursor, *args)` inside one transaction, committing on success
+        and rolling back on any error.
+        """
+        return await self.run(_in_transaction, work, args)
+
+db_pool = DatabasePool(db_connection)
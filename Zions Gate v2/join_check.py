@@ -0,0 +1,55 @@
+"""
+One lookup for everything on_member_join needs to decide what to do with a member.
+
+A JoinDecision carries whether the guild is set up, whether the member is globally
+banned and whether they already have a Users row. With the guild's configuration
+cached and the ban index loaded it is answered from memory, and a new member is then
+recorded with a single insert-if-missing statement. Otherwise one query reads the
+servers and Users rows by key, and its result warms the configuration cache.
+
+bench_join_check.py compares this with the join check it replaces.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from ban_index import ban_index
+from server_config import CONFIG_COLUMNS, GuildConfig, server_configs
+
+JOIN_DECISION_SQL = (
+    "SELECT " + ", ".join(f"s.{column.strip()}" for column in CONFIG_COLUMNS.split(",")) + ", "
+    "u.User_ID IS NOT NULL, u.Global_Banned "
+    "FROM (SELECT %s AS guild_key, %s AS user_key) AS joined "
+    "LEFT JOIN servers s ON s.Guild_ID = joined.guild_key "
+    "LEFT JOIN Users u ON u.User_ID = joined.user_key"
+)
+
+@dataclass(frozen=True)
+class JoinDecision:
+    config: Optional[GuildConfig]
+    banned: bool
+    # None when answered from the caches, which do not track Users rows
+    known: Optional[bool] = None
+
+    @property
+    def setup(self):
+        return bool(self.config and self.config.setup)
+
+    @property
+    def cached(self):
+        return self.known is None
+
+async def join_decision(pool, guild_id, user_id):
+    """
+    Returns the JoinDecision for a member, reading the database at most once.
+    """
+    cached, config = server_configs.peek(guild_id)
+    if cached and ban_index.loaded:
+        return JoinDecision(config, user_id in ban_index)
+
+    row = await pool.fetchone(JOIN_DECISION_SQL, (guild_id, user_id))
+    *config_row, known, global_banned = row
+    config = GuildConfig.from_row(config_row) if config_row[0] is not None else None
+    server_configs.put(guild_id, config)
+    banned = user_id in ban_index if ban_index.loaded else global_banned == "True"
+    return JoinDecision(config, banned, bool(known))
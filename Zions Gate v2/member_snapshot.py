@@ -0,0 +1,67 @@
+"""
+Per-guild snapshots of the member IDs already recorded in the Users table.
+
+Each snapshot is the guild's member IDs as a sorted array('Q'), delta-encoded and
+zlib-compressed into MEMBER_SNAPSHOT_DIR/<guild_id>.bin. At on_ready only members who
+are not in the snapshot need to be looked up and inserted, so a restart does a handful
+of batched queries for the people who joined while the bot was down instead of a
+SELECT per member of every guild.
+"""
+
+import os
+import zlib
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MEMBER_SNAPSHOT_DIR = os.getenv("MEMBER_SNAPSHOT_DIR", "member_snapshots")
+
+def pack(member_ids):
+    ids = sorted(member_ids)
+    deltas = array("Q", (b - a for a, b in zip([0] + ids, ids)))
+    return zlib.compress(deltas.tobytes(), 1)
+
+def unpack(blob):
+    deltas = array("Q")
+    deltas.frombytes(zlib.decompress(blob))
+    return array("Q", accumulate(deltas))
+
+def joined_since(snapshot_ids, member_ids):
+    """
+    Returns the IDs in member_ids that are not in the sorted snapshot array.
+    """
+    size = len(snapshot_ids)
+    joined = []
+    for member_id in member_ids:
+        index = bisect_left(snapshot_ids, member_id)
+        if index == size or snapshot_ids[index] != member_id:
+            joined.append(member_id)
+    return joined
+
+def _path(guild_id):
+    return os.path.join(MEMBER_SNAPSHOT_DIR, f"{guild_id}.bin")
+
+def load_snapshot(guild_id):
+    """
+    Returns the guild's snapshot array, or an empty one if there is none or it is unreadable.
+    """
+    try:
+        with open(_path(guild_id), "rb") as f:
+            return unpack(f.read())
+    except FileNotFoundError:
+        return array("Q")
+    except (OSError, zlib.error) as e:
+        print(f"Error reading member snapshot for guild {guild_id}: {e}")
+        return array("Q")
+
+def save_snapshot(guild_id, member_ids):
+    os.makedirs(MEMBER_SNAPSHOT_DIR, exist_ok=True)
+    path = _path(guild_id)
+    # Written beside the old file and swapped in, so a crash never leaves half a snapshot
+    with open(path + ".tmp", "wb") as f:
+        f.write(pack(member_ids))
+    os.replace(path + ".tmp", path)
@@ -0,0 +1,67 @@
+"""
+Per-guild cache of the servers table, used by the slash command interaction check.
+
+Each guild's setup flag and its Local_*/Global_* role IDs are held in memory as
+frozensets, so the permission check is a set intersection with no database I/O.
+Entries are loaded in bulk at on_ready and dropped whenever /setup rewrites a guild's
+row or one of its roles is deleted; the next lookup re-reads that one row.
+"""
+
+from dataclasses import dataclass
+
+CONFIG_COLUMNS = "Guild_ID, setup, Local_1, Local_2, Local_3, Global_1, Global_2, Global_3"
+
+@dataclass(frozen=True)
+class GuildConfig:
+    setup: bool
+    local_roles: frozenset
+    global_roles: frozenset
+
+    @classmethod
+    def from_row(cls, row):
+        _, setup, local1, local2, local3, global1, global2, global3 = row
+        return cls(
+            setup=(setup == 1 or setup is True or setup == "True"),
+            local_roles=frozenset(int(r) for r in (local1, local2, local3) if r is not None),
+            global_roles=frozenset(int(r) for r in (global1, global2, global3) if r is not None),
+        )
+
+    @property
+    def role_ids(self):
+        return self.local_roles | self.global_roles
+
+class ServerConfigCache:
+    def __init__(self):
+        self._configs = {}
+
+    async def load_all(self, pool):
+        rows = await pool.fetchall(f"SELECT {CONFIG_COLUMNS} FROM servers")
+        self._configs = {row[0]: GuildConfig.from_row(row) for row in rows}
+        print(f"Loaded configuration for {len(self._configs)} servers.")
+
+    async def get(self, pool, guild_id):
+        """
+        Returns the guild's GuildConfig, or None if the guild is not registered.
+        """
+        if guild_id in self._configs:
+            return self._configs[guild_id]
+        row = await pool.fetchone(f"SELECT {CONFIG_COLUMNS} FROM servers WHERE Guild_ID = %s", (guild_id,))
+        config = GuildConfig.from_row(row) if row else None
+        self._configs[guild_id] = config
+        return config
+
+    def peek(self, guild_id):
+        """
+        Returns (True, config) if the guild is cached and (False, None) otherwise.
+        """
+        if guild_id in self._configs:
+            return True, self._configs[guild_id]
+        return False, None
+
+    def put(self, guild_id, config):
+        self._configs[guild_id] = config
+
+    def invalidate(self, guild_id):
+        self._configs.pop(guild_id, None)
+
+server_configs = ServerConfigCache()
@@ -0,0 +1,336 @@
+"""
+Durable, batching sender for webhook log messages.
+
+Every record is first appended to a local spool file (one append-only JSON-lines
+segment per webhook, no fsync) and the caller returns immediately. Segments are named
+by a hash of the webhook URL and records do not carry it, so tokens never reach the
+disk; the URL is resolved in memory when sending. One drainer per webhook replays the
+spool from its checkpoint offset, packing consecutive records into as few messages as
+possible (up to 2000 characters of content, 10 embeds and 6000 characters of embed
+text each) and posting them over the bot's shared aiohttp session. The checkpoint only
+moves after a message is accepted, so records survive webhook outages and process
+restarts and are delivered at least once. A packed message Discord rejects is re-sent
+record by record, so only a record that is itself invalid is dropped. Drainers pace
+themselves from Discord's X-RateLimit-* headers, honour Retry-After on 429 and back
+off exponentially while the webhook is unreachable.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+WEBHOOK_SPOOL_DIR = os.getenv("webhook_spool_dir", "webhook_spool")
+MAX_CONTENT_LENGTH = 2000
+MAX_EMBEDS = 10
+# Discord's limit on the text of all embeds in one message combined
+MAX_EMBED_TEXT = 6000
+BATCH_LINGER = 0.5
+MAX_BATCH_RECORDS = 100
+MAX_BACKOFF = 300
+COMPACT_BYTES = 1024 * 1024
+
+def embed_text_length(embed):
+    """
+    Counts the characters of an embed dict that Discord holds against MAX_EMBED_TEXT.
+    """
+    length = len(embed.get("title") or "") + len(embed.get("description") or "")
+    length += len((embed.get("footer") or {}).get("text") or "")
+    length += len((embed.get("author") or {}).get("name") or "")
+    for field in embed.get("fields") or []:
+        length += len(field.get("name") or "") + len(field.get("value") or "")
+    return length
+
+class LogRecord:
+    __slots__ = ("content", "embeds", "username", "embed_length")
+
+    def __init__(self, content=None, embeds=None, username=None):
+        if content and len(content) > MAX_CONTENT_LENGTH:
+            content = content[:MAX_CONTENT_LENGTH - 3] + "..."
+        self.content = content or ""
+        self.embeds = list(embeds or [])[:MAX_EMBEDS]
+        self.username = username
+        self.embed_length = sum(embed_text_length(embed) for embed in self.embeds)
+
+def group_records(records):
+    """
+    Splits records, in order, into groups that each fit in one webhook message.
+    """
+    groups = []
+    current, length, embed_count, embed_length = [], 0, 0, 0
+    for record in records:
+        extra = len(record.content) + (1 if current else 0)
+        if current and (
+            length + extra > MAX_CONTENT_LENGTH
+            or embed_count + len(record.embeds) > MAX_EMBEDS
+            or embed_length + record.embed_length > MAX_EMBED_TEXT
+        ):
+            groups.append(current)
+            current, length, embed_count, embed_length = [], 0, 0, 0
+            extra = len(record.content)
+        current.append(record)
+        length += extra
+        embed_count += len(record.embeds)
+        embed_length += record.embed_length
+    if current:
+        groups.append(current)
+    return groups
+
+def build_payload(group, default_username=None):
+    payload = {"content": "\n".join(record.content for record in group if record.content)}
+    embeds = [embed for record in group for embed in record.embeds]
+    if embeds:
+        payload["embeds"] = embeds
+    usernames = {record.username for record in group if record.username}
+    username = next(iter(usernames)) if len(usernames) == 1 else default_username
+    if username:
+        payload["username"] = username
+    return payload
+
+def pack_records(records, default_username=None):
+    """
+    Packs records, in order, into as few webhook payloads as the message limits allow.
+    """
+    return [build_payload(group, default_username) for group in group_records(records)]
+
+class PermanentWebhookError(Exception):
+    """
+    Raised when Discord rejects a payload outright; retrying it would never succeed.
+    """
+
+class Spool:
+    """
+    Append-only segment file plus a checkpoint holding the byte offset delivered so far.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offset_path = path + ".offset"
+        try:
+            with open(self.offset_path, "r", encoding="utf-8") as f:
+                self.offset = int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            self.offset = 0
+        self._file = open(path, "ab")
+
+    def append(self, data):
+        self._file.write((json.dumps(data, ensure_ascii=False) + "\n").encode("utf-8"))
+        self._file.flush()
+
+    def size(self):
+        return self._file.tell()
+
+    def pending(self):
+        return self.offset < self.size()
+
+    def read(self, max_records=MAX_BATCH_RECORDS):
+        """
+        Returns up to `max_records` complete (data, end_offset) entries after the checkpoint.
+        """
+        entries = []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            position = self.offset
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                position += len(line)
+                try:
+                    entries.append((json.loads(line), position))
+                except ValueError:
+                    print(f"Skipping corrupt webhook spool line in {self.path}.")
+                    entries.append((None, position))
+                if len(entries) >= max_records:
+                    break
+        return entries
+
+    def commit(self, offset):
+        self.offset = offset
+        if offset >= self.size() and offset >= COMPACT_BYTES:
+            # Everything has been delivered; start the segment over.
+            self._file.truncate(0)
+            self._file.seek(0)
+            self.offset = 0
+        tmp_path = self.offset_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(str(self.offset))
+        os.replace(tmp_path, self.offset_path)
+
+    def close(self):
+        self._file.close()
+
+def webhook_key(url):
+    """
+    Names a webhook without its token; spool files and their records only carry this.
+    """
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+class WebhookDispatcher:
+    def __init__(self, default_username=None, spool_dir=WEBHOOK_SPOOL_DIR, linger=BATCH_LINGER):
+        self.default_username = default_username
+        self.spool_dir = spool_dir
+        self.linger = linger
+        self.session = None
+        # webhook key -> URL, known only in memory from enqueue/register
+        self._urls = {}
+        self._spools = {}
+        self._wakeups = {}
+        self._drainers = {}
+        self.sent_messages = 0
+        self.sent_records = 0
+        self.dropped_records = 0
+
+    def register(self, *urls):
+        """
+        Makes webhook URLs known up front, so spools left by a previous run for them are
+        drained before anything new is logged to them.
+        """
+        for url in urls:
+            if url:
+                key = webhook_key(url)
+                self._urls[key] = url
+                if self.session is not None and key in self._spools:
+                    self._start_drainer(key)
+
+    def _spool_for(self, key):
+        spool = self._spools.get(key)
+        if spool is None:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            spool = self._spools[key] = Spool(os.path.join(self.spool_dir, key + ".log"))
+            self._wakeups[key] = asyncio.Event()
+        return spool
+
+    def start(self, session, urls=()):
+        """
+        Starts draining, including records left in the spool by a previous run. Spools
+        of webhooks not in `urls` wait until their URL is registered or logged to.
+        """
+        self.session = session
+        if os.path.isdir(self.spool_dir):
+            for name in os.listdir(self.spool_dir):
+                key = name[:-len(".log")]
+                if not name.endswith(".log") or key in self._spools:
+                    continue
+                spool = Spool(os.path.join(self.spool_dir, name))
+                if not spool.pending():
+                    spool.close()
+                    continue
+                self._spools[key] = spool
+                self._wakeups[key] = asyncio.Event()
+                # Spools written before records stopped carrying the URL
+                entries = spool.read(max_records=1)
+                if entries and entries[0][0] and entries[0][0].get("url"):
+                    self._urls.setdefault(key, entries[0][0]["url"])
+                print(f"Resuming {spool.size() - spool.offset} bytes of spooled webhook messages.")
+        self.register(*urls)
+        for key in self._spools:
+            if key in self._urls:
+                self._start_drainer(key)
+
+    def _start_drainer(self, key):
+        if key not in self._drainers:
+            self._drainers[key] = asyncio.create_task(self._drain(key, self._spools[key], self._wakeups[key]))
+
+    def enqueue(self, url, content=None, embeds=None, username=None):
+        """
+        Appends one log record to the spool for `url` without waiting for delivery.
+        """
+        if not url:
+            return
+        key = webhook_key(url)
+        self._urls[key] = url
+        record = LogRecord(content, embeds, username)
+        spool = self._spool_for(key)
+        spool.append({"content": record.content, "embeds": record.embeds, "username": record.username})
+        if self.session is not None:
+            self._start_drainer(key)
+            self._wakeups[key].set()
+
+    async def close(self, timeout=10):
+        """
+        Gives spooled records up to `timeout` seconds to go out, then stops the drainers.
+        Anything still undelivered is replayed on the next start.
+        """
+        async def drained():
+            while any(spool.pending() for key, spool in self._spools.items() if key in self._drainers):
+                await asyncio.sleep(0.1)
+        try:
+            await asyncio.wait_for(drained(), timeout)
+        except asyncio.TimeoutError:
+            print("Timed out flushing webhook spool; remaining messages will be sent on restart.")
+        for task in self._drainers.values():
+            task.cancel()
+        for spool in self._spools.values():
+            spool.close()
+
+    async def _drain(self, key, spool, wakeup):
+        backoff = 1
+        while True:
+            if not spool.pending():
+                wakeup.clear()
+                await wakeup.wait()
+                await asyncio.sleep(self.linger)
+            entries = spool.read()
+            if not entries:
+                await asyncio.sleep(self.linger)
+                continue
+            records, ends = [], []
+            for data, end in entries:
+                if data is not None:
+                    records.append(LogRecord(data.get("content"), data.get("embeds"), data.get("username")))
+                    ends.append(end)
+            if not records:
+                spool.commit(entries[-1][1])
+                continue
+            try:
+                position = 0
+                for group in group_records(records):
+                    position += len(group)
+                    await self._send_group(self._urls[key], group)
+                    spool.commit(ends[position - 1])
+                backoff = 1
+            except Exception as e:
+                print(f"Failed to send log message, retrying in {backoff}s: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF)
+
+    async def _send_group(self, url, group):
+        """
+        Posts a packed group. If Discord rejects it, its records are sent one at a time
+        so only the record that is itself undeliverable is dropped.
+        """
+        try:
+            await self._post(url, build_payload(group, self.default_username))
+            self.sent_records += len(group)
+            return
+        except PermanentWebhookError as e:
+            if len(group) == 1:
+                self.dropped_records += 1
+                print(f"Dropping undeliverable log record: {e}")
+                return
+            print(f"Webhook rejected {len(group)} packed log records, sending them one at a time: {e}")
+        for record in group:
+            await self._send_group(url, [record])
+
+    async def _post(self, url, payload):
+        while True:
+            async with self.session.post(url, json=payload) as response:
+                if response.status == 429:
+                    data = await response.json(content_type=None)
+                    retry_after = float(response.headers.get("Retry-After") or data.get("retry_after", 1))
+                    print(f"Webhook rate limited, retrying in {retry_after:.2f}s.")
+                    await asyncio.sleep(retry_after)
+                    continue
+                if response.status == 400:
+                    raise PermanentWebhookError(f"{response.status} {await response.text()}")
+                if response.status not in (200, 204):
+                    raise RuntimeError(f"{response.status} {await response.text()}")
+                self.sent_messages += 1
+                # Stay inside the bucket instead of waiting to be told off with a 429
+                if response.headers.get("X-RateLimit-Remaining") == "0":
+                    await asyncio.sleep(float(response.headers.get("X-RateLimit-Reset-After", 1)))
+                return